@@ -6,8 +6,8 @@ from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, Response, Request
 from jose import jwt as jose_jwt, JWTError
 
-from app.core.utils import hash_otp, generate_otp, is_full_day, now_utc
-from app.services.otp_service import OTPService
+from app.core.utils import hash_otp, generate_otp, is_full_day
+from app.services.otp_store import OtpStore
 from app.services.auth_service import AuthService
 from app.services.user_service import UserService
 from app.services.business_service import BusinessService
@@ -16,7 +16,7 @@ from app.services.address_service import AddressService
 from app.services.schedule_service import ScheduleService
 from app.controllers.role_controller import RoleController
 from app.middleware.auth import detect_client_type, create_access_token, get_access_token_expires_time
-from app.core.config import RATE_LIMIT_PER_HOUR, OTP_EXPIRY_MINUTES, DEFAULT_OTP, SECRET_KEY, ALGORITHM, ISSECURE, SAMESITE
+from app.core.config import DEFAULT_OTP, SECRET_KEY, ALGORITHM, ISSECURE, SAMESITE
 from app.services.firebase_service import verify_firebase_id_token
 from app.core.constants import BUSINESS_REGISTERED
 from app.models.user import User
@@ -37,11 +37,18 @@ from app.core.context import RequestContext
 
 logger = logging.getLogger(__name__)
 
+_OTP_ERROR_MESSAGES = {
+    OTPVerifyErrorCode.OTP_NOT_FOUND: "OTP not found",
+    OTPVerifyErrorCode.OTP_EXPIRED: "OTP expired",
+    OTPVerifyErrorCode.OTP_INVALID: "Invalid OTP",
+    OTPVerifyErrorCode.OTP_ALREADY_USED: "OTP already used",
+}
+
 
 class AuthController:
     def __init__(self, db: Session):
         self.db = db
-        self.otp_service = OTPService(db)
+        self.otp_store = OtpStore(db)
         self.auth_service = AuthService(db)
         self.user_service = UserService(db)
         self.role_controller = RoleController(db)
@@ -50,59 +57,23 @@ class AuthController:
         self.address_service = AddressService(db)
         self.schedule_service = ScheduleService(db)
 
-    def validate_otp_and_consume(self, country_code: str, phone_number: str, otp: str) -> None:
+    async def validate_otp_and_consume(self, country_code: str, phone_number: str, otp: str) -> None:
         if DEFAULT_OTP and otp == DEFAULT_OTP:
             return
 
-        otp_record = self.otp_service.get_latest_otp(country_code, phone_number)
-        if not otp_record:
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "error_code": OTPVerifyErrorCode.OTP_NOT_FOUND.value,
-                    "message": "OTP not found",
-                },
-            )
-        if int(otp_record.status) == 2:  # type: ignore[arg-type]
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "error_code": OTPVerifyErrorCode.OTP_ALREADY_USED.value,
-                    "message": "OTP already used",
-                },
-            )
-        expires_at = otp_record.expires_at
-        if expires_at is not None:
-            if expires_at.tzinfo is None:
-                expires_at = expires_at.replace(tzinfo=timezone.utc)
-            if expires_at < now_utc():
-                raise HTTPException(
-                    status_code=400,
-                    detail={
-                        "error_code": OTPVerifyErrorCode.OTP_EXPIRED.value,
-                        "message": "OTP expired",
-                    },
-                )
-        if str(otp_record.otp_hash) != hash_otp(otp):  # type: ignore[arg-type]
+        error = await self.otp_store.consume(country_code, phone_number, hash_otp(otp))
+        if error is not None:
             raise HTTPException(
                 status_code=400,
-                detail={
-                    "error_code": OTPVerifyErrorCode.OTP_INVALID.value,
-                    "message": "Invalid OTP",
-                },
+                detail={"error_code": error.value, "message": _OTP_ERROR_MESSAGES[error]},
             )
-        self.otp_service.mark_otp_used(otp_record)
 
     async def send_otp(self, data: OTPRequestInput) -> OTPRequestResponse:
         try:
             country_code = data.country_code
             phone_number = data.phone_number
 
-            one_hour_ago = now_utc() - timedelta(hours=1)
-            recent_attempts = self.otp_service.get_recent_otp_attempts(
-                country_code, phone_number, one_hour_ago
-            )
-            if recent_attempts >= RATE_LIMIT_PER_HOUR:
+            if not await self.otp_store.allow_send(country_code, phone_number):
                 raise HTTPException(
                     status_code=429,
                     detail={
@@ -111,16 +82,7 @@ class AuthController:
                     },
                 )
             otp = generate_otp()
-            hashed = hash_otp(otp)
-            expires_at = now_utc() + timedelta(minutes=OTP_EXPIRY_MINUTES)
-            self.otp_service.create_otp_entry(
-                country_code=country_code,
-                phone_number=phone_number,
-                otp_hash=hashed,
-                expires_at=expires_at,
-                attempts=1,
-                status=1
-            )
+            await self.otp_store.save(country_code, phone_number, hash_otp(otp))
             return OTPRequestResponse(message="OTP sent successfully")
         except HTTPException:
             raise
@@ -130,7 +92,7 @@ class AuthController:
 
     async def verify_otp_customer(self, data: OTPVerifyInput, response: Response, request: Request) -> LoginResponse:
         try:
-            self.validate_otp_and_consume(data.country_code, data.phone_number, data.otp)
+            await self.validate_otp_and_consume(data.country_code, data.phone_number, data.otp)
             user = self.user_service.get_user_by_phone(data.country_code, data.phone_number)
             if not user:
                 user = self.user_service.create_user(
@@ -359,7 +321,7 @@ class AuthController:
 
     async def business_verify_otp(self, data: OTPVerifyInput, response: Response, request: Request) -> LoginResponse:
         try:
-            self.validate_otp_and_consume(data.country_code, data.phone_number, data.otp)
+            await self.validate_otp_and_consume(data.country_code, data.phone_number, data.otp)
             client_type = detect_client_type(request, data.client_type)
             user = self.get_or_create_user_for_business_flow(
                 data.country_code, data.phone_number, data.client_type
@@ -667,7 +629,7 @@ class AuthController:
     async def admin_verify_otp(self, data: OTPVerifyInput, response: Response, request: Request) -> LoginResponse:
         """Verify OTP for admin login. Only succeeds if the user has the ADMIN role."""
         try:
-            self.validate_otp_and_consume(data.country_code, data.phone_number, data.otp)
+            await self.validate_otp_and_consume(data.country_code, data.phone_number, data.otp)
             user = self.user_service.get_user_by_phone(data.country_code, data.phone_number)
             if not user:
                 raise HTTPException(
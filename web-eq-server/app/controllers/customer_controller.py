@@ -15,6 +15,7 @@ from app.models.address import EntityType
 from app.services.user_service import UserService
 from app.services.address_service import AddressService
 from app.services.queue_service import QueueService
+from app.services.activation_timer import activation_timer
 from app.services.booking_calculation_service import BookingCalculationService
 from app.services.realtime.queue_manager import queue_manager
 from app.services.realtime.live_queue_manager import live_queue_manager
@@ -275,6 +276,9 @@ class CustomerController:
                 new_turn_time=new_turn_time,
             )
 
+            if date_changed and updated.status == QUEUE_USER_SCHEDULED:
+                activation_timer.schedule(updated.uuid, target_date, updated.scheduled_start)
+
             # Redis sync — failure must not block the appointment update
             try:
                 await queue_manager.connect_to_redis()
@@ -0,0 +1,79 @@
+import logging
+from typing import Any, Dict, Literal, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+
+from app.models.user import User
+from app.schemas.export import ExportJobData
+from app.services.export_jobs import (
+    EXPORT_KIND_QUEUE_USERS, EXPORT_KIND_USERS, ExportJob, export_jobs,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ExportController:
+    def submit_queue_users(
+        self,
+        user: User,
+        *,
+        fmt: Literal["pdf", "xlsx", "csv"],
+        business_id: UUID | None,
+        queue_id: UUID | None,
+        employee_id: UUID | None,
+        search: str | None,
+    ) -> ExportJobData:
+        return self._submit(user, EXPORT_KIND_QUEUE_USERS, fmt, {
+            "business_id": business_id,
+            "queue_id": queue_id,
+            "employee_id": employee_id,
+            "search": search,
+        })
+
+    def submit_users_appointments(
+        self,
+        user: User,
+        *,
+        fmt: Literal["pdf", "xlsx", "csv"],
+        business_id: Optional[UUID],
+        queue_id: Optional[UUID],
+    ) -> ExportJobData:
+        if business_id is not None and queue_id is not None:
+            raise HTTPException(
+                status_code=400,
+                detail={"message": "Provide either business_id or queue_id, not both"},
+            )
+        if business_id is None and queue_id is None:
+            raise HTTPException(
+                status_code=400,
+                detail={"message": "At least one of business_id or queue_id must be provided"},
+            )
+        return self._submit(user, EXPORT_KIND_USERS, fmt, {"business_id": business_id, "queue_id": queue_id})
+
+    def get_job(self, user: User, job_id: str) -> ExportJobData:
+        return ExportJobData(**export_jobs.status(self._own_job(user, job_id)))
+
+    def get_job_file(self, user: User, job_id: str) -> ExportJob:
+        job = self._own_job(user, job_id)
+        status = export_jobs.status(job)["status"]
+        if status == "expired":
+            raise HTTPException(status_code=410, detail={"message": "Export has expired. Please export again."})
+        if status != "done":
+            raise HTTPException(status_code=409, detail={"message": f"Export is not ready (status: {status})"})
+        return job
+
+    def _submit(self, user: User, kind: str, fmt: str, filters: Dict[str, Any]) -> ExportJobData:
+        try:
+            job = export_jobs.submit(str(user.uuid), kind, fmt, filters)
+            return ExportJobData(**export_jobs.status(job))
+        except Exception:
+            logger.exception("Failed to submit export job (kind=%s fmt=%s user_id=%s)", kind, fmt, user.uuid)
+            raise HTTPException(status_code=500, detail={"message": "Export failed. Please try again."})
+
+    @staticmethod
+    def _own_job(user: User, job_id: str) -> ExportJob:
+        job = export_jobs.get(job_id, str(user.uuid))
+        if job is None:
+            raise HTTPException(status_code=404, detail={"message": "Export job not found"})
+        return job
@@ -2,13 +2,14 @@
 NotificationController — orchestrates notification CRUD.
 Router delegates here; this layer calls NotificationService.
 """
+from typing import Optional
 from uuid import UUID
 
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
 from app.schemas.notification import NotificationData, NotificationListResponse
-from app.services.notification_service import NotificationService
+from app.services.notification_service import NotificationService, encode_notification_cursor
 
 
 class NotificationController:
@@ -16,9 +17,9 @@ class NotificationController:
         self.svc = NotificationService(db)
 
     def list_notifications(
-        self, user_id: UUID, limit: int, offset: int
+        self, user_id: UUID, limit: int, offset: int, cursor: Optional[str] = None
     ) -> NotificationListResponse:
-        rows, total = self.svc.get_for_user(user_id, limit=limit, offset=offset)
+        rows, total = self.svc.get_for_user(user_id, limit=limit, offset=offset, cursor=cursor)
         unread = self.svc.get_unread_count(user_id)
         return NotificationListResponse(
             notifications=[NotificationData.from_notification(n) for n in rows],
@@ -26,6 +27,7 @@ class NotificationController:
             unread_count=unread,
             limit=limit,
             offset=offset,
+            next_cursor=encode_notification_cursor(rows[-1]) if len(rows) == limit else None,
         )
 
     def mark_read(self, notification_id: UUID, user_id: UUID) -> NotificationData:
@@ -1,13 +1,15 @@
 import logging
+from typing import Literal
 from uuid import UUID
 
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
-from app.core.qr import business_qr_png, employee_qr_png
+from app.core.qr import QRImage, business_qr_url, employee_qr_url, qr_cache
 from app.models.user import User
 from app.services.business_service import BusinessService
 from app.services.employee_service import EmployeeService
+from app.services.export_service import build_qr_sheet_pdf
 
 logger = logging.getLogger(__name__)
 
@@ -18,19 +20,23 @@ class QRController:
         self.business_service = BusinessService(db)
         self.employee_service = EmployeeService(db)
 
-    def get_business_qr(self, user: User) -> bytes:
+    def get_business_qr(
+        self, user: User, fmt: Literal["png", "svg"] = "png", size: str = "medium"
+    ) -> QRImage:
         try:
             business = self.business_service.get_business_by_owner(user.uuid)
             if not business:
                 raise HTTPException(status_code=404, detail="Business not found.")
-            return business_qr_png(str(business.uuid))
+            return qr_cache.get(business_qr_url(str(business.uuid)), fmt, size)
         except HTTPException:
             raise
         except Exception:
             logger.exception("Failed to get_business_qr (user_id=%s)", user.uuid)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
-    def get_my_employee_qr(self, user: User) -> bytes:
+    def get_my_employee_qr(
+        self, user: User, fmt: Literal["png", "svg"] = "png", size: str = "medium"
+    ) -> QRImage:
         """QR for the authenticated employee's own booking page."""
         try:
             employee = self.employee_service.get_employee_by_user_id(user.uuid)
@@ -41,14 +47,16 @@ class QRController:
                     status_code=422,
                     detail="Assign a queue to this employee before generating a QR code.",
                 )
-            return employee_qr_png(str(employee.business_id), str(employee.queue_id))
+            return qr_cache.get(employee_qr_url(str(employee.business_id), str(employee.queue_id)), fmt, size)
         except HTTPException:
             raise
         except Exception:
             logger.exception("Failed to get_my_employee_qr (user_id=%s)", user.uuid)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
-    def get_employee_qr(self, employee_uuid: UUID, user: User) -> bytes:
+    def get_employee_qr(
+        self, employee_uuid: UUID, user: User, fmt: Literal["png", "svg"] = "png", size: str = "medium"
+    ) -> QRImage:
         """QR for a specific employee — scoped to the authenticated business owner."""
         try:
             business = self.business_service.get_business_by_owner(user.uuid)
@@ -66,9 +74,36 @@ class QRController:
                     status_code=422,
                     detail="Assign a queue to this employee before generating a QR code.",
                 )
-            return employee_qr_png(str(business.uuid), str(employee.queue_id))
+            return qr_cache.get(employee_qr_url(str(business.uuid), str(employee.queue_id)), fmt, size)
         except HTTPException:
             raise
         except Exception:
             logger.exception("Failed to get_employee_qr (employee_uuid=%s user_id=%s)", employee_uuid, user.uuid)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
+    def get_employees_qr_sheet(self, user: User) -> bytes:
+        """Printable PDF with one labelled QR per employee that has a queue."""
+        try:
+            business = self.business_service.get_business_by_owner(user.uuid)
+            if not business:
+                raise HTTPException(status_code=404, detail="Business not found.")
+            rows = self.employee_service.get_employees_with_queue(business.uuid)
+            if not rows:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Assign a queue to at least one employee before generating QR codes.",
+                )
+            cards = [
+                (
+                    row.full_name,
+                    row.queue_name or "",
+                    qr_cache.get(employee_qr_url(str(business.uuid), str(row.queue_id))).content,
+                )
+                for row in rows
+            ]
+            return build_qr_sheet_pdf(f"{business.name} — Booking QR Codes", cards)
+        except HTTPException:
+            raise
+        except Exception:
+            logger.exception("Failed to get_employees_qr_sheet (user_id=%s)", user.uuid)
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
@@ -1,9 +1,10 @@
 import logging
+from collections import defaultdict
 from io import BytesIO
 from sqlalchemy.orm import Session
-from fastapi import HTTPException
+from fastapi import BackgroundTasks, HTTPException
 from uuid import UUID
-from typing import List, Literal, Optional, Any, Dict, Tuple
+from typing import Iterable, Iterator, List, Literal, Optional, Any, Dict, Tuple
 from datetime import date, datetime, time, timedelta, timezone
 import pytz
 
@@ -14,13 +15,13 @@ from app.core.constants import (
     QUEUE_USER_REGISTERED, QUEUE_USER_IN_PROGRESS, QUEUE_USER_COMPLETED,
     QUEUE_USER_FAILED, QUEUE_USER_CANCELLED, QUEUE_USER_SCHEDULED,
     QUEUE_USER_PRIORITY_REQUESTED, QUEUE_USER_EXPIRED,
-    QUEUE_USER_STATUS_LABELS,
-    TIME_FORMAT, DEFAULT_AVG_TIME,
+    TIME_FORMAT, DEFAULT_AVG_TIME, MAX_DAILY_STATS_RANGE_DAYS,
     BOOKING_MODE_FIXED, BOOKING_MODE_APPROXIMATE, BOOKING_MODE_HYBRID,
     APPOINTMENT_TYPE_QUEUE, APPOINTMENT_TYPE_FIXED, APPOINTMENT_TYPE_APPROXIMATE,
 )
 from app.core.utils import (
     APP_TZ,
+    LiveQueueUser,
     build_live_queue_users_raw,
     today_app_date,
     current_time_app_tz,
@@ -30,11 +31,19 @@ from app.core.utils import (
     appointment_window,
     windows_overlap,
 )
+from app.core.config import BOOKING_PREVIEW_TOKEN_TTL_SECONDS
+from app.middleware.auth import create_booking_preview_token, decode_booking_preview_token
+from app.db.database import SessionLocal
+from app.services.activation_timer import activation_timer
 from app.services.queue_service import QueueService
+from app.services.queue_stats_service import QueueStatsService
 from app.services.business_service import BusinessService
 from app.services.booking_calculation_service import BookingCalculationService
 from app.services.slot_generation_service import SlotGenerationService
-from app.services.export_service import MAX_EXPORT_ROWS, build_xlsx, build_pdf
+from app.services.export_service import (
+    MAX_EXPORT_ROWS, MAX_STREAMING_EXPORT_ROWS, CSV_MEDIA_TYPE, PDF_MEDIA_TYPE, XLSX_MEDIA_TYPE,
+    QUEUE_USERS_EXPORT_COLUMNS, build_pdf, queue_user_export_row, stream_csv, stream_xlsx,
+)
 from app.services.user_service import UserService
 from app.services.employee_service import EmployeeService
 from app.services.notification_triggers import (
@@ -53,7 +62,7 @@ from app.services.realtime.customer_queue_manager import customer_queue_manager
 from app.schemas.queue import (
     QueueCreate, QueueCreateBatch, QueueData, QueueDetailData, QueueServiceDetailData,
     QueueUpdate, QueueServicesAdd, QueueServiceUpdate,
-    QueueUserData, QueueUserDetailResponse, QueueUsersPageResponse,
+    QueueUserData, QueueUserDetailResponse, QueueUsersPageResponse, QueueDailyStatsData,
     AvailableSlotData, BookingCreateInput, BookingData, BookingServiceData, BookingPreviewData,
     LiveQueueData,
     CustomerTodayAppointmentResponse,
@@ -238,6 +247,29 @@ class QueueController:
             logger.exception("Failed to get_business_services (business_id=%s)", business_id)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
+    async def get_daily_stats(
+        self,
+        business_id: UUID,
+        date_from: date,
+        date_to: date,
+        queue_id: UUID | None = None,
+    ) -> List[QueueDailyStatsData]:
+        if date_to < date_from:
+            raise HTTPException(status_code=400, detail={"message": "date_to must not be before date_from"})
+        if (date_to - date_from).days > MAX_DAILY_STATS_RANGE_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail={"message": f"Date range cannot exceed {MAX_DAILY_STATS_RANGE_DAYS} days"},
+            )
+        try:
+            rows = QueueStatsService(self.db).get_daily_stats(business_id, date_from, date_to, queue_id)
+            return [QueueDailyStatsData.model_validate(row) for row in rows]
+        except HTTPException:
+            raise
+        except Exception:
+            logger.exception("Failed to get_daily_stats (business_id=%s queue_id=%s)", business_id, queue_id)
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
     async def get_users(
         self,
         *,
@@ -274,12 +306,22 @@ class QueueController:
     async def export_queue_users(
         self,
         *,
-        fmt: Literal["pdf", "xlsx"],
+        fmt: Literal["pdf", "xlsx", "csv"],
         business_id: UUID | None,
         queue_id: UUID | None,
         employee_id: UUID | None,
         search: str | None,
-    ) -> tuple[BytesIO, str, str]:
+    ) -> tuple[BytesIO | Iterable[bytes], str, str]:
+        columns = QUEUE_USERS_EXPORT_COLUMNS
+        today = date.today().strftime("%Y-%m-%d")
+        filename = f"queue-users-{today}.{fmt}"
+        if fmt in ("csv", "xlsx"):
+            rows_iter = self._stream_queue_user_export_rows(
+                business_id=business_id, queue_id=queue_id, employee_id=employee_id, search=search,
+            )
+            if fmt == "csv":
+                return stream_csv(columns, rows_iter), CSV_MEDIA_TYPE, filename
+            return stream_xlsx(columns, rows_iter), XLSX_MEDIA_TYPE, filename
         try:
             rows_raw, _, _ = self.queue_service.get_queue_users(
                 business_id=business_id,
@@ -290,35 +332,40 @@ class QueueController:
                 search=search,
                 status=None,
             )
-            columns = ["Name", "Email", "Phone", "Token No.", "Queue Date", "Enqueue Time", "Status", "Priority"]
-            rows = [
-                [
-                    getattr(user, "full_name", "") or "",
-                    getattr(user, "email", "") or "",
-                    f"{getattr(user, 'country_code', '') or ''} {getattr(user, 'phone_number', '') or ''}".strip(),
-                    queue_user.token_number or "",
-                    queue_user.queue_date.strftime("%Y-%m-%d") if queue_user.queue_date else "",
-                    queue_user.enqueue_time,
-                    QUEUE_USER_STATUS_LABELS.get(queue_user.status, "Unknown"),
-                    "Yes" if getattr(queue_user, "priority", False) else "No",
-                ]
-                for queue_user, user in rows_raw
-            ]
-            today = date.today().strftime("%Y-%m-%d")
-            filename = f"queue-users-{today}.{fmt}"
-            if fmt == "xlsx":
-                buf = build_xlsx(columns, rows)
-                media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            else:
-                buf = build_pdf("Queue Users Report", columns, rows)
-                media_type = "application/pdf"
-            return buf, media_type, filename
+            rows = [queue_user_export_row(user, queue_user) for queue_user, user in rows_raw]
+            return build_pdf("Queue Users Report", columns, rows), PDF_MEDIA_TYPE, filename
         except HTTPException:
             raise
         except Exception:
             logger.exception("Failed to export_queue_users (business_id=%s queue_id=%s)", business_id, queue_id)
             raise HTTPException(status_code=500, detail={"message": "Export failed. Please try again."})
 
+    @staticmethod
+    def _stream_queue_user_export_rows(
+        *,
+        business_id: UUID | None,
+        queue_id: UUID | None,
+        employee_id: UUID | None,
+        search: str | None,
+    ) -> Iterator[list]:
+        # Runs while the response streams, after the request's session is closed,
+        # so it reads through a session of its own.
+        db = SessionLocal()
+        try:
+            for row in QueueService(db).iter_queue_users_export(
+                business_id=business_id,
+                queue_id=queue_id,
+                employee_id=employee_id,
+                search=search,
+                limit=MAX_STREAMING_EXPORT_ROWS,
+            ):
+                yield queue_user_export_row(row, row)
+        except Exception:
+            logger.exception("Streaming queue users export failed (business_id=%s queue_id=%s)", business_id, queue_id)
+            raise
+        finally:
+            db.close()
+
     # ─────────────────────────────────────────────────────────────────────────
     # Customer Booking APIs
     # ─────────────────────────────────────────────────────────────────────────
@@ -328,7 +375,7 @@ class QueueController:
         queues: List[Any],
         booking_date: date,
         current_time: datetime,
-        raw_rows: List[dict],
+        raw_rows: List[LiveQueueUser],
         services_by_queue: Optional[Dict] = None,
         exclude_user_id: Optional[UUID] = None,
     ) -> Dict[UUID, Dict[str, Any]]:
@@ -339,20 +386,21 @@ class QueueController:
         users, so they only affect timing (pushing the new user's slot later) without
         incorrectly inflating position or wait for an empty queue.
         """
-        from app.services.realtime.live_queue_manager import calculate_queue_waits, _scheduled_start_dt
+        from app.services.realtime.live_queue_manager import calculate_queue_waits
 
         calc = BookingCalculationService(self.db)
         now = current_time
         now_ms = int(now.timestamp() * 1000)
         result: Dict[UUID, Dict[str, Any]] = {}
 
+        rows_by_queue: Dict[UUID, List[LiveQueueUser]] = defaultdict(list)
+        for r in raw_rows:
+            if exclude_user_id is None or r.user_id != exclude_user_id:
+                rows_by_queue[r.queue_id].append(r)
+
         for queue in queues:
             qid = queue.uuid
-            queue_rows = [
-                r for r in raw_rows
-                if r["queue_id"] == qid
-                and (exclude_user_id is None or r.get("user_id") != exclude_user_id)
-            ]
+            queue_rows = rows_by_queue.get(qid, [])
 
             # New user's total service duration for this queue
             new_user_turn: float = 15.0
@@ -377,16 +425,15 @@ class QueueController:
 
             # Derive cursor after all currently ordered users finish
             if ordered:
-                last_uid = str(ordered[-1]["uuid"])
-                last_wd = wait_data.get(last_uid, {})
+                last_wd = wait_data.get(ordered[-1].uuid, {})
                 cursor_end_ms = last_wd.get("expected_end_ts") or now_ms
                 cursor_after = datetime.fromtimestamp(cursor_end_ms / 1000, tz=APP_TZ)
             else:
                 # No ordered users — check if an in-progress user is still running
                 in_prog_ms = None
                 for row in queue_rows:
-                    if row.get("status") == QUEUE_USER_IN_PROGRESS:
-                        wd = wait_data.get(str(row["uuid"]), {})
+                    if row.status == QUEUE_USER_IN_PROGRESS:
+                        wd = wait_data.get(row.uuid, {})
                         in_prog_ms = wd.get("expected_end_ts") or wd.get("expected_at_ts")
                         break
                 if in_prog_ms:
@@ -397,10 +444,10 @@ class QueueController:
             # Build SCHEDULED blocks for conflict simulation
             sched_blocks = []
             for row in queue_rows:
-                if row.get("status") == QUEUE_USER_SCHEDULED:
-                    s_dt = _scheduled_start_dt(row, booking_date)
+                if row.status == QUEUE_USER_SCHEDULED:
+                    s_dt = row.scheduled_start_dt(booking_date)
                     if s_dt is not None:
-                        sched_blocks.append((s_dt, float(row.get("turn_time") or 15.0)))
+                        sched_blocks.append((s_dt, float(row.turn_time or 15.0)))
             sched_blocks.sort(key=lambda x: x[0])
 
             # Simulate new walk-in placement after all current ordered users
@@ -448,15 +495,19 @@ class QueueController:
         queue_date: date,
         new_window: Optional[tuple],
         calc_service: BookingCalculationService,
+        active_on_date: Optional[List[tuple]] = None,
     ) -> Optional[tuple]:
         """Return the first (queue_user, queue, business) whose CURRENT time window
         overlaps new_window on the same date, or None. Uses fresh metrics (not stale
-        stored times) so it reflects how the queues actually stand right now."""
+        stored times) so it reflects how the queues actually stand right now.
+
+        *active_on_date* — rows already loaded by the caller via
+        get_user_active_appointments_on_date; fetched here when omitted."""
         if new_window is None:
             return None
-        for qu, queue, business in self.queue_service.get_user_upcoming_active_appointments(user_id):
-            if qu.queue_date != queue_date:
-                continue
+        if active_on_date is None:
+            active_on_date = self.queue_service.get_user_active_appointments_on_date(user_id, queue_date)
+        for qu, queue, business in active_on_date:
             appt_time = calc_service.get_existing_queue_user_metrics(qu).get("appointment_time")
             sched = qu.scheduled_start.strftime("%H:%M") if getattr(qu, "scheduled_start", None) else None
             existing_window = appointment_window(
@@ -486,6 +537,50 @@ class QueueController:
             },
         })
 
+    def _sign_booking_preview(
+        self,
+        user_id: UUID,
+        business_id: UUID,
+        booking_date: date,
+        service_ids: List[UUID],
+        preview: Dict[str, Any],
+    ) -> Optional[str]:
+        """Sign the recommended option so create_booking can reuse it without recomputing."""
+        recommended_id = preview.get("recommended_queue_id")
+        option = next((o for o in preview["queues"] if o["queue_id"] == recommended_id), None)
+        if option is None:
+            return None
+        return create_booking_preview_token(
+            {
+                "uid": str(user_id),
+                "bid": str(business_id),
+                "date": booking_date.isoformat(),
+                "svc": sorted(str(s) for s in service_ids),
+                "qid": option["queue_id"],
+                "position": option["position"],
+                "wait_minutes": option["estimated_wait_minutes"],
+                "wait_range": option["estimated_wait_range"],
+                "appointment_time": option["estimated_appointment_time"],
+            },
+            BOOKING_PREVIEW_TOKEN_TTL_SECONDS,
+        )
+
+    def _booking_preview_claims(self, user_id: UUID, data: BookingCreateInput) -> Optional[Dict[str, Any]]:
+        """Claims of data.preview_token if it was issued to this user for this exact booking."""
+        if not data.preview_token:
+            return None
+        claims = decode_booking_preview_token(data.preview_token)
+        if claims is None:
+            return None
+        if (
+            claims.get("uid") != str(user_id)
+            or claims.get("bid") != str(data.business_id)
+            or claims.get("date") != data.queue_date.isoformat()
+            or claims.get("svc") != sorted(str(s) for s in data.service_ids)
+        ):
+            return None
+        return claims
+
     async def get_booking_preview(
         self,
         business_id: UUID,
@@ -543,6 +638,10 @@ class QueueController:
                 services_by_queue=services_by_queue,
                 already_booked=already_booked,
             )
+            if user_id is not None:
+                preview["preview_token"] = self._sign_booking_preview(
+                    user_id, business_id, booking_date, service_ids, preview
+                )
             return BookingPreviewData(**preview)
 
         except HTTPException:
@@ -579,8 +678,15 @@ class QueueController:
     async def create_booking(
         self,
         user_id: UUID,
-        data: BookingCreateInput
+        data: BookingCreateInput,
+        background_tasks: Optional[BackgroundTasks] = None,
     ) -> BookingData:
+        """Book a queue slot.
+
+        Reads are batched up front, the slot reservation and insert commit as one
+        transaction, and the live-queue sync, broadcasts and notifications run in
+        publish_booking_created — after the response when *background_tasks* is given.
+        """
         try:
             await queue_manager.connect_to_redis()
 
@@ -641,43 +747,55 @@ class QueueController:
                         queue_id, data.queue_date, data.service_ids
                     )
             else:
-                today_metrics = None
-                services_by_queue = None
-                if data.queue_date == today_app_date():
-                    queues_for_optimal = self.queue_service.get_queues_offering_service_ids(
-                        data.business_id, data.service_ids
-                    )
-                    qids = [q.uuid for q in queues_for_optimal] if queues_for_optimal else []
-                    ist = pytz.timezone(TIMEZONE)
-                    current_time = datetime.now(ist)
-                    raw_users = self.queue_service.get_today_active_queue_user_rows(
-                        qids, data.queue_date
-                    ) if qids else []
-                    raw_services = self.queue_service.get_queue_service_details_for_ids(
-                        data.service_ids
-                    )
-                    services_by_queue = self._build_services_by_queue(raw_services)
-                    today_metrics = (
-                        self._build_queue_preview_metrics(
-                            queues_for_optimal, data.queue_date, current_time, raw_users, services_by_queue
+                # A fresh preview token carries the option the user just saw —
+                # skip rebuilding every queue option for the business.
+                preview_claims = self._booking_preview_claims(user_id, data)
+                if preview_claims is not None:
+                    queue_id = UUID(preview_claims["qid"])
+                    metrics = {
+                        "position": preview_claims["position"],
+                        "wait_minutes": preview_claims["wait_minutes"],
+                        "wait_range": preview_claims["wait_range"],
+                        "appointment_time": preview_claims["appointment_time"],
+                    }
+                else:
+                    today_metrics = None
+                    services_by_queue = None
+                    if data.queue_date == today_app_date():
+                        queues_for_optimal = self.queue_service.get_queues_offering_service_ids(
+                            data.business_id, data.service_ids
+                        )
+                        qids = [q.uuid for q in queues_for_optimal] if queues_for_optimal else []
+                        ist = pytz.timezone(TIMEZONE)
+                        current_time = datetime.now(ist)
+                        raw_users = self.queue_service.get_today_active_queue_user_rows(
+                            qids, data.queue_date
+                        ) if qids else []
+                        raw_services = self.queue_service.get_queue_service_details_for_ids(
+                            data.service_ids
+                        )
+                        services_by_queue = self._build_services_by_queue(raw_services)
+                        today_metrics = (
+                            self._build_queue_preview_metrics(
+                                queues_for_optimal, data.queue_date, current_time, raw_users, services_by_queue
+                            )
+                            if qids else {}
                         )
-                        if qids else {}
+                    optimal_queue = calc_service.find_optimal_queue(
+                        data.business_id, data.queue_date, data.service_ids,
+                        today_metrics=today_metrics,
+                        services_by_queue=services_by_queue,
                     )
-                optimal_queue = calc_service.find_optimal_queue(
-                    data.business_id, data.queue_date, data.service_ids,
-                    today_metrics=today_metrics,
-                    services_by_queue=services_by_queue,
-                )
-                if not optimal_queue:
-                    raise HTTPException(status_code=404, detail="No available queues for selected services")
+                    if not optimal_queue:
+                        raise HTTPException(status_code=404, detail="No available queues for selected services")
 
-                queue_id = UUID(optimal_queue["queue_id"])
-                metrics = {
-                    "position": optimal_queue["position"],
-                    "wait_minutes": optimal_queue["estimated_wait_minutes"],
-                    "wait_range": optimal_queue["estimated_wait_range"],
-                    "appointment_time": optimal_queue["estimated_appointment_time"]
-                }
+                    queue_id = UUID(optimal_queue["queue_id"])
+                    metrics = {
+                        "position": optimal_queue["position"],
+                        "wait_minutes": optimal_queue["estimated_wait_minutes"],
+                        "wait_range": optimal_queue["estimated_wait_range"],
+                        "appointment_time": optimal_queue["estimated_appointment_time"]
+                    }
 
                 queue = self.queue_service.get_queue_by_id(queue_id)
                 if not queue:
@@ -687,12 +805,14 @@ class QueueController:
                 if not queue_services:
                     queue_services = all_queue_services
 
+            # One read of the user's active appointments that day serves both the
+            # duplicate check and the time-conflict checks below.
+            active_on_date = self.queue_service.get_user_active_appointments_on_date(
+                booking_user_id, data.queue_date
+            )
             if is_walk_in and data.queue_date == today_app_date():
                 # Walk-in: block duplicate — admin must not add someone already in the queue today
-                duplicate = self.queue_service.get_existing_same_day_booking(
-                    booking_user_id, queue_id, data.queue_date
-                )
-                if duplicate is not None:
+                if any(qu.queue_id == queue_id for qu, _q, _b in active_on_date):
                     raise HTTPException(
                         status_code=409,
                         detail="This customer already has an active appointment in this queue today.",
@@ -707,6 +827,7 @@ class QueueController:
                     queue=queue,
                     business=business,
                     calc_service=calc_service,
+                    active_on_date=active_on_date,
                 )
                 if existing_booking is not None:
                     return existing_booking
@@ -722,11 +843,12 @@ class QueueController:
                     "QUEUE", metrics["appointment_time"], None, preliminary_service_time, data.queue_date
                 )
                 conflict = self._find_booking_time_conflict(
-                    booking_user_id, data.queue_date, new_window, calc_service
+                    booking_user_id, data.queue_date, new_window, calc_service, active_on_date
                 )
                 if conflict:
                     self._raise_time_conflict(conflict, calc_service)
 
+            slot = None
             if appointment_type in ("FIXED", "APPROXIMATE") and slot_id:
                 slot = self.queue_service.get_slot_by_id(slot_id)
                 if not slot:
@@ -745,10 +867,19 @@ class QueueController:
                         data.queue_date,
                     )
                     conflict = self._find_booking_time_conflict(
-                        booking_user_id, data.queue_date, new_window, calc_service
+                        booking_user_id, data.queue_date, new_window, calc_service, active_on_date
                     )
                     if conflict:
                         self._raise_time_conflict(conflict, calc_service)
+
+            total_service_time = sum((qs.avg_service_time or 5) for qs in queue_services)
+            date_str = format_date_iso(data.queue_date)
+
+            # ── Write phase: slot reservation + booking insert, one transaction ──
+            # The slot is reserved before the token is allocated, so a booking turned
+            # away for a full slot never burns a token number; any failure after this
+            # point rolls the reservation back.
+            if slot is not None:
                 reserved = self.queue_service.reserve_slot_atomic(slot_id)
                 if not reserved:
                     raise HTTPException(status_code=409, detail="Slot is full")
@@ -761,9 +892,8 @@ class QueueController:
                     "appointment_time": slot.slot_start.strftime(TIME_FORMAT) if slot.slot_start else "",
                 }
 
-            total_service_time = sum((qs.avg_service_time or 5) for qs in queue_services)
-            date_str = format_date_iso(data.queue_date)
             token_number = await queue_manager.generate_token_number(str(queue_id), date_str)
+
             estimated_enqueue_dt, estimated_dequeue_dt = appointment_time_to_enqueue_dequeue(
                 metrics.get("appointment_time"),
                 data.queue_date,
@@ -792,18 +922,8 @@ class QueueController:
                 is_walk_in=bool(getattr(data, "is_walk_in", False)),
             )
 
-            # Only add to Redis live queue for walk-ins (REGISTERED immediately).
-            # SCHEDULED (Fixed/Approximate) appointments join when they activate.
-            if data.queue_date == today_app_date() and queue_user.status == QUEUE_USER_REGISTERED:
-                await queue_manager.add_to_queue(
-                    db=self.db,
-                    queue_id=str(queue_id),
-                    user_id=str(booking_user_id),
-                    date_str=date_str,
-                    token_number=token_number,
-                    total_service_time=total_service_time,
-                    business_id=str(data.business_id)
-                )
+            if queue_user.status == QUEUE_USER_SCHEDULED:
+                activation_timer.schedule(queue_user.uuid, data.queue_date, scheduled_start)
 
             services_data = [
                 BookingServiceData(**d)
@@ -815,53 +935,112 @@ class QueueController:
                 metrics, services_data, token_number,
             )
 
+            # ── Post-commit stage: live queue, broadcasts, notifications ──
+            # Only walk-ins (REGISTERED immediately) join the Redis live queue;
+            # SCHEDULED (Fixed/Approximate) appointments join when they activate.
+            is_today = data.queue_date == today_app_date()
+            publish_kwargs = dict(
+                queue_id=queue_id,
+                business_id=data.business_id,
+                business_owner_id=business.owner_id,
+                booking_user_id=booking_user_id,
+                date_str=date_str,
+                token_number=token_number,
+                total_service_time=total_service_time,
+                wait_minutes=int(metrics.get("wait_minutes") or 0),
+                queue_name=queue.name or "",
+                business_name=business.name or "",
+                is_today=is_today,
+                join_live_queue=is_today and queue_user.status == QUEUE_USER_REGISTERED,
+            )
+            if background_tasks is not None:
+                background_tasks.add_task(self.publish_booking_created, **publish_kwargs)
+            else:
+                await self.publish_booking_created(**publish_kwargs)
+
+            return result
+
+        except HTTPException:
+            self.db.rollback()
+            raise
+        except Exception:
+            self.db.rollback()
+            logger.exception("Failed to create_booking (user_id=%s business_id=%s)", user_id, data.business_id)
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
+    async def publish_booking_created(
+        self,
+        queue_id: UUID,
+        business_id: UUID,
+        business_owner_id: UUID,
+        booking_user_id: UUID,
+        date_str: str,
+        token_number: str,
+        total_service_time: int,
+        wait_minutes: int,
+        queue_name: str,
+        business_name: str,
+        is_today: bool,
+        join_live_queue: bool,
+    ) -> None:
+        """Post-commit side effects of create_booking.
+
+        Runs on its own session: when scheduled as a background task the request
+        session is already closed. Failures are logged and never touch the booking.
+        """
+        db = SessionLocal()
+        try:
+            if join_live_queue:
+                try:
+                    await queue_manager.add_to_queue(
+                        db=db,
+                        queue_id=str(queue_id),
+                        user_id=str(booking_user_id),
+                        date_str=date_str,
+                        token_number=token_number,
+                        total_service_time=total_service_time,
+                        business_id=str(business_id),
+                    )
+                except Exception:
+                    logger.warning("Live queue sync failed after booking queue_id=%s", queue_id, exc_info=True)
+
             # Broadcast live queue update to employee UI and connected customers (today only)
-            if data.queue_date == today_app_date():
+            if is_today:
                 try:
                     await live_queue_manager.broadcast(
                         str(queue_id), date_str, "live_queue_update",
-                        live_queue_manager.get_live_queue_state(self.db, str(queue_id), date_str)
+                        live_queue_manager.get_live_queue_state(db, str(queue_id), date_str)
                     )
-                    await customer_queue_manager.broadcast_to_queue(self.db, str(queue_id), date_str)
+                    await customer_queue_manager.broadcast_to_queue(db, str(queue_id), date_str)
                 except Exception:
                     logger.warning("Live broadcast failed after booking queue_id=%s", queue_id, exc_info=True)
 
-            # Fire-and-forget notifications — failures must never block booking
+            # Notifications — failures must never block booking
             try:
-                assigned_emp = self.employee_service.get_verified_employee_by_queue(
-                    queue_id=queue_id, business_id=data.business_id
+                assigned_emp = EmployeeService(db).get_verified_employee_by_queue(
+                    queue_id=queue_id, business_id=business_id
                 )
                 employee_user_id = assigned_emp.user_id if assigned_emp else None
 
                 await notify_booking_confirmed(
-                    db=self.db,
                     user_id=booking_user_id,
                     token_number=str(token_number),
-                    wait_minutes=int(metrics.get("wait_minutes") or 0),
-                    queue_name=queue.name or "",
-                    business_name=business.name or "",
+                    wait_minutes=wait_minutes,
+                    queue_name=queue_name,
+                    business_name=business_name,
                 )
                 await notify_new_customer(
-                    db=self.db,
-                    business_owner_id=business.owner_id,
+                    business_owner_id=business_owner_id,
                     employee_user_id=employee_user_id,
                     token_number=str(token_number),
-                    queue_name=queue.name or "",
+                    queue_name=queue_name,
                 )
             except Exception:
                 logger.warning(
                     "Notification failed for booking token=%s", token_number, exc_info=True
                 )
-
-            return result
-
-        except HTTPException:
-            self.db.rollback()
-            raise
-        except Exception:
-            self.db.rollback()
-            logger.exception("Failed to create_booking (user_id=%s business_id=%s)", user_id, data.business_id)
-            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+        finally:
+            db.close()
 
     # ─────────────────────────────────────────────────────────────────────────
     # Slots & Next customer (multi-mode appointments)
@@ -925,12 +1104,12 @@ class QueueController:
                 wait_data = waits["wait_data"]
                 queue_cursor_end_ms = None
                 if ordered:
-                    last_wd = wait_data.get(str(ordered[-1]["uuid"]), {})
+                    last_wd = wait_data.get(ordered[-1].uuid, {})
                     queue_cursor_end_ms = last_wd.get("expected_end_ts")
                 if queue_cursor_end_ms is None:
                     for row in raw_rows:
-                        if row.get("status") == QUEUE_USER_IN_PROGRESS:
-                            wd = wait_data.get(str(row["uuid"]), {})
+                        if row.status == QUEUE_USER_IN_PROGRESS:
+                            wd = wait_data.get(row.uuid, {})
                             queue_cursor_end_ms = wd.get("expected_end_ts") or wd.get("expected_at_ts")
                             break
                 if queue_cursor_end_ms:
@@ -1100,14 +1279,12 @@ class QueueController:
             try:
                 if in_progress:
                     await notify_service_completed(
-                        db=self.db,
                         user_id=in_progress.user_id,
                         token_number=str(in_progress.token_number or ""),
                         queue_name=queue.name or "",
                     )
                 if waiting:
                     await notify_in_service(
-                        db=self.db,
                         user_id=first_waiting.user_id,
                         token_number=str(first_waiting.token_number or ""),
                         queue_name=queue.name or "",
@@ -1115,7 +1292,6 @@ class QueueController:
                     if len(waiting) > 1:
                         called_next = waiting[1]
                         await notify_called_next(
-                            db=self.db,
                             user_id=called_next.user_id,
                             token_number=str(called_next.token_number or ""),
                             queue_name=queue.name or "",
@@ -1175,17 +1351,17 @@ class QueueController:
 
             try:
                 await notify_no_show(
-                    db=self.db, user_id=in_progress.user_id,
+                    user_id=in_progress.user_id,
                     token_number=str(in_progress.token_number or ""), queue_name=queue.name or "",
                 )
                 if first_waiting:
                     await notify_in_service(
-                        db=self.db, user_id=first_waiting.user_id,
+                        user_id=first_waiting.user_id,
                         token_number=str(first_waiting.token_number or ""), queue_name=queue.name or "",
                     )
                     if len(waiting) > 1:
                         await notify_called_next(
-                            db=self.db, user_id=waiting[1].user_id,
+                            user_id=waiting[1].user_id,
                             token_number=str(waiting[1].token_number or ""), queue_name=queue.name or "",
                         )
             except Exception:
@@ -1235,17 +1411,17 @@ class QueueController:
 
             try:
                 await notify_skipped(
-                    db=self.db, user_id=in_progress.user_id,
+                    user_id=in_progress.user_id,
                     token_number=str(in_progress.token_number or ""), queue_name=queue.name or "",
                 )
                 if first_waiting:
                     await notify_in_service(
-                        db=self.db, user_id=first_waiting.user_id,
+                        user_id=first_waiting.user_id,
                         token_number=str(first_waiting.token_number or ""), queue_name=queue.name or "",
                     )
                     if len(waiting) > 1:
                         await notify_called_next(
-                            db=self.db, user_id=waiting[1].user_id,
+                            user_id=waiting[1].user_id,
                             token_number=str(waiting[1].token_number or ""), queue_name=queue.name or "",
                         )
             except Exception:
@@ -1331,7 +1507,7 @@ class QueueController:
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
     def build_live_queue_data(
-        self, queue: Any, queue_date: date, users_raw: list, employee_on_leave: bool = False
+        self, queue: Any, queue_date: date, users_raw: List[LiveQueueUser], employee_on_leave: bool = False
     ) -> LiveQueueData:
         open_dt = None
         breaks: list = []
@@ -1352,9 +1528,13 @@ class QueueController:
         queue: Any,
         business: Any,
         calc_service: BookingCalculationService,
+        active_on_date: Optional[List[tuple]] = None,
     ) -> Optional[BookingData]:
         """Return a BookingData for an existing same-day booking, or None if no duplicate."""
-        existing = self.queue_service.get_existing_same_day_booking(user_id, queue_id, queue_date)
+        if active_on_date is not None:
+            existing = next((qu for qu, _q, _b in active_on_date if qu.queue_id == queue_id), None)
+        else:
+            existing = self.queue_service.get_existing_same_day_booking(user_id, queue_id, queue_date)
         if not existing:
             return None
 
@@ -1475,7 +1655,7 @@ class QueueController:
         """
         today = today_app_date()
         now = now_app_tz()
-        notified = 0
+        due = []
 
         candidates = self.queue_service.get_eta_notification_candidates(today)
 
@@ -1495,15 +1675,7 @@ class QueueController:
                     continue
 
                 self.queue_service.mark_heading_notified(qu, now)
-                queue_name = qu.queue.name if qu.queue else ""
-                notify_heading_now_sync(
-                    db=self.db,
-                    user_id=qu.user_id,
-                    token_number=qu.token_number or "",
-                    queue_name=queue_name,
-                    wait_minutes=wait_minutes,
-                )
-                notified += 1
+                due.append((qu.user_id, qu.token_number or "", qu.queue.name if qu.queue else "", wait_minutes))
             except Exception:
                 logger.exception("check_and_notify_eta: error for queue_user=%s", qu.uuid)
                 continue
@@ -1513,5 +1685,15 @@ class QueueController:
         except Exception:
             self.db.rollback()
             logger.exception("check_and_notify_eta: commit failed")
+            return 0
 
-        return notified
+        # Only after heading_notified_at is committed, so a failed commit never double-notifies.
+        for user_id, token_number, queue_name, wait_minutes in due:
+            notify_heading_now_sync(
+                db=self.db,
+                user_id=user_id,
+                token_number=token_number,
+                queue_name=queue_name,
+                wait_minutes=wait_minutes,
+            )
+        return len(due)
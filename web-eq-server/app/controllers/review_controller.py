@@ -43,7 +43,11 @@ class ReviewController:
     def get_business_review_summary(self, business_id: UUID) -> BusinessReviewSummary:
         try:
             avg_rating, count = self.review_service.get_review_summary_by_business(business_id)
-            return BusinessReviewSummary(average_rating=avg_rating, review_count=count)
+            return BusinessReviewSummary(
+                average_rating=avg_rating,
+                review_count=count,
+                rating_histogram=self.review_service.get_rating_histogram_by_business(business_id),
+            )
         except HTTPException:
             raise
         except Exception:
@@ -52,8 +56,7 @@ class ReviewController:
 
     def get_featured_reviews(self, limit: int = 6) -> List[FeaturedReviewData]:
         try:
-            reviews = self.review_service.get_featured_reviews(limit)
-            return [FeaturedReviewData.from_review(r) for r in reviews]
+            return self.review_service.get_featured_reviews(limit)
         except HTTPException:
             raise
         except Exception:
@@ -3,11 +3,15 @@ from datetime import date
 from io import BytesIO
 from sqlalchemy.orm import Session
 from uuid import UUID
-from typing import Literal, Optional
+from typing import Iterable, Iterator, Literal, Optional
 from fastapi import HTTPException
 
+from app.db.database import SessionLocal
 from app.services.user_service import UserService
-from app.services.export_service import MAX_EXPORT_ROWS, build_xlsx, build_pdf
+from app.services.export_service import (
+    MAX_EXPORT_ROWS, MAX_STREAMING_EXPORT_ROWS, CSV_MEDIA_TYPE, PDF_MEDIA_TYPE, XLSX_MEDIA_TYPE,
+    USERS_EXPORT_COLUMNS, build_pdf, stream_csv, stream_xlsx,
+)
 from app.models.user import User
 from app.schemas.user import (
     UserData,
@@ -76,10 +80,10 @@ class UserController:
 
     def export_users_appointments(
         self,
-        fmt: Literal["pdf", "xlsx"],
+        fmt: Literal["pdf", "xlsx", "csv"],
         business_id: Optional[UUID] = None,
         queue_id: Optional[UUID] = None,
-    ) -> tuple[BytesIO, str, str]:
+    ) -> tuple[BytesIO | Iterable[bytes], str, str]:
         if business_id is not None and queue_id is not None:
             raise HTTPException(
                 status_code=400,
@@ -90,6 +94,13 @@ class UserController:
                 status_code=400,
                 detail={"message": "At least one of business_id or queue_id must be provided"},
             )
+        columns = USERS_EXPORT_COLUMNS
+        today = date.today().strftime("%Y-%m-%d")
+        filename = f"users-{today}.{fmt}"
+        if fmt == "csv":
+            return stream_csv(columns, self._stream_export_rows(business_id, queue_id)), CSV_MEDIA_TYPE, filename
+        if fmt == "xlsx":
+            return stream_xlsx(columns, self._stream_export_rows(business_id, queue_id)), XLSX_MEDIA_TYPE, filename
         try:
             items, _ = self.service.get_users_with_appointments(
                 business_id=business_id,
@@ -97,7 +108,6 @@ class UserController:
                 page=1,
                 limit=MAX_EXPORT_ROWS,
             )
-            columns = ["Name", "Email", "Phone", "Total Appointments", "Last Visit"]
             rows = [
                 [
                     item.full_name or "",
@@ -108,21 +118,28 @@ class UserController:
                 ]
                 for item in items
             ]
-            today = date.today().strftime("%Y-%m-%d")
-            filename = f"users-{today}.{fmt}"
-            if fmt == "xlsx":
-                buf = build_xlsx(columns, rows)
-                media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            else:
-                buf = build_pdf("Users Report", columns, rows)
-                media_type = "application/pdf"
-            return buf, media_type, filename
+            return build_pdf("Users Report", columns, rows), PDF_MEDIA_TYPE, filename
         except HTTPException:
             raise
         except Exception:
             logger.exception("Failed to export_users_appointments (business_id=%s queue_id=%s)", business_id, queue_id)
             raise HTTPException(status_code=500, detail={"message": "Export failed. Please try again."})
 
+    @staticmethod
+    def _stream_export_rows(business_id: Optional[UUID], queue_id: Optional[UUID]) -> Iterator[tuple]:
+        # Runs while the response streams, after the request's session is closed,
+        # so it reads through a session of its own.
+        db = SessionLocal()
+        try:
+            yield from UserService(db).iter_users_with_appointments_export(
+                business_id=business_id, queue_id=queue_id, limit=MAX_STREAMING_EXPORT_ROWS,
+            )
+        except Exception:
+            logger.exception("Streaming users export failed (business_id=%s queue_id=%s)", business_id, queue_id)
+            raise
+        finally:
+            db.close()
+
     def get_user_detail(self, user_id: UUID) -> UserDetailResponse:
         try:
             result = self.service.get_user_detail(user_id)
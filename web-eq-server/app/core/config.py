@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,6 +17,11 @@ DB_ECHO_LOGS = os.getenv("DB_ECHO_LOGS", "False").lower() == "true"
 SECRET_KEY = os.getenv("SECRET_KEY", "secretkey")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "720"))
+# Signature check backend: "jose" (python-jose) or "pyjwt" (PyJWT, if installed)
+JWT_BACKEND = os.getenv("JWT_BACKEND", "jose").lower()
+# Verified access tokens kept in memory (0 disables); entries live until exp, at most the TTL
+JWT_VERIFY_CACHE_SIZE = int(os.getenv("JWT_VERIFY_CACHE_SIZE", "10000"))
+JWT_VERIFY_CACHE_TTL_SECONDS = int(os.getenv("JWT_VERIFY_CACHE_TTL_SECONDS", "300"))
 
 # OTP configuration
 OTP_EXPIRY_MINUTES = int(os.getenv("OTP_EXPIRY_MINUTES", "5"))
@@ -39,6 +45,80 @@ else:
 
 WEB_TOKEN_EXPIRE_MINUTES = int(os.getenv("WEB_TOKEN_EXPIRE_MINUTES", "1440"))  # 24 h — matches cookie max_age
 
+# Booking preview token — lets create_booking reuse the recommended queue from the
+# preview instead of recomputing every queue option. Short-lived: waits drift.
+BOOKING_PREVIEW_TOKEN_TTL_SECONDS = int(os.getenv("BOOKING_PREVIEW_TOKEN_TTL_SECONDS", "120"))
+
+# Notification outbox — batched persistence + push off the request path
+NOTIFICATION_OUTBOX_BATCH_SIZE = int(os.getenv("NOTIFICATION_OUTBOX_BATCH_SIZE", "200"))
+NOTIFICATION_OUTBOX_FLUSH_MS = int(os.getenv("NOTIFICATION_OUTBOX_FLUSH_MS", "50"))
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_OUTBOX_MAX_ATTEMPTS", "5"))
+
+# Users whose unread-notification count is kept in memory (LRU)
+UNREAD_COUNTER_CACHE_SIZE = int(os.getenv("UNREAD_COUNTER_CACHE_SIZE", "10000"))
+
+# Notification retention — read notifications older than this many days are moved to
+# notifications_archive ("archive") or removed ("delete") by a nightly job. 0 disables it.
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+NOTIFICATION_RETENTION_MODE = os.getenv("NOTIFICATION_RETENTION_MODE", "archive")
+NOTIFICATION_RETENTION_BATCH_SIZE = int(os.getenv("NOTIFICATION_RETENTION_BATCH_SIZE", "5000"))
+
+# Scheduler leader election — only the worker holding this Postgres advisory lock runs
+# the APScheduler jobs; the others retry every SCHEDULER_LEADER_RETRY_SECONDS.
+SCHEDULER_LEADER_LOCK_ID = int(os.getenv("SCHEDULER_LEADER_LOCK_ID", "730125061"))
+SCHEDULER_LEADER_RETRY_SECONDS = int(os.getenv("SCHEDULER_LEADER_RETRY_SECONDS", "15"))
+
+# Rows per transaction for the expiry / startup migration sweeps over queue_users
+QUEUE_USER_SWEEP_BATCH_SIZE = int(os.getenv("QUEUE_USER_SWEEP_BATCH_SIZE", "5000"))
+
+# Safety-net sweep for SCHEDULED appointments the activation timer missed (minutes)
+SCHEDULED_ACTIVATION_SWEEP_MINUTES = int(os.getenv("SCHEDULED_ACTIVATION_SWEEP_MINUTES", "5"))
+
+# queue_daily_stats rollup — today is re-aggregated every QUEUE_STATS_ROLLUP_MINUTES;
+# missing days within QUEUE_STATS_BACKFILL_DAYS are filled in at startup
+QUEUE_STATS_ROLLUP_MINUTES = int(os.getenv("QUEUE_STATS_ROLLUP_MINUTES", "15"))
+QUEUE_STATS_BACKFILL_DAYS = int(os.getenv("QUEUE_STATS_BACKFILL_DAYS", "35"))
+
+# Background export jobs — rendered in a process pool, results cached on local disk
+# and reused for identical requests until the TTL passes
+EXPORT_CACHE_DIR = os.getenv("EXPORT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "web-eq-exports"))
+EXPORT_CACHE_TTL_SECONDS = int(os.getenv("EXPORT_CACHE_TTL_SECONDS", "900"))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+
+# Rendered QR codes — in-memory LRU entries, and a disk directory shared by the
+# workers on one machine ("" disables it). Browsers may cache them this long.
+QR_CACHE_SIZE = int(os.getenv("QR_CACHE_SIZE", "512"))
+QR_CACHE_DIR = os.getenv("QR_CACHE_DIR", os.path.join(tempfile.gettempdir(), "web-eq-qr"))
+QR_CACHE_MAX_AGE_SECONDS = int(os.getenv("QR_CACHE_MAX_AGE_SECONDS", "86400"))
+
+# /metrics (Prometheus text format) and the /metrics/* reports. Callers must send
+# "Authorization: Bearer <METRICS_TOKEN>"; empty disables them (every request gets 401)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Per-request SQL budget (app/db/query_budget.py). Endpoints without @query_budget(n)
+# get the default; a statement shape run QUERY_REPEAT_THRESHOLD+ times in one request
+# is flagged as a likely N+1. STRICT (tests / CI) raises instead of logging
+QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", "40"))
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "False").lower() == "true"
+
+# Sampling profiler (app/core/profiling.py), off unless one of these is set:
+# PROFILE_SLOW_MS keeps a profile of every request at least that slow; a request sent with
+# "X-Profile: <PROFILE_TOKEN>" is always profiled; PROFILE_JOBS (comma-separated job names)
+# profiles every run of those jobs, PROFILE_SLOW_JOB_SECONDS any job run that slow.
+# Folded-stack files (flamegraph.pl / speedscope) go to PROFILE_DIR, newest PROFILE_MAX_FILES kept,
+# listed and served at /metrics/profiles (METRICS_TOKEN required)
+PROFILE_SLOW_MS = int(os.getenv("PROFILE_SLOW_MS", "0"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_JOBS = {name.strip() for name in os.getenv("PROFILE_JOBS", "").split(",") if name.strip()}
+PROFILE_SLOW_JOB_SECONDS = float(os.getenv("PROFILE_SLOW_JOB_SECONDS", "0"))
+PROFILE_INTERVAL_MS = int(os.getenv("PROFILE_INTERVAL_MS", "10"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "web-eq-profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+# Landing-page featured reviews — a precomputed list, refreshed by each worker this often
+FEATURED_REVIEWS_REFRESH_MINUTES = int(os.getenv("FEATURED_REVIEWS_REFRESH_MINUTES", "10"))
+
 # Redis configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 
@@ -49,6 +129,8 @@ CORS_ORIGINS = os.getenv("CORS_ORIGINS", "")
 # Queue configuration
 MAX_QUEUE_SIZE = int(os.getenv("MAX_QUEUE_SIZE", "50"))
 AVG_WAIT_TIME_PER_USER = int(os.getenv("AVG_WAIT_TIME_PER_USER", "5"))  # minutes
+# Token numbers reserved in Postgres per round trip (see TokenAllocator)
+TOKEN_LEASE_BLOCK_SIZE = int(os.getenv("TOKEN_LEASE_BLOCK_SIZE", "20"))
 
 # Customer app base URL — used when encoding URLs into QR codes
 CUSTOMER_APP_URL = os.getenv("CUSTOMER_APP_URL", "http://localhost:5174")
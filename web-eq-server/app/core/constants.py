@@ -3,6 +3,7 @@ from enum import Enum
 
 UNPROTECTED_ROUTE_PATHS = [
     "/healthz",                           # Render / load balancer health checks
+    "/metrics",                           # Prometheus scrape + reports — require METRICS_TOKEN themselves
     # ── Auth ─────────────────────────────────────────────────────────────────
     "/api/auth/send-otp",
     "/api/auth/verify-otp",
@@ -77,6 +78,15 @@ QUEUE_USER_SCHEDULED = 8        # Fixed/Approximate: pre-active, not yet in live
 # Minutes before scheduled_start when a SCHEDULED appointment activates into the live queue
 SCHEDULED_ACTIVATION_LEAD_MINUTES = 15
 
+# Rows per admin-dashboard counter (platform_counters); writers pick one at random
+PLATFORM_COUNTER_SHARDS = 16
+
+# Longest date range served by /queue/daily_stats
+MAX_DAILY_STATS_RANGE_DAYS = 366
+
+# Featured reviews kept precomputed (the most /review/featured can ask for)
+FEATURED_REVIEWS_POOL_SIZE = 20
+
 # Customer API defaults (appointments list pagination)
 CUSTOMER_APPOINTMENTS_DEFAULT_LIMIT = 5
 CUSTOMER_APPOINTMENTS_MAX_LIMIT = 100
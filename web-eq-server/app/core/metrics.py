@@ -0,0 +1,182 @@
+"""
+In-process metrics in the Prometheus text exposition format (served at /metrics).
+
+Counter / Histogram are updated on hot paths: one lock, a dict lookup and a
+bisect per observation, no I/O. Values that already live elsewhere (pool
+occupancy, WebSocket connections, cache stats) are not mirrored on every
+change; collectors registered with register_collector() read them at scrape
+time. Everything is per process — with several workers, each scrape sees the
+worker that answered it, identified by the "pid" line in the output.
+
+request_db_stats carries the current request's query count / time (and the
+count per statement shape, for app.db.query_budget) from the SQLAlchemy cursor
+events (app.db.instrumentation) to the HTTP middleware.
+"""
+import contextvars
+import os
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS: Tuple[float, ...] = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+JOB_BUCKETS: Tuple[float, ...] = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+
+Labels = Tuple[str, ...]
+
+
+class Sample(NamedTuple):
+    labels: Dict[str, str]
+    value: float
+
+
+class MetricFamily(NamedTuple):
+    name: str
+    kind: str  # counter | gauge | histogram
+    help: str
+    samples: List[Sample]
+
+
+@dataclass(slots=True)
+class RequestDBStats:
+    queries: int = 0
+    seconds: float = 0.0
+    statements: Dict[str, int] = field(default_factory=dict)
+
+
+request_db_stats: contextvars.ContextVar[Optional[RequestDBStats]] = contextvars.ContextVar(
+    "request_db_stats", default=None
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            values = list(self._values.items())
+        return MetricFamily(self.name, "counter", self.help, [
+            Sample(dict(zip(self.labelnames, labels)), value) for labels, value in values
+        ])
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._counts: Dict[Labels, List[int]] = {}
+        self._sums: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(labels)
+            if counts is None:
+                counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+                self._sums[labels] = 0.0
+            counts[index] += 1
+            self._sums[labels] += value
+
+    def collect(self) -> MetricFamily:
+        with self._lock:
+            series = [(labels, list(counts), self._sums[labels]) for labels, counts in self._counts.items()]
+        samples: List[Sample] = []
+        for labels, counts, total in series:
+            base = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                samples.append(Sample({**base, "le": _format_value(bound)}, cumulative))
+            samples.append(Sample({**base, "__suffix__": "_sum"}, total))
+            samples.append(Sample({**base, "__suffix__": "_count"}, cumulative))
+        return MetricFamily(self.name, "histogram", self.help, samples)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(name, lambda: Counter(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(name, lambda: Histogram(name, help, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        """Add a callable returning MetricFamily values, run on every scrape."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        families: List[MetricFamily] = [metric.collect() for metric in metrics]  # type: ignore[attr-defined]
+        for collector in collectors:
+            families.extend(collector())
+        lines = [f"# pid {os.getpid()}"]
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, value in family.samples:
+                suffix = labels.pop("__suffix__", "_bucket" if "le" in labels else "")
+                lines.append(f"{family.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, name: str, factory: Callable[[], object]):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+
+def gauge_family(name: str, help: str, values: Dict[str, float], label: Optional[str] = None) -> MetricFamily:
+    """A gauge from a {label value: number} mapping (or a single unlabelled value under "")."""
+    return MetricFamily(name, "gauge", help, [
+        Sample({label: key} if label else {}, value) for key, value in values.items()
+    ])
+
+
+# Global singleton
+metrics = MetricsRegistry()
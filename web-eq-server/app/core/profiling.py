@@ -0,0 +1,257 @@
+"""
+Opt-in sampling profiler for slow HTTP requests and scheduler job runs.
+
+While any profile session is open, a daemon thread wakes every
+PROFILE_INTERVAL_MS, reads each thread's current frame (sys._current_frames)
+and counts the stacks of the threads a session watches. Nothing is traced, so
+profiled code runs at full speed; the cost is one stack walk per watched
+thread per tick, and the sampler sleeps when no session is open. Output is the
+folded format — one "root;...;leaf count" line per distinct stack — read by
+flamegraph.pl, inferno and speedscope.
+
+Requests (ProfilingMiddleware): most endpoints are async and run their sync
+controller code on the event loop thread, which concurrent requests share, so
+a loop-thread sample only counts for the request whose middleware frame is on
+the stack, and the stack is cut there. A def endpoint's threadpool thread is
+attached for as long as the endpoint runs (profile_sync_endpoints in
+app.middleware.profiling_middleware).
+Jobs (profile_job): the job's thread, whole stack.
+
+A session below its threshold is discarded; kept ones are written by the
+sampler thread (never the event loop) to PROFILE_DIR, oldest files pruned
+past PROFILE_MAX_FILES, and at most MAX_STACKS distinct stacks per session.
+"""
+import contextvars
+import itertools
+import logging
+import os
+import re
+import sys
+import sysconfig
+import threading
+import time as _time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from types import CodeType, FrameType
+from typing import Dict, Iterator, List, Optional, Set
+
+from app.core.config import (
+    PROFILE_DIR,
+    PROFILE_INTERVAL_MS,
+    PROFILE_JOBS,
+    PROFILE_MAX_FILES,
+    PROFILE_SLOW_JOB_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Distinct stacks kept per session; later new stacks are counted under "[truncated]"
+MAX_STACKS = 5000
+# Frames kept per stack (from the leaf), against runaway recursion
+MAX_DEPTH = 200
+
+PROFILE_SUFFIX = ".folded"
+_FILE_NAME = re.compile(r"^[\w.-]+\.folded$")
+_SLUG = re.compile(r"[^A-Za-z0-9]+")
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_STDLIB = sysconfig.get_paths()["stdlib"]
+_session_ids = itertools.count(1)
+
+
+@lru_cache(maxsize=4096)
+def _frame_label(code: CodeType) -> str:
+    path = code.co_filename
+    if path.startswith(_PROJECT_ROOT):
+        path = os.path.relpath(path, _PROJECT_ROOT)
+    elif path.startswith(_STDLIB):
+        path = os.path.relpath(path, _STDLIB)
+    else:
+        path = path.rsplit("site-packages" + os.sep, 1)[-1]
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _walk(frame: Optional[FrameType]) -> List[FrameType]:
+    """Leaf-first list of frames."""
+    stack = []
+    while frame is not None:
+        stack.append(frame)
+        frame = frame.f_back
+    return stack
+
+
+def _idle(stack: List[FrameType]) -> bool:
+    """A pool thread parked waiting for work (threading.Condition.wait)."""
+    code = stack[0].f_code
+    return code.co_name == "wait" and code.co_filename.endswith("threading.py")
+
+
+class ProfileSession:
+    def __init__(self, label: str, anchor: Optional[FrameType] = None) -> None:
+        self.label = label
+        self.filename = (
+            f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{next(_session_ids)}-"
+            f"{_SLUG.sub('_', label).strip('_')[:60]}{PROFILE_SUFFIX}"
+        )
+        # Samples of the anchor's thread count only while the anchor frame is on its stack
+        self.anchor = anchor
+        self.anchor_thread = threading.get_ident() if anchor is not None else None
+        self.threads: Set[int] = {threading.get_ident()}
+        self.stacks: Dict[str, int] = {}
+        self.samples = 0
+        self.started = _time.perf_counter()
+        self.seconds = 0.0
+
+    def elapsed(self) -> float:
+        return _time.perf_counter() - self.started
+
+    def add(self, stack: List[FrameType]) -> None:
+        key = ";".join(_frame_label(frame.f_code) for frame in reversed(stack[:MAX_DEPTH]))
+        if key not in self.stacks and len(self.stacks) >= MAX_STACKS:
+            key = "[truncated]"
+        self.stacks[key] = self.stacks.get(key, 0) + 1
+        self.samples += 1
+
+
+current_profile: contextvars.ContextVar[Optional[ProfileSession]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+
+class SamplingProfiler:
+    def __init__(self, interval_seconds: float, directory: str, max_files: int) -> None:
+        self.interval = interval_seconds
+        self.directory = directory
+        self.max_files = max_files
+        self._sessions: Dict[int, ProfileSession] = {}
+        self._to_write: List[ProfileSession] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.kept = 0
+
+    def start(self, label: str, anchor: Optional[FrameType] = None) -> ProfileSession:
+        session = ProfileSession(label, anchor)
+        with self._lock:
+            self._sessions[id(session)] = session
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return session
+
+    def finish(self, session: ProfileSession, keep: bool) -> None:
+        """Close the session; when *keep*, hand it to the sampler thread to write."""
+        session.seconds = session.elapsed()
+        with self._lock:
+            self._sessions.pop(id(session), None)
+            if keep:
+                self._to_write.append(session)
+                self._wake.set()
+
+    def list_files(self) -> List[Dict[str, object]]:
+        """Written profiles, newest first."""
+        files = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(PROFILE_SUFFIX):
+                        stat = entry.stat()
+                        files.append({"name": entry.name, "bytes": stat.st_size, "modified": stat.st_mtime})
+        except FileNotFoundError:
+            return []
+        files.sort(key=lambda item: item["modified"], reverse=True)
+        return files
+
+    def path_for(self, name: str) -> Optional[str]:
+        if not _FILE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isfile(path) else None
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            with self._lock:
+                sessions = list(self._sessions.values())
+                pending, self._to_write = self._to_write, []
+                if not sessions:
+                    self._wake.clear()
+            for session in pending:
+                self._write(session)
+            if sessions:
+                self._sample(sessions)
+                _time.sleep(self.interval)
+
+    def _sample(self, sessions: List[ProfileSession]) -> None:
+        frames = sys._current_frames()
+        walked: Dict[int, List[FrameType]] = {}
+        try:
+            for session in sessions:
+                for thread_id in tuple(session.threads):
+                    stack = walked.get(thread_id)
+                    if stack is None:
+                        stack = walked[thread_id] = _walk(frames.get(thread_id))
+                    if not stack:
+                        continue
+                    if thread_id == session.anchor_thread:
+                        try:
+                            stack = stack[:stack.index(session.anchor) + 1]
+                        except ValueError:
+                            continue  # the loop is running another request, or idle
+                    elif _idle(stack):
+                        continue
+                    session.add(stack)
+        finally:
+            del frames, walked
+
+    def _write(self, session: ProfileSession) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, session.filename)
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in sorted(session.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+            self.kept += 1
+            logger.info(
+                "Profiled %s: %.0f ms, %d samples -> %s", session.label, session.seconds * 1000, session.samples, path
+            )
+            for stale in self.list_files()[self.max_files:]:
+                os.remove(os.path.join(self.directory, stale["name"]))
+        except OSError:
+            logger.exception("Failed to write profile %s", session.filename)
+
+
+@contextmanager
+def attached_thread() -> Iterator[None]:
+    """Sample the calling thread for the current context's profile session, if any,
+    until the block exits."""
+    session = current_profile.get()
+    thread_id = threading.get_ident()
+    if session is None or thread_id in session.threads:
+        yield
+        return
+    session.threads.add(thread_id)
+    try:
+        yield
+    finally:
+        session.threads.discard(thread_id)
+
+
+@contextmanager
+def profile_job(name: str) -> Iterator[None]:
+    """Profile one scheduler job run: always for PROFILE_JOBS, else kept when slower than
+    PROFILE_SLOW_JOB_SECONDS."""
+    forced = name in PROFILE_JOBS
+    if not forced and not PROFILE_SLOW_JOB_SECONDS:
+        yield
+        return
+    session = profiler.start(f"job {name}")
+    try:
+        yield
+    finally:
+        profiler.finish(session, keep=forced or session.elapsed() >= PROFILE_SLOW_JOB_SECONDS)
+
+
+# Global singleton
+profiler = SamplingProfiler(PROFILE_INTERVAL_MS / 1000, PROFILE_DIR, PROFILE_MAX_FILES)
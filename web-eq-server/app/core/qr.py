@@ -1,16 +1,48 @@
+"""
+QR code rendering with an in-memory LRU and an on-disk cache.
+
+A QR image depends only on (url, format, size) and the URLs are derived from
+CUSTOMER_APP_URL plus business / queue UUIDs that never change, so each image is
+rendered once per deployment: LRU hit → bytes, else QR_CACHE_DIR/<key>.<fmt>
+(survives restarts, shared by workers on one machine), else render and store.
+The same key is the strong ETag, so a conditional request can be answered
+without touching the image at all.
+"""
+import hashlib
 import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
 
 import qrcode
 import qrcode.constants
+import qrcode.image.svg
+
+from app.core.config import CUSTOMER_APP_URL, QR_CACHE_DIR, QR_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Bump when rendering changes so old ETags / disk entries are not reused
+_RENDER_VERSION = "1"
 
-from app.core.config import CUSTOMER_APP_URL
+# size name -> module (box) size in pixels; "medium" is the original rendering
+QR_SIZES: Dict[str, int] = {"small": 4, "medium": 10, "large": 20}
+QR_MEDIA_TYPES: Dict[str, str] = {"png": "image/png", "svg": "image/svg+xml"}
 
 
-def make_png(url: str) -> bytes:
+class QRImage(NamedTuple):
+    content: bytes
+    media_type: str
+    etag: str
+
+
+def make_png(url: str, box_size: int = QR_SIZES["medium"]) -> bytes:
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_M,
-        box_size=10,
+        box_size=box_size,
         border=4,
     )
     qr.add_data(url)
@@ -20,11 +52,108 @@ def make_png(url: str) -> bytes:
     return buf.getvalue()
 
 
-def business_qr_png(business_uuid: str) -> bytes:
-    """PNG bytes for a QR code linking to the business detail page."""
-    return make_png(f"{CUSTOMER_APP_URL}/business/{business_uuid}")
+def make_svg(url: str, box_size: int = QR_SIZES["medium"]) -> bytes:
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,
+        box_size=box_size,
+        border=4,
+        image_factory=qrcode.image.svg.SvgPathImage,
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    buf = io.BytesIO()
+    qr.make_image().save(buf)
+    return buf.getvalue()
+
+
+class QRCache:
+    def __init__(self, max_entries: int = QR_CACHE_SIZE, cache_dir: str = QR_CACHE_DIR) -> None:
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url: str, fmt: str, size: str) -> str:
+        return hashlib.sha256(f"{_RENDER_VERSION}|{fmt}|{size}|{url}".encode("utf-8")).hexdigest()[:32]
+
+    def get(self, url: str, fmt: str = "png", size: str = "medium") -> QRImage:
+        key = self.key(url, fmt, size)
+        content = self._get_memory(key)
+        if content is None:
+            content = self._read_disk(key, fmt)
+            if content is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                render = make_svg if fmt == "svg" else make_png
+                content = render(url, QR_SIZES[size])
+                self._write_disk(key, fmt, content)
+            self._put_memory(key, content)
+        return QRImage(content, QR_MEDIA_TYPES[fmt], f'"{key}"')
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = len(self._entries)
+        return {"entries": entries, "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+    def _get_memory(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return content
+
+    def _put_memory(self, key: str, content: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = content
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str, fmt: str) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.{fmt}"), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            logger.warning("QR cache: cannot read %s", key, exc_info=True)
+            return None
+
+    def _write_disk(self, key: str, fmt: str, content: bytes) -> None:
+        if not self.cache_dir:
+            return
+        path = os.path.join(self.cache_dir, f"{key}.{fmt}")
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning("QR cache: cannot write %s", key, exc_info=True)
+
+
+# Global singleton
+qr_cache = QRCache()
+
+
+def business_qr_url(business_uuid: str) -> str:
+    """Customer-app URL of the business detail page."""
+    return f"{CUSTOMER_APP_URL}/business/{business_uuid}"
+
 
+def employee_qr_url(business_uuid: str, queue_uuid: str) -> str:
+    """Customer-app URL of the booking page with the queue pre-selected."""
+    return f"{CUSTOMER_APP_URL}/business/{business_uuid}/book?queue={queue_uuid}"
 
-def employee_qr_png(business_uuid: str, queue_uuid: str) -> bytes:
-    """PNG bytes for a QR code linking to the booking page with queue pre-selected."""
-    return make_png(f"{CUSTOMER_APP_URL}/business/{business_uuid}/book?queue={queue_uuid}")
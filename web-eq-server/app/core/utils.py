@@ -1,8 +1,11 @@
 import secrets
 import hashlib
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
 from datetime import date, datetime, time as dt_time, timezone, timedelta
 from decimal import Decimal
 from enum import Enum
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
@@ -16,6 +19,7 @@ from app.core.constants import (
     QUEUE_USER_REGISTERED,
     QUEUE_USER_SCHEDULED,
     TIME_FORMAT,
+    TIME_FORMAT_HM,
     TIMEZONE,
 )
 
@@ -49,6 +53,21 @@ def normalize_country_code(country_code: Optional[str]) -> Optional[str]:
     return country_code.strip() or None
 
 
+@lru_cache(maxsize=64)
+def _app_tzinfo_on(day: date) -> Any:
+    return _APP_TZ.localize(datetime.combine(day, dt_time(12, 0))).tzinfo
+
+
+def localize_app_tz(naive: datetime) -> datetime:
+    """Attach the app timezone to a naive datetime.
+
+    Same result as ``APP_TZ.localize`` for a zone without intra-day offset changes
+    (IST has none), but a cheap ``replace`` with the day's cached tzinfo — use it
+    in per-user loops where pytz's localize dominates the profile.
+    """
+    return naive.replace(tzinfo=_app_tzinfo_on(naive.date()))
+
+
 def now_utc() -> datetime:
     """Return current UTC time (timezone-aware)."""
     return datetime.now(timezone.utc)
@@ -170,16 +189,137 @@ def format_time_12h(dt: Optional[datetime]) -> str:
     if dt is None:
         return ""
     try:
-        if dt.tzinfo is None:
-            dt = _APP_TZ.localize(dt)
-        else:
-            dt = dt.astimezone(_APP_TZ)
+        # Naive values already carry app-TZ wall time. Aware ones skip the conversion only
+        # when they hold the day's localized app-TZ tzinfo — a bare .replace(tzinfo=APP_TZ)
+        # has the same zone name but pytz's LMT offset, and must be normalized (astimezone
+        # alone returns it untouched, since the tzinfo object is the zone itself).
+        if dt.tzinfo is not None and dt.tzinfo is not _app_tzinfo_on(dt.date()):
+            dt = _APP_TZ.normalize(dt.astimezone(_APP_TZ))
         s = dt.strftime("%I:%M %p")
         return s.lstrip("0") if s[0] == "0" else s  # "04:30 PM" -> "4:30 PM"
     except Exception:
         return ""
 
 
+class _DayTimeline:
+    """Break windows of one calendar day compiled into datetimes, with cumulative
+    break offsets so a productive-minute projection is a pair of bisects."""
+
+    __slots__ = ("origin", "starts", "ends", "productive_starts", "cum_break")
+
+    def __init__(self, merged: List[Tuple[datetime, datetime]], origin: datetime) -> None:
+        self.origin = origin
+        self.starts = [bs for bs, _ in merged]
+        self.ends = [be for _, be in merged]
+        # cum_break[i] = total break time before break i; productive_starts[i] =
+        # productive (non-break) time elapsed between ``origin`` and break i's start.
+        self.cum_break: List[timedelta] = [timedelta(0)]
+        self.productive_starts: List[timedelta] = []
+        for bs, be in merged:
+            self.productive_starts.append((bs - origin) - self.cum_break[-1])
+            self.cum_break.append(self.cum_break[-1] + (be - bs))
+
+
+class WorkCalendar:
+    """Precompiled break timeline for a working day.
+
+    Break windows are sorted, merged and localized once per (date, tz-awareness)
+    instead of on every projection, so ``advance`` is O(log breaks). Build one per
+    queue/day via ``work_calendar(breaks)`` and reuse it for every user in a
+    recompute — the live queue, booking preview and slot generation all share it.
+    """
+
+    __slots__ = ("breaks", "_merged_times", "_overlap_starts", "_overlap_ends", "_days")
+
+    _MAX_DAYS = 32
+
+    def __init__(self, breaks: Optional[List[Tuple[dt_time, dt_time]]] = None) -> None:
+        # Raw valid breaks in the caller's order (labels / "on break" lookups keep
+        # first-match semantics); merged copy drives the projection math.
+        self.breaks: List[Tuple[dt_time, dt_time]] = [(bs, be) for bs, be in (breaks or []) if bs < be]
+        ordered = sorted(self.breaks)
+        self._merged_times = self._merge(ordered, touching=True)
+        # Overlap checks are half-open, so back-to-back breaks must stay separate there.
+        disjoint = self._merge(ordered, touching=False)
+        self._overlap_starts = [bs for bs, _ in disjoint]
+        self._overlap_ends = [be for _, be in disjoint]
+        self._days: Dict[Tuple[date, bool], _DayTimeline] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.breaks)
+
+    @staticmethod
+    def _merge(ordered: List[Tuple[dt_time, dt_time]], touching: bool) -> List[Tuple[dt_time, dt_time]]:
+        merged: List[List[dt_time]] = []
+        for bs, be in ordered:
+            if merged and (bs <= merged[-1][1] if touching else bs < merged[-1][1]):
+                merged[-1][1] = max(merged[-1][1], be)
+            else:
+                merged.append([bs, be])
+        return [(bs, be) for bs, be in merged]
+
+    def _to_dt(self, day: date, t: dt_time, aware: bool) -> datetime:
+        naive = datetime.combine(day, t)
+        return localize_app_tz(naive) if aware else naive
+
+    def _timeline(self, day: date, aware: bool) -> _DayTimeline:
+        key = (day, aware)
+        timeline = self._days.get(key)
+        if timeline is None:
+            if len(self._days) >= self._MAX_DAYS:
+                self._days.clear()
+            merged = [(self._to_dt(day, bs, aware), self._to_dt(day, be, aware)) for bs, be in self._merged_times]
+            timeline = _DayTimeline(merged, self._to_dt(day, dt_time.min, aware))
+            self._days[key] = timeline
+        return timeline
+
+    def advance(self, base_dt: datetime, work_minutes: float) -> datetime:
+        """Add ``work_minutes`` of productive time to ``base_dt``, skipping breaks on
+        ``base_dt``'s calendar day. Same contract as ``advance_work_minutes``."""
+        if not self._merged_times:
+            return base_dt + timedelta(minutes=work_minutes)
+
+        tl = self._timeline(base_dt.date(), base_dt.tzinfo is not None)
+        current = base_dt
+        # Break containing the cursor (merged windows never touch, so one jump suffices).
+        k = bisect_right(tl.starts, current) - 1
+        if k >= 0 and current < tl.ends[k]:
+            current = tl.ends[k]
+        lo = k + 1
+
+        work = timedelta(minutes=work_minutes)
+        # Productive offset of the finish; first break whose start lies at/after it.
+        target = (current - tl.origin) - tl.cum_break[lo] + work
+        i = bisect_left(tl.productive_starts, target, lo)
+        return current + work + (tl.cum_break[i] - tl.cum_break[lo])
+
+    def begin(self, start_dt: datetime) -> datetime:
+        """A turn can never *begin* inside a break — push it to the break's end."""
+        return self.advance(start_dt, 0)
+
+    def localized_breaks(self, ref_date: date) -> List[Tuple[datetime, datetime]]:
+        """Raw breaks (caller order) as tz-aware datetimes on ``ref_date``."""
+        return [
+            (self._to_dt(ref_date, bs, True), self._to_dt(ref_date, be, True))
+            for bs, be in self.breaks
+        ]
+
+    def overlaps_break(self, start: dt_time, end: dt_time) -> bool:
+        """True if the time-of-day window [start, end) overlaps any break."""
+        i = bisect_right(self._overlap_ends, start)
+        return i < len(self._overlap_starts) and self._overlap_starts[i] < end
+
+
+@lru_cache(maxsize=256)
+def _cached_work_calendar(breaks: Tuple[Tuple[dt_time, dt_time], ...]) -> WorkCalendar:
+    return WorkCalendar(list(breaks))
+
+
+def work_calendar(breaks: Optional[List[Tuple[dt_time, dt_time]]] = None) -> WorkCalendar:
+    """Return the shared compiled ``WorkCalendar`` for a break list (memoized by value)."""
+    return _cached_work_calendar(tuple(breaks or ()))
+
+
 def advance_work_minutes(
     base_dt: datetime,
     work_minutes: float,
@@ -195,40 +335,12 @@ def advance_work_minutes(
     ``breaks`` is a list of ``(start, end)`` time tuples (order/validity not
     assumed — they are sorted and start>=end entries are ignored). Works for both
     tz-aware (today / IST) and tz-naive (future dates) datetimes; break boundaries
-    inherit ``base_dt``'s tzinfo.
+    inherit ``base_dt``'s tzinfo. Hot loops should hold a ``work_calendar(breaks)``
+    and call its ``advance`` directly.
     """
     if not breaks:
         return base_dt + timedelta(minutes=work_minutes)
-
-    base_date = base_dt.date()
-    is_aware = base_dt.tzinfo is not None
-
-    def to_dt(t: dt_time) -> datetime:
-        naive = datetime.combine(base_date, t)
-        return _APP_TZ.localize(naive) if is_aware else naive
-
-    break_dts = sorted(
-        ((to_dt(bs), to_dt(be)) for bs, be in breaks if bs < be),
-        key=lambda b: b[0],
-    )
-
-    current = base_dt
-    remaining = work_minutes
-    for bk_start, bk_end in break_dts:
-        # Break already fully behind the cursor — ignore.
-        if bk_end <= current:
-            continue
-        # Cursor sits inside this break — jump to its end and continue.
-        if bk_start <= current < bk_end:
-            current = bk_end
-            continue
-        minutes_before_break = (bk_start - current).total_seconds() / 60
-        if remaining <= minutes_before_break:
-            return current + timedelta(minutes=remaining)
-        remaining -= minutes_before_break
-        current = bk_end
-
-    return current + timedelta(minutes=remaining)
+    return work_calendar(breaks).advance(base_dt, work_minutes)
 
 
 def shift_wait_range(wait_range: str, delta_minutes: int) -> str:
@@ -376,17 +488,75 @@ def sort_key_live_queue_row(row: Tuple[Any, Any]) -> tuple:
     return (2, False, qu.enqueue_time or qu.created_at or _UTC_MIN)
 
 
+@dataclass(slots=True)
+class LiveQueueUser:
+    """One queue_users row as it flows through the live-queue pipeline.
+
+    Times stay as ``time``/``datetime`` objects (no "HH:MM" round-trips) and the
+    row uses ``__slots__`` — formatting happens only in ``to_dict`` at the
+    serialization edge.
+    """
+
+    uuid: str
+    status: int
+    turn_time: Optional[int] = None
+    enqueue_time: Optional[datetime] = None
+    appointment_type: str = "QUEUE"
+    scheduled_start: Optional[dt_time] = None
+    scheduled_end: Optional[dt_time] = None
+    token: Optional[str] = None
+    full_name: Optional[str] = None
+    phone: str = ""
+    service_summary: str = ""
+    dequeue_time: Optional[datetime] = None
+    position: Optional[int] = None
+    estimated_enqueue_time: Optional[datetime] = None
+    estimated_dequeue_time: Optional[datetime] = None
+    delay_minutes: Optional[int] = None
+    is_checked_in: bool = False
+    user_id: Optional[UUID] = None
+    queue_id: Optional[UUID] = None
+
+    def scheduled_start_dt(self, ref_date: date) -> Optional[datetime]:
+        """tz-aware scheduled_start for Fixed/Approximate users; None for walk-ins."""
+        if self.appointment_type not in ("FIXED", "APPROXIMATE") or self.scheduled_start is None:
+            return None
+        return localize_app_tz(datetime.combine(ref_date, self.scheduled_start))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Live-queue user payload (the LiveQueueUserItem shape)."""
+        return {
+            "uuid": self.uuid,
+            "full_name": self.full_name,
+            "phone": self.phone,
+            "token": self.token,
+            "service_summary": self.service_summary,
+            "status": self.status,
+            "turn_time": self.turn_time,
+            "enqueue_time": self.enqueue_time,
+            "dequeue_time": self.dequeue_time,
+            "position": self.position,
+            "estimated_enqueue_time": self.estimated_enqueue_time,
+            "estimated_dequeue_time": self.estimated_dequeue_time,
+            "appointment_type": self.appointment_type,
+            "scheduled_start": self.scheduled_start.strftime(TIME_FORMAT_HM) if self.scheduled_start else None,
+            "scheduled_end": self.scheduled_end.strftime(TIME_FORMAT_HM) if self.scheduled_end else None,
+            "delay_minutes": self.delay_minutes,
+            "is_checked_in": self.is_checked_in,
+        }
+
+
 def build_live_queue_users_raw(
     rows: List[Tuple[Any, Any]], svc_by_user: Dict[Any, List[str]]
-) -> List[Dict[str, Any]]:
+) -> List[LiveQueueUser]:
     """
-    Build the list of user dicts for live queue from raw DB rows and service names.
+    Build the live queue users from raw (QueueUser, User) DB rows and service names.
     Expects rows already sorted by sort_key_live_queue_row; will sort if not.
     """
     if not rows:
         return []
     rows = sorted(rows, key=sort_key_live_queue_row)
-    result: List[Dict[str, Any]] = []
+    result: List[LiveQueueUser] = []
     waiting_pos = 0
     for qu, user in rows:
         if qu.status == QUEUE_USER_REGISTERED:
@@ -395,26 +565,25 @@ def build_live_queue_users_raw(
         else:
             pos = None
         names = svc_by_user.get(qu.uuid, [])
-        st = getattr(qu, "scheduled_start", None)
-        se = getattr(qu, "scheduled_end", None)
-        result.append({
-            "uuid": str(qu.uuid),
-            "full_name": user.full_name,
-            "phone": f"{user.country_code or ''} {user.phone_number or ''}".strip(),
-            "token": qu.token_number,
-            "service_summary": " · ".join(names) if names else "",
-            "status": qu.status,
-            "turn_time": getattr(qu, "turn_time", None),
-            "enqueue_time": qu.enqueue_time,
-            "dequeue_time": qu.dequeue_time,
-            "position": pos,
-            "estimated_enqueue_time": getattr(qu, "estimated_enqueue_time", None),
-            "estimated_dequeue_time": getattr(qu, "estimated_dequeue_time", None),
-            "appointment_type": getattr(qu, "appointment_type", None) or "QUEUE",
-            "scheduled_start": st.strftime("%H:%M") if st else None,
-            "scheduled_end": se.strftime("%H:%M") if se else None,
-            "delay_minutes": getattr(qu, "delay_minutes", None),
-            "is_checked_in": bool(getattr(qu, "is_checked_in", False)),
-        })
+        result.append(LiveQueueUser(
+            uuid=str(qu.uuid),
+            full_name=user.full_name,
+            phone=f"{user.country_code or ''} {user.phone_number or ''}".strip(),
+            token=qu.token_number,
+            service_summary=" · ".join(names) if names else "",
+            status=qu.status,
+            turn_time=getattr(qu, "turn_time", None),
+            enqueue_time=qu.enqueue_time,
+            dequeue_time=qu.dequeue_time,
+            position=pos,
+            estimated_enqueue_time=getattr(qu, "estimated_enqueue_time", None),
+            estimated_dequeue_time=getattr(qu, "estimated_dequeue_time", None),
+            appointment_type=getattr(qu, "appointment_type", None) or "QUEUE",
+            scheduled_start=getattr(qu, "scheduled_start", None),
+            scheduled_end=getattr(qu, "scheduled_end", None),
+            delay_minutes=getattr(qu, "delay_minutes", None),
+            is_checked_in=bool(getattr(qu, "is_checked_in", False)),
+            user_id=qu.user_id,
+            queue_id=qu.queue_id,
+        ))
     return result
-
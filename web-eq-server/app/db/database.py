@@ -5,6 +5,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import DATABASE_URL, DB_HOST, DB_NAME, DB_PORT, DB_USER, DB_PASSWORD, DB_ECHO_LOGS
+from app.db.instrumentation import InstrumentedQueuePool, instrument_engine
 
 load_dotenv()
 
@@ -30,6 +31,7 @@ if db_url.startswith("postgres://"):
 
 engine = create_engine(
     db_url,
+    poolclass=InstrumentedQueuePool,
     echo=db_settings.DB_ECHO_LOGS,
     pool_pre_ping=True,
     pool_size=5,       # Render Starter DB allows 25 connections max; keep headroom
@@ -37,6 +39,7 @@ engine = create_engine(
     pool_timeout=30,
     pool_recycle=1800, # Recycle connections every 30 min to avoid stale connections
 )
+instrument_engine(engine)
 
 # Define the Base class
 Base = declarative_base()
@@ -0,0 +1,80 @@
+"""
+Query and connection-pool metrics for the SQLAlchemy engine.
+
+Cursor events time every statement: a process-wide histogram, plus the
+current request's RequestDBStats when one is set (see MetricsMiddleware),
+including the per-shape counts app.db.query_budget checks.
+InstrumentedQueuePool times how long a checkout waits for a free connection
+(including the connect itself when the pool grows); occupancy is read from the
+pool at scrape time.
+"""
+import time as _time
+from typing import Any, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import LATENCY_BUCKETS, MetricFamily, gauge_family, metrics, request_db_stats
+from app.db.query_budget import statement_shape
+
+_QUERY_STARTED = "metrics_query_started"
+
+db_query_seconds = metrics.histogram(
+    "db_query_duration_seconds", "SQL statement execution time.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+db_pool_wait_seconds = metrics.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.", buckets=LATENCY_BUCKETS,
+)
+db_pool_timeouts = metrics.counter("db_pool_checkout_timeouts_total", "Checkouts that hit pool_timeout.")
+
+
+class InstrumentedQueuePool(QueuePool):
+    def _do_get(self) -> Any:
+        started = _time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            db_pool_timeouts.inc()
+            raise
+        finally:
+            db_pool_wait_seconds.observe(_time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info[_QUERY_STARTED] = _time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info.pop(_QUERY_STARTED, None)
+    if started is None:
+        return
+    elapsed = _time.perf_counter() - started
+    db_query_seconds.observe(elapsed)
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += elapsed
+        shape = statement_shape(statement)
+        stats.statements[shape] = stats.statements.get(shape, 0) + 1
+
+
+def instrument_engine(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    def collect_pool() -> Iterable[MetricFamily]:
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            return []
+        return [
+            gauge_family("db_pool_connections_in_use", "Connections checked out of the pool.",
+                         {"": pool.checkedout()}),
+            gauge_family("db_pool_connections_idle", "Connections idle in the pool.",
+                         {"": pool.checkedin()}),
+            gauge_family("db_pool_overflow", "Connections open beyond pool_size (negative: room left).",
+                         {"": pool.overflow()}),
+        ]
+
+    metrics.register_collector(collect_pool)
@@ -0,0 +1,148 @@
+"""
+Per-request SQL budgets and repeated-statement (N+1) detection.
+
+The cursor events in app.db.instrumentation count every statement the current
+request executes, and how often each statement shape ran — the SQL text with
+expanded IN-lists collapsed, so "the same query for the next row" is one shape.
+QueryBudgetMiddleware compares the count with the route's budget
+(@query_budget(n) on the endpoint, else QUERY_BUDGET_DEFAULT) and flags any
+shape run QUERY_REPEAT_THRESHOLD or more times. Findings are logged, counted
+in /metrics and kept in query_report (served worst-first at /metrics/queries).
+
+With QUERY_BUDGET_STRICT a route over budget raises QueryBudgetExceeded after
+the response, which TestClient re-raises into the test. count_queries() does
+the same around any block of controller / service code.
+"""
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from app.core.config import QUERY_BUDGET_DEFAULT, QUERY_REPEAT_THRESHOLD
+from app.core.metrics import RequestDBStats, request_db_stats
+
+logger = logging.getLogger(__name__)
+
+QUERY_BUDGET_ATTR = "__query_budget__"
+
+# Shapes kept per route in the report, and characters kept per shape
+_REPORT_SHAPES = 5
+_SHAPE_CHARS = 300
+
+_EXPANDED_PARAMS = re.compile(r"%\(\w+\)s(?:\s*,\s*%\(\w+\)s)+")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries: int) -> Callable[[F], F]:
+    """Declare the most SQL statements one request to this endpoint may run.
+    Goes under the router decorator: @router.get(...) / @query_budget(10)."""
+    def decorate(endpoint: F) -> F:
+        setattr(endpoint, QUERY_BUDGET_ATTR, max_queries)
+        return endpoint
+    return decorate
+
+
+def budget_for(endpoint: Any) -> int:
+    return getattr(endpoint, QUERY_BUDGET_ATTR, QUERY_BUDGET_DEFAULT)
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    return _EXPANDED_PARAMS.sub("%(...)s", " ".join(statement.split()))
+
+
+def repeated_statements(stats: RequestDBStats, threshold: int = QUERY_REPEAT_THRESHOLD) -> List[Tuple[str, int]]:
+    """Shapes run at least *threshold* times, most frequent first."""
+    return sorted(
+        ((shape, count) for shape, count in stats.statements.items() if count >= threshold),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+
+def describe(label: str, stats: RequestDBStats, budget: Optional[int], repeated: List[Tuple[str, int]]) -> str:
+    parts = [f"{label}: {stats.queries} SQL statements"]
+    if budget is not None:
+        parts[0] += f" (budget {budget})"
+    for shape, count in repeated[:3]:
+        parts.append(f"{count}x {shape[:_SHAPE_CHARS]}")
+    return "\n  ".join(parts)
+
+
+class QueryReport:
+    """Per-route query counts since process start, for finding the worst offenders."""
+
+    def __init__(self) -> None:
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, budget: int, stats: RequestDBStats, repeated: List[Tuple[str, int]]) -> None:
+        with self._lock:
+            entry = self._routes.setdefault(route, {
+                "budget": budget, "requests": 0, "total_queries": 0, "max_queries": 0,
+                "over_budget": 0, "repeated": {},
+            })
+            entry["requests"] += 1
+            entry["total_queries"] += stats.queries
+            entry["max_queries"] = max(entry["max_queries"], stats.queries)
+            if stats.queries > budget:
+                entry["over_budget"] += 1
+            shapes: Dict[str, int] = entry["repeated"]
+            for shape, count in repeated:
+                shapes[shape] = max(shapes.get(shape, 0), count)
+            if len(shapes) > _REPORT_SHAPES:
+                entry["repeated"] = dict(sorted(shapes.items(), key=lambda item: item[1], reverse=True)[:_REPORT_SHAPES])
+
+    def worst(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Routes by peak statements per request, then by how often they blew the budget."""
+        with self._lock:
+            rows = [
+                {
+                    "route": route,
+                    "budget": entry["budget"],
+                    "requests": entry["requests"],
+                    "avg_queries": round(entry["total_queries"] / entry["requests"], 1),
+                    "max_queries": entry["max_queries"],
+                    "over_budget": entry["over_budget"],
+                    "repeated": [
+                        {"count": count, "statement": shape[:_SHAPE_CHARS]}
+                        for shape, count in sorted(entry["repeated"].items(), key=lambda item: item[1], reverse=True)
+                    ],
+                }
+                for route, entry in self._routes.items()
+            ]
+        rows.sort(key=lambda row: (row["max_queries"], row["over_budget"]), reverse=True)
+        return rows[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+@contextmanager
+def count_queries(budget: Optional[int] = None, label: str = "block") -> Iterator[RequestDBStats]:
+    """Count the statements run inside the block (same thread / task). Raises
+    QueryBudgetExceeded on exit when *budget* is given and exceeded:
+
+        with count_queries(budget=4) as stats:
+            CustomerController(db).get_appointments(user_id)
+    """
+    stats = RequestDBStats()
+    token = request_db_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        request_db_stats.reset(token)
+    if budget is not None and stats.queries > budget:
+        raise QueryBudgetExceeded(describe(label, stats, budget, repeated_statements(stats)))
+
+
+# Global singleton
+query_report = QueryReport()
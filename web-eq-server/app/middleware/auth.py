@@ -1,13 +1,118 @@
+import hashlib
+import logging
 import re
 import secrets
-from typing import Optional
+import threading
+import time as _time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 from fastapi import Request
 from jose import jwt, JWTError
+from jose.exceptions import ExpiredSignatureError
 
-from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, MOBILE_TOKEN_EXPIRE_DAYS, WEB_TOKEN_EXPIRE_MINUTES
+from app.core.config import (
+    SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, MOBILE_TOKEN_EXPIRE_DAYS, WEB_TOKEN_EXPIRE_MINUTES,
+    JWT_BACKEND, JWT_VERIFY_CACHE_SIZE, JWT_VERIFY_CACHE_TTL_SECONDS,
+)
 from app.core.constants import MOBILE_USER_AGENT_PATTERNS
 
+logger = logging.getLogger(__name__)
+
+
+class _JoseBackend:
+    name = "jose"
+
+    def decode(self, token: str) -> dict:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+class _PyJWTBackend:
+    """PyJWT — same HS256 checks (signature, exp), noticeably cheaper per call.
+    Errors are re-raised as jose's JWTError so callers need not care."""
+    name = "pyjwt"
+
+    def __init__(self) -> None:
+        import jwt as pyjwt  # optional dependency
+        self._jwt = pyjwt
+
+    def decode(self, token: str) -> dict:
+        try:
+            return self._jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_aud": False})
+        except self._jwt.ExpiredSignatureError as exc:
+            raise ExpiredSignatureError(str(exc))
+        except self._jwt.InvalidTokenError as exc:
+            raise JWTError(str(exc))
+
+
+def _load_jwt_backend(name: str):
+    if name == "pyjwt":
+        try:
+            return _PyJWTBackend()
+        except ImportError:
+            logger.warning("JWT_BACKEND=pyjwt but PyJWT is not installed; using python-jose")
+    return _JoseBackend()
+
+
+class TokenVerificationCache:
+    """Bounded LRU of sha256(token) -> (claims, valid_until).
+
+    Only successfully verified tokens are stored, keyed by a digest so raw tokens
+    never sit in memory. An entry is served until the token's exp (capped at
+    ttl_seconds for tokens without exp), after which it is dropped and the token
+    is rejected as expired — the same answer a fresh decode would give.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[bytes, Tuple[dict, float, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def decode(self, token: str, backend) -> dict:
+        if self.max_entries <= 0:
+            return backend.decode(token)
+        key = hashlib.sha256(token.encode()).digest()
+        now = _time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                claims, cached_until, exp = entry
+                if exp is not None and now >= exp:
+                    del self._entries[key]
+                    raise ExpiredSignatureError("Signature has expired.")
+                if now < cached_until:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return dict(claims)
+                del self._entries[key]
+            self.misses += 1
+        claims = backend.decode(token)
+        exp = claims.get("exp")
+        exp = float(exp) if isinstance(exp, (int, float)) else None
+        cached_until = now + self.ttl_seconds if exp is None else min(exp, now + self.ttl_seconds)
+        with self._lock:
+            self._entries[key] = (claims, cached_until, exp)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return dict(claims)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+jwt_backend = _load_jwt_backend(JWT_BACKEND)
+token_cache = TokenVerificationCache(JWT_VERIFY_CACHE_SIZE, JWT_VERIFY_CACHE_TTL_SECONDS)
+
+
+def decode_access_token(token: str) -> dict:
+    """Verify a session token (signature + exp) and return its claims. Raises
+    JWTError like jose.jwt.decode; repeat calls for one token are served from
+    token_cache."""
+    return token_cache.decode(token, jwt_backend)
+
 
 def get_access_token_expires_time(client_type: str = "web") -> Optional[timedelta]:
     if client_type == "mobile":
@@ -31,6 +136,24 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def create_booking_preview_token(claims: dict, ttl_seconds: int) -> str:
+    # No "sub" claim on purpose — AuthMiddleware rejects this token as a session.
+    to_encode = {**claims, "typ": "booking_preview"}
+    to_encode["exp"] = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def decode_booking_preview_token(token: str) -> Optional[dict]:
+    """Return the preview claims, or None when the token is invalid, expired or of another type."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("typ") != "booking_preview":
+        return None
+    return payload
+
+
 def extract_token(request: Request) -> Optional[str]:
     # Authorization header takes priority — explicitly sent by the client app,
     # so it correctly identifies the caller even when multiple apps share the
@@ -3,11 +3,10 @@ import logging
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import JSONResponse
-from jose import jwt, JWTError
+from jose import JWTError
 from uuid import UUID
 
-from app.core.config import SECRET_KEY, ALGORITHM
-from app.middleware.auth import extract_token
+from app.middleware.auth import decode_access_token, extract_token
 from app.db.database import SessionLocal
 from app.models.user import User
 from app.core.context import RequestContext
@@ -33,7 +32,7 @@ class AuthMiddleware(BaseHTTPMiddleware):
             return auth_error(401, "Not authenticated. Please log in.")
 
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload = decode_access_token(token)
         except JWTError:
             return auth_error(401, "Invalid or expired session. Please log in again.")
 
@@ -0,0 +1,63 @@
+"""
+Per-route request latency and per-request database usage.
+
+Pure ASGI (no BaseHTTPMiddleware task per request). The route label is the
+matched path template from scope["route"] (set by FastAPI's router, which
+mutates the shared scope), so /queue/{queue_id}/live is one series however
+many queues exist; unmatched paths share "<unmatched>". The status label is
+the class (2xx, 4xx, ...) to keep cardinality bounded.
+"""
+import time as _time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import COUNT_BUCKETS, RequestDBStats, metrics, request_db_stats
+
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency, until the response body is sent.",
+    ("method", "route", "status"),
+)
+http_request_db_queries = metrics.histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request.", ("route",), COUNT_BUCKETS,
+)
+http_request_db_seconds = metrics.counter(
+    "http_request_db_seconds_total", "SQL execution time spent in HTTP requests.", ("route",),
+)
+
+
+def route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = RequestDBStats()
+        token = request_db_stats.set(stats)
+        started = _time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_db_stats.reset(token)
+            route = route_label(scope)
+            http_request_seconds.observe(
+                _time.perf_counter() - started, scope["method"], route, f"{status // 100}xx"
+            )
+            http_request_db_queries.observe(stats.queries, route)
+            if stats.seconds:
+                http_request_db_seconds.inc(route, amount=stats.seconds)
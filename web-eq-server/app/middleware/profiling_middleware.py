@@ -0,0 +1,80 @@
+"""
+Attaches a sampling profile session (app.core.profiling) to HTTP requests.
+
+Off unless PROFILE_SLOW_MS or PROFILE_TOKEN is set. With PROFILE_SLOW_MS every
+request is sampled and the profile kept only when the request took at least
+that long. A request carrying "X-Profile: <PROFILE_TOKEN>" is always kept and
+gets the file name back in the X-Profile-File response header; fetch it from
+/metrics/profiles/<name> (METRICS_TOKEN).
+
+def endpoints run in a threadpool thread, outside the middleware's stack;
+profile_sync_endpoints() makes each one attach its thread to the request's
+session for as long as it runs.
+"""
+import asyncio
+import functools
+import hmac
+import sys
+from typing import Any, Callable, Iterable
+
+from fastapi.routing import APIRoute
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import PROFILE_SLOW_MS, PROFILE_TOKEN
+from app.core.profiling import attached_thread, current_profile, profiler
+
+
+def _requested(scope: Scope) -> bool:
+    if not PROFILE_TOKEN:
+        return False
+    for key, value in scope["headers"]:
+        if key == b"x-profile":
+            return hmac.compare_digest(value, PROFILE_TOKEN.encode())
+    return False
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        forced = scope["type"] == "http" and _requested(scope)
+        if not forced and (scope["type"] != "http" or not PROFILE_SLOW_MS):
+            await self.app(scope, receive, send)
+            return
+
+        session = profiler.start(f"{scope['method']} {scope['path']}", anchor=sys._getframe())
+        token = current_profile.set(session)
+
+        async def send_wrapper(message: Message) -> None:
+            if forced and message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (b"x-profile-file", session.filename.encode())],
+                }
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            profiler.finish(session, keep=forced or session.elapsed() * 1000 >= PROFILE_SLOW_MS)
+
+
+def _attaching(call: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(call)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        with attached_thread():
+            return call(*args, **kwargs)
+    return run
+
+
+def profile_sync_endpoints(routes: Iterable[BaseRoute]) -> None:
+    """Wrap every def endpoint so its threadpool thread joins the request's profile
+    session on dispatch. FastAPI runs dependant.call through run_in_threadpool,
+    which carries the request's context (and so current_profile) into the thread.
+    Call once, after the routers are included."""
+    for route in routes:
+        if isinstance(route, APIRoute) and not asyncio.iscoroutinefunction(route.dependant.call):
+            route.dependant.call = _attaching(route.dependant.call)
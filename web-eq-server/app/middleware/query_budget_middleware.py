@@ -0,0 +1,71 @@
+"""
+Checks each HTTP request's SQL statement count against the route's budget and
+flags repeated statement shapes (see app.db.query_budget).
+
+Sits inside MetricsMiddleware and reuses the RequestDBStats it set; sets its
+own when running without it. Requests that did not match a route are skipped.
+"""
+import logging
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import QUERY_BUDGET_STRICT
+from app.core.metrics import RequestDBStats, metrics, request_db_stats
+from app.db.query_budget import (
+    QueryBudgetExceeded,
+    budget_for,
+    describe,
+    query_report,
+    repeated_statements,
+)
+
+logger = logging.getLogger(__name__)
+
+query_budget_exceeded = metrics.counter(
+    "http_request_query_budget_exceeded_total", "Requests that ran more SQL statements than the route's budget.",
+    ("route",),
+)
+query_repeats = metrics.counter(
+    "http_request_repeated_statements_total", "Requests that ran one statement shape past the N+1 threshold.",
+    ("route",),
+)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = request_db_stats.get()
+        token = None
+        if stats is None:
+            stats = RequestDBStats()
+            token = request_db_stats.set(stats)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if token is not None:
+                request_db_stats.reset(token)
+
+        route = scope.get("route")
+        if route is None or not stats.queries:
+            return
+        budget = budget_for(getattr(route, "endpoint", None))
+        repeated = repeated_statements(stats)
+        query_report.record(route.path, budget, stats, repeated)
+        over_budget = stats.queries > budget
+        if not over_budget and not repeated:
+            return
+
+        label = f"{scope['method']} {route.path}"
+        if over_budget:
+            query_budget_exceeded.inc(route.path)
+        if repeated:
+            query_repeats.inc(route.path)
+        if over_budget and QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(describe(label, stats, budget, repeated))
+        logger.warning("SQL %s", describe(label, stats, budget if over_budget else None, repeated))
@@ -7,11 +7,12 @@ from app.models.address import Address
 from app.models.schedule import Schedule, ScheduleBreak, ScheduleException
 from app.models.employee import Employee
 from app.models.service import Service
-from app.models.queue import Queue, QueueUser, QueueService, QueueUserService, AppointmentSlot
+from app.models.queue import Queue, QueueUser, QueueService, QueueUserService, AppointmentSlot, QueueTokenCounter, QueueDailyStats
 from app.models.role import Role, UserRoles
-from app.models.review import Review
-from app.models.notification import Notification
+from app.models.review import Review, ReviewSummary
+from app.models.notification import Notification, NotificationArchive
 from app.models.contact import ContactForm
+from app.models.platform_counter import PlatformCounter
 
 __all__ = [
     "BaseModel",
@@ -30,10 +31,15 @@ __all__ = [
     "QueueService",
     "QueueUserService",
     "AppointmentSlot",
+    "QueueTokenCounter",
+    "QueueDailyStats",
     "Role",
     "UserRoles",
     "Review",
+    "ReviewSummary",
     "Notification",
+    "NotificationArchive",
     "ContactForm",
+    "PlatformCounter",
 ]
 
@@ -1,10 +1,11 @@
 import uuid as _uuid
 
-from sqlalchemy import Boolean, Column, ForeignKey, Index, String, Text
+from sqlalchemy import TIMESTAMP, Boolean, Column, ForeignKey, Index, String, Text, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 
-from app.models.base import BaseModel
+from app.models.base import Base, BaseModel
 
 
 class Notification(BaseModel):
@@ -27,4 +28,30 @@ class Notification(BaseModel):
     __table_args__ = (
         Index("ix_notifications_user_created", "user_id", "created_at"),
         Index("ix_notifications_user_unread", "user_id", "is_read"),
+        # Retention job: oldest read rows first, without scanning unread ones.
+        Index("ix_notifications_read_created", "created_at", postgresql_where=text("is_read")),
+    )
+
+
+class NotificationArchive(Base):
+    """Read notifications moved out of the hot table by the retention job."""
+    __tablename__ = "notifications_archive"
+
+    uuid = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.uuid", ondelete="CASCADE"),
+        nullable=False,
+    )
+    type = Column(String(50), nullable=False)
+    title = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    data = Column(JSONB, nullable=True)
+    is_read = Column(Boolean, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    archived_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_notifications_archive_user_created", "user_id", "created_at"),
     )
@@ -0,0 +1,16 @@
+from sqlalchemy import TIMESTAMP, BigInteger, Column, Integer, String
+
+from app.models.base import BaseModel
+
+
+class PlatformCounter(BaseModel):
+    """Row counts for the admin dashboard, kept current by statement-level triggers
+    (see app.services.platform_counter_service). Each counter is split over
+    PLATFORM_COUNTER_SHARDS rows so concurrent writers rarely wait on one row;
+    its value is the sum of its shards."""
+    __tablename__ = "platform_counters"
+
+    name = Column(String(50), primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    value = Column(BigInteger, default=0, nullable=False)
+    reconciled_at = Column(TIMESTAMP(timezone=True), nullable=True)
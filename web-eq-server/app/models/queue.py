@@ -1,6 +1,6 @@
 import uuid
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Float, Time, Date, TIMESTAMP, Text, DateTime
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Float, Time, Date, TIMESTAMP, Text, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel, Base
 
@@ -26,6 +26,11 @@ class Queue(BaseModel):
     slot_interval_minutes = Column(Integer, nullable=True)  # cadence for slot generation; null = use slot_duration
     max_per_slot = Column(Integer, default=1, nullable=True)  # capacity per slot for FIXED/APPROXIMATE
 
+    __table_args__ = (
+        # Dashboard queue lists: every queue of one business
+        Index("ix_queues_merchant_id", "merchant_id"),
+    )
+
     queue_users = relationship("QueueUser", back_populates="queue", lazy="select")
     business = relationship("Business", back_populates="queues", foreign_keys=[merchant_id], lazy="select")
     queue_services = relationship("QueueService", back_populates="queue", lazy="select")
@@ -65,6 +70,13 @@ class QueueUser(BaseModel):
     eta_minutes = Column(Integer, nullable=True)  # customer's self-declared travel time (0/15/30/60/90)
     heading_notified_at = Column(TIMESTAMP(timezone=True), nullable=True)  # set after "head out" notification
 
+    __table_args__ = (
+        # Expiry / migration sweeps: active (REGISTERED, IN_PROGRESS, SCHEDULED) rows by date
+        Index("ix_queue_users_active_date", "queue_date", postgresql_where=status.in_([1, 2, 8])),
+        # Daily rollup: all rows of one date, grouped by queue
+        Index("ix_queue_users_date_queue", "queue_date", "queue_id"),
+    )
+
     queue = relationship("Queue", back_populates="queue_users", foreign_keys=[queue_id], lazy="select")
     user = relationship("User", back_populates="queue_users", foreign_keys=[user_id], lazy="select")
     slot = relationship("AppointmentSlot", back_populates="queue_users", foreign_keys=[slot_id], lazy="select")
@@ -89,6 +101,16 @@ class AppointmentSlot(BaseModel):
     queue_users = relationship("QueueUser", back_populates="slot", foreign_keys="QueueUser.slot_id", lazy="select")
 
 
+class QueueTokenCounter(BaseModel):
+    """Durable per-(queue, date) token sequence. last_number is the end of the last
+    block leased (see TokenAllocator) — every token comes from a block below it."""
+    __tablename__ = "queue_token_counters"
+
+    queue_id = Column(UUID(as_uuid=True), ForeignKey("queues.uuid", ondelete="CASCADE"), primary_key=True)
+    queue_date = Column(Date, primary_key=True)
+    last_number = Column(Integer, default=0, nullable=False)
+
+
 class QueueService(BaseModel):
     __tablename__ = "queue_services"
 
@@ -120,3 +142,39 @@ class QueueUserService(Base):
     queue_user = relationship("QueueUser", back_populates="queue_user_services", lazy="select")
     queue_service = relationship("QueueService", back_populates="queue_user_services", lazy="select")
 
+
+
+class QueueDailyStats(Base):
+    """Per-queue, per-day KPIs rolled up from queue_users by QueueStatsService.
+
+    Times are minutes. service = dequeue_time - enqueue_time of served rows (the
+    service start overwrites enqueue_time); wait = service start - arrival
+    (check-in, else booking time) for same-day arrivals. service_histogram holds
+    counts per whole minute (last bucket = that many or more) so percentiles can
+    be merged across days. skipped is counted as skips happen — a skip returns
+    the row to REGISTERED and leaves nothing to recount."""
+    __tablename__ = "queue_daily_stats"
+
+    queue_id = Column(UUID(as_uuid=True), ForeignKey("queues.uuid", ondelete="CASCADE"), primary_key=True)
+    stat_date = Column(Date, primary_key=True)
+    business_id = Column(UUID(as_uuid=True), ForeignKey("businesses.uuid", ondelete="CASCADE"), nullable=False)
+    booked = Column(Integer, default=0, nullable=False)
+    served = Column(Integer, default=0, nullable=False)
+    no_show = Column(Integer, default=0, nullable=False)
+    cancelled = Column(Integer, default=0, nullable=False)
+    expired = Column(Integer, default=0, nullable=False)
+    skipped = Column(Integer, default=0, nullable=False)
+    unique_users = Column(Integer, default=0, nullable=False)
+    avg_wait_minutes = Column(Float, nullable=True)
+    p50_wait_minutes = Column(Float, nullable=True)
+    p90_wait_minutes = Column(Float, nullable=True)
+    avg_service_minutes = Column(Float, nullable=True)
+    p50_service_minutes = Column(Float, nullable=True)
+    p90_service_minutes = Column(Float, nullable=True)
+    service_histogram = Column(JSONB, nullable=True)
+    peak_hour = Column(Integer, nullable=True)  # hour (app timezone) with the most arrivals
+    computed_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_queue_daily_stats_business_date", "business_id", "stat_date"),
+    )
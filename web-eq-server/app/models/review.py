@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, ForeignKey, Float, Text, Boolean
+from sqlalchemy import Column, ForeignKey, Float, Integer, String, Text, Boolean
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -27,3 +27,22 @@ class Review(BaseModel):
     service = relationship("Service", foreign_keys=[service_id], lazy="select")
     employee = relationship("Employee", foreign_keys=[employee_id], lazy="select")
     queue_user = relationship("QueueUser", back_populates="reviews", foreign_keys=[queue_user_id], lazy="select")
+
+
+class ReviewSummary(BaseModel):
+    """Rating count / sum and 1-5 star histogram per business or employee, so
+    listings and detail pages never aggregate reviews. Incremented in the same
+    transaction as the review insert (ReviewService.create_review) and rebuilt
+    nightly by ReviewService.reconcile_summaries(). Stars are round(rating), the
+    same bucketing as the rating filter on review lists."""
+    __tablename__ = "review_summaries"
+
+    scope = Column(String(20), primary_key=True)  # "business" | "employee"
+    subject_id = Column(UUID(as_uuid=True), primary_key=True)
+    rating_count = Column(Integer, default=0, nullable=False)
+    rating_sum = Column(Float, default=0.0, nullable=False)
+    star_1 = Column(Integer, default=0, nullable=False)
+    star_2 = Column(Integer, default=0, nullable=False)
+    star_3 = Column(Integer, default=0, nullable=False)
+    star_4 = Column(Integer, default=0, nullable=False)
+    star_5 = Column(Integer, default=0, nullable=False)
@@ -8,6 +8,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from app.db.database import get_db
+from app.db.query_budget import query_budget
 from app.controllers.customer_controller import CustomerController
 from app.controllers.queue_controller import QueueController
 from app.schemas.profile import CustomerProfileResponse
@@ -61,6 +62,7 @@ async def update_profile(
     response_model=CustomerTodayAppointmentsResponse,
     summary="Get all of today's active appointments",
 )
+@query_budget(20)
 async def get_today_appointments(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(["CUSTOMER"])),
@@ -74,6 +76,7 @@ async def get_today_appointments(
     response_model=CustomerAppointmentListResponse,
     summary="List customer appointments",
 )
+@query_budget(25)
 async def get_appointments(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles(["CUSTOMER"])),
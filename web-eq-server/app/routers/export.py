@@ -0,0 +1,64 @@
+from typing import Literal
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import FileResponse
+
+from app.controllers.export_controller import ExportController
+from app.middleware.permissions import get_current_user, require_roles
+from app.models.user import User
+from app.schemas.export import ExportJobData
+
+export_router = APIRouter()
+
+
+@export_router.post(
+    "/queue-users",
+    response_model=ExportJobData,
+    status_code=202,
+    dependencies=[Depends(require_roles(["ADMIN", "BUSINESS", "EMPLOYEE"]))],
+)
+def submit_queue_users_export(
+    format: Literal["pdf", "xlsx", "csv"] = Query(..., description="Export format: pdf, xlsx or csv"),
+    business_id: UUID | None = None,
+    queue_id: UUID | None = None,
+    employee_id: UUID | None = None,
+    search: str | None = None,
+    user: User = Depends(get_current_user),
+):
+    return ExportController().submit_queue_users(
+        user,
+        fmt=format,
+        business_id=business_id,
+        queue_id=queue_id,
+        employee_id=employee_id,
+        search=search,
+    )
+
+
+@export_router.post(
+    "/users-appointments",
+    response_model=ExportJobData,
+    status_code=202,
+    dependencies=[Depends(require_roles(["ADMIN", "BUSINESS", "EMPLOYEE"]))],
+)
+def submit_users_appointments_export(
+    format: Literal["pdf", "xlsx", "csv"] = Query(..., description="Export format: pdf, xlsx or csv"),
+    business_id: UUID | None = Query(None, description="Filter by business UUID"),
+    queue_id: UUID | None = Query(None, description="Filter by queue UUID"),
+    user: User = Depends(get_current_user),
+):
+    return ExportController().submit_users_appointments(
+        user, fmt=format, business_id=business_id, queue_id=queue_id,
+    )
+
+
+@export_router.get("/jobs/{job_id}", response_model=ExportJobData)
+def get_export_job(job_id: str, user: User = Depends(get_current_user)):
+    return ExportController().get_job(user, job_id)
+
+
+@export_router.get("/jobs/{job_id}/download", response_class=FileResponse)
+def download_export(job_id: str, user: User = Depends(get_current_user)):
+    job = ExportController().get_job_file(user, job_id)
+    return FileResponse(job.path, media_type=job.media_type, filename=job.filename)
@@ -1,3 +1,4 @@
+from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, Query
@@ -16,10 +17,11 @@ notification_router = APIRouter()
 def list_notifications(
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; overrides offset"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    return NotificationController(db).list_notifications(UUID(str(current_user.uuid)), limit, offset)
+    return NotificationController(db).list_notifications(UUID(str(current_user.uuid)), limit, offset, cursor)
 
 
 @notification_router.patch("/mark-read/{notification_id}", response_model=NotificationData)
@@ -1,55 +1,99 @@
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
 
 from app.controllers.qr_controller import QRController
+from app.core.config import QR_CACHE_MAX_AGE_SECONDS
+from app.core.qr import QRImage
 from app.db.database import get_db
 from app.middleware.permissions import get_current_user, require_roles
 from app.models.user import User
 
 qr_router = APIRouter()
 
+_QR_RESPONSES = {200: {"content": {"image/png": {}, "image/svg+xml": {}}}, 304: {"description": "Not modified"}}
+QRFormat = Literal["png", "svg"]
+QRSize = Literal["small", "medium", "large"]
+
+
+def _qr_response(request: Request, image: QRImage) -> Response:
+    # private: the same path returns a different code per signed-in business, so
+    # shared caches must not store it; browsers revalidate with the ETag.
+    headers = {
+        "ETag": image.etag,
+        "Cache-Control": f"private, max-age={QR_CACHE_MAX_AGE_SECONDS}",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if image.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=image.content, media_type=image.media_type, headers=headers)
+
 
 @qr_router.get(
     "/business",
     response_class=Response,
-    responses={200: {"content": {"image/png": {}}}},
+    responses=_QR_RESPONSES,
     dependencies=[Depends(require_roles(["BUSINESS"]))],
 )
 def get_business_qr(
+    request: Request,
+    format: QRFormat = Query("png", description="png or svg"),
+    size: QRSize = Query("medium", description="small, medium or large"),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    png_bytes = QRController(db).get_business_qr(user)
-    return Response(content=png_bytes, media_type="image/png")
+    return _qr_response(request, QRController(db).get_business_qr(user, format, size))
 
 
 @qr_router.get(
     "/employee/me",
     response_class=Response,
-    responses={200: {"content": {"image/png": {}}}},
+    responses=_QR_RESPONSES,
     dependencies=[Depends(require_roles(["EMPLOYEE"]))],
 )
 def get_my_employee_qr(
+    request: Request,
+    format: QRFormat = Query("png", description="png or svg"),
+    size: QRSize = Query("medium", description="small, medium or large"),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    return _qr_response(request, QRController(db).get_my_employee_qr(user, format, size))
+
+
+@qr_router.get(
+    "/employees/sheet",
+    response_class=Response,
+    responses={200: {"content": {"application/pdf": {}}}},
+    dependencies=[Depends(require_roles(["BUSINESS"]))],
+)
+def get_employees_qr_sheet(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    png_bytes = QRController(db).get_my_employee_qr(user)
-    return Response(content=png_bytes, media_type="image/png")
+    pdf_bytes = QRController(db).get_employees_qr_sheet(user)
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={"Content-Disposition": 'attachment; filename="employee-qr-codes.pdf"'},
+    )
 
 
 @qr_router.get(
     "/employee/{employee_uuid}",
     response_class=Response,
-    responses={200: {"content": {"image/png": {}}}},
+    responses=_QR_RESPONSES,
     dependencies=[Depends(require_roles(["BUSINESS"]))],
 )
 def get_employee_qr(
     employee_uuid: UUID,
+    request: Request,
+    format: QRFormat = Query("png", description="png or svg"),
+    size: QRSize = Query("medium", description="small, medium or large"),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    png_bytes = QRController(db).get_employee_qr(employee_uuid, user)
-    return Response(content=png_bytes, media_type="image/png")
+    return _qr_response(request, QRController(db).get_employee_qr(employee_uuid, user, format, size))
@@ -1,7 +1,7 @@
 from typing import List, Literal, Optional
 from uuid import UUID
 from datetime import date
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
@@ -10,7 +10,7 @@ from app.controllers.queue_controller import QueueController
 from app.schemas.queue import (
     QueueCreate, QueueCreateBatch, QueueData, QueueDetailData, QueueServiceDetailData,
     QueueUpdate, QueueServicesAdd, QueueServiceUpdate,
-    QueueUserData, QueueUserDetailResponse, QueueUsersPageResponse,
+    QueueUserData, QueueUserDetailResponse, QueueUsersPageResponse, QueueDailyStatsData,
     AvailableSlotData, BookingCreateInput, BookingData, BookingPreviewData,
     LiveQueueData,
     SlotsListResponse,
@@ -125,7 +125,7 @@ async def get_queue_users(
 
 @queue_router.get("/get_users/export")
 async def export_queue_users(
-    format: Literal["pdf", "xlsx"] = Query(..., description="Export format: pdf or xlsx"),
+    format: Literal["pdf", "xlsx", "csv"] = Query(..., description="Export format: pdf, xlsx or csv"),
     business_id: UUID | None = None,
     queue_id: UUID | None = None,
     employee_id: UUID | None = None,
@@ -147,6 +147,22 @@ async def export_queue_users(
     )
 
 
+@queue_router.get(
+    "/daily_stats",
+    response_model=List[QueueDailyStatsData],
+    dependencies=[Depends(require_roles(["BUSINESS", "EMPLOYEE", "ADMIN"]))],
+)
+async def get_daily_stats(
+    business_id: UUID,
+    date_from: date,
+    date_to: date,
+    queue_id: UUID | None = None,
+    db: Session = Depends(get_db),
+):
+    controller = QueueController(db)
+    return await controller.get_daily_stats(business_id, date_from, date_to, queue_id)
+
+
 @queue_router.post("/booking-preview", response_model=BookingPreviewData)
 async def get_booking_preview(
     business_id: UUID = Query(..., description="Business UUID"),
@@ -272,12 +288,14 @@ async def stop_queue(
 @queue_router.post("/book", response_model=BookingData)
 async def create_booking(
     payload: BookingCreateInput,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     controller = QueueController(db)
     return await controller.create_booking(
         user_id=current_user.uuid,
-        data=payload
+        data=payload,
+        background_tasks=background_tasks,
     )
 
@@ -16,6 +16,7 @@ from app.routers.notification import notification_router
 from app.routers.websocket import router as websocket_router
 from app.routers.admin import admin_router
 from app.routers.qr import qr_router
+from app.routers.export import export_router
 
 routers = APIRouter()
 
@@ -35,5 +36,6 @@ routers.include_router(notification_router, prefix="/notification", tags=["Notif
 routers.include_router(websocket_router, tags=["WebSocket"])
 routers.include_router(admin_router, prefix="/admin", tags=["Super Admin"])
 routers.include_router(qr_router, prefix="/qr", tags=["QR Code"])
+routers.include_router(export_router, prefix="/export", tags=["Export"])
 routers.include_router(contact_router, tags=["Contact"])
 
@@ -51,7 +51,7 @@ def get_users_appointments(
     dependencies=[Depends(require_roles(["ADMIN", "BUSINESS", "EMPLOYEE"]))],
 )
 def export_users_appointments(
-    format: Literal["pdf", "xlsx"] = Query(..., description="Export format: pdf or xlsx"),
+    format: Literal["pdf", "xlsx", "csv"] = Query(..., description="Export format: pdf, xlsx or csv"),
     business_id: UUID | None = Query(None, description="Filter by business UUID"),
     queue_id: UUID | None = Query(None, description="Filter by queue UUID"),
     db: Session = Depends(get_db),
@@ -9,7 +9,7 @@ from uuid import UUID
 from fastapi import WebSocket, WebSocketDisconnect, APIRouter, Depends
 from starlette.websockets import WebSocketState
 from sqlalchemy.orm import Session
-from jose import jwt, JWTError
+from jose import JWTError
 from datetime import datetime
 
 from app.db.database import get_db
@@ -21,9 +21,9 @@ from app.services.realtime.customer_queue_manager import customer_queue_manager
 from app.models.queue import QueueUser
 
 from app.services.realtime.notification_manager import notification_manager
-from app.services.notification_service import NotificationService
+from app.services.notification_service import NotificationService, encode_notification_cursor
 from app.schemas.notification import NotificationData, NotificationListResponse
-from app.core.config import SECRET_KEY, ALGORITHM
+from app.middleware.auth import decode_access_token
 
 logger = logging.getLogger(__name__)
 
@@ -58,7 +58,7 @@ async def get_user_from_token(websocket: WebSocket):
         return None  # Anonymous connection allowed on some endpoints
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         # All tokens use "sub" for the user UUID (set in auth_service.py)
         return payload.get("sub")
     except JWTError as e:
@@ -368,6 +368,7 @@ async def notifications_websocket(
             unread_count=unread,
             limit=20,
             offset=0,
+            next_cursor=encode_notification_cursor(rows[-1]) if len(rows) == 20 else None,
         )
         await websocket.send_json({
             "type": "initial_state",
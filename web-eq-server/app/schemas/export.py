@@ -0,0 +1,15 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+
+class ExportJobData(BaseModel):
+    job_id: str
+    kind: str
+    format: Literal["pdf", "xlsx", "csv"]
+    status: Literal["queued", "running", "done", "failed", "expired"]
+    filename: str
+    cached: bool = False
+    rows_done: Optional[int] = None
+    rows_total: Optional[int] = None
+    error: Optional[str] = None
@@ -38,3 +38,5 @@ class NotificationListResponse(BaseModel):
     unread_count: int
     limit: int
     offset: int
+    # Pass back as ?cursor= for the next page; None on the last page
+    next_cursor: Optional[str] = None
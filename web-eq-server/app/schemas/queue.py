@@ -5,7 +5,7 @@ from uuid import UUID
 from datetime import datetime, date, time
 
 from app.schemas.user import UserData
-from app.core.utils import format_time_12h, wait_minutes_from_now
+from app.core.utils import format_time_12h, wait_minutes_from_now, LiveQueueUser
 from app.core.constants import QUEUE_USER_REGISTERED, QUEUE_USER_IN_PROGRESS, QUEUE_USER_COMPLETED, QUEUE_USER_SCHEDULED
 
 
@@ -228,6 +228,30 @@ class QueueUsersPageResponse(BaseModel):
     pages: int
 
 
+class QueueDailyStatsData(BaseModel):
+    """One queue_daily_stats row — a queue's KPIs for one day (times in minutes)."""
+    queue_id: UUID
+    stat_date: date
+    booked: int = 0
+    served: int = 0
+    no_show: int = 0
+    cancelled: int = 0
+    expired: int = 0
+    skipped: int = 0
+    unique_users: int = 0
+    avg_wait_minutes: Optional[float] = None
+    p50_wait_minutes: Optional[float] = None
+    p90_wait_minutes: Optional[float] = None
+    avg_service_minutes: Optional[float] = None
+    p50_service_minutes: Optional[float] = None
+    p90_service_minutes: Optional[float] = None
+    peak_hour: Optional[int] = None
+    computed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class QueueUserDetailUserInfo(BaseModel):
     full_name: Optional[str] = None
     email: Optional[str] = None
@@ -368,6 +392,7 @@ class BookingCreateInput(BaseModel):
     recipient_name: Optional[str] = None
     eta_minutes: Optional[int] = None  # customer's self-declared travel time: 0, 15, 30, 60, or 90
     is_walk_in: bool = False  # True = physically present, auto-marked as checked-in
+    preview_token: Optional[str] = None  # from BookingPreviewData — reused when queue_id is omitted
 
 
 class SlotData(BaseModel):
@@ -548,6 +573,7 @@ class BookingPreviewData(BaseModel):
     date: str
     queues: List[QueueOptionData]
     recommended_queue_id: Optional[str] = None
+    preview_token: Optional[str] = None  # signed, short-lived; pass back to create_booking
 
 
 class BusinessQueueState(BaseModel):
@@ -648,18 +674,18 @@ class LiveQueueData(BaseModel):
         cls,
         queue: Any,
         queue_date: date,
-        users_raw: List[Dict[str, Any]],
+        users_raw: List[LiveQueueUser],
         employee_on_leave: bool = False,
         open_dt: Optional[datetime] = None,
         breaks: Optional[List[Any]] = None,
     ) -> "LiveQueueData":
-        """Build from queue, date, raw user dicts (e.g. from build_live_queue_users_raw), and leave flag."""
+        """Build from queue, date, live queue users (from build_live_queue_users_raw), and leave flag."""
         from app.services.realtime.live_queue_manager import calculate_queue_waits
 
-        waiting_count = sum(1 for u in users_raw if u.get("status") == QUEUE_USER_REGISTERED)
-        in_progress_count = sum(1 for u in users_raw if u.get("status") == QUEUE_USER_IN_PROGRESS)
-        completed_count = sum(1 for u in users_raw if u.get("status") == QUEUE_USER_COMPLETED)
-        upcoming_count = sum(1 for u in users_raw if u.get("status") == QUEUE_USER_SCHEDULED)
+        waiting_count = sum(1 for u in users_raw if u.status == QUEUE_USER_REGISTERED)
+        in_progress_count = sum(1 for u in users_raw if u.status == QUEUE_USER_IN_PROGRESS)
+        completed_count = sum(1 for u in users_raw if u.status == QUEUE_USER_COMPLETED)
+        upcoming_count = sum(1 for u in users_raw if u.status == QUEUE_USER_SCHEDULED)
 
         waits = calculate_queue_waits(users_raw, open_dt=open_dt, breaks=breaks)
         current_token: Optional[str] = waits["current_token"]
@@ -667,17 +693,17 @@ class LiveQueueData(BaseModel):
         ordered_waiting = waits["ordered_waiting"]
         position_map = waits["position_map"]
 
-        waiting_rank = {str(u["uuid"]): i for i, u in enumerate(ordered_waiting)}
+        waiting_rank = {u.uuid: i for i, u in enumerate(ordered_waiting)}
 
-        def _display_key(u: dict) -> tuple:
-            s = u.get("status")
+        def _display_key(u: LiveQueueUser) -> tuple:
+            s = u.status
             if s == QUEUE_USER_IN_PROGRESS:
-                return (0, 0, "")
+                return (0, 0, time.min)
             if s == QUEUE_USER_REGISTERED:
-                return (1, waiting_rank.get(str(u["uuid"]), 9999), "")
+                return (1, waiting_rank.get(u.uuid, 9999), time.min)
             if s == QUEUE_USER_SCHEDULED:
-                return (2, 0, u.get("scheduled_start") or "99:99")
-            return (3, 0, "")  # COMPLETED
+                return (2, 0, u.scheduled_start or time.max)
+            return (3, 0, time.min)  # COMPLETED
 
         display_users = sorted(users_raw, key=_display_key)
 
@@ -696,8 +722,8 @@ class LiveQueueData(BaseModel):
             on_break_until_ts=waits.get("on_break_until_ts"),
             users=[
                 LiveQueueUserItem.from_user_dict(
-                    {**u, "position": position_map.get(str(u["uuid"]), u.get("position"))},
-                    wait_data.get(str(u["uuid"]), {}),
+                    {**u.to_dict(), "position": position_map.get(u.uuid, u.position)},
+                    wait_data.get(u.uuid, {}),
                 )
                 for u in display_users
             ],
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, field_validator
-from typing import Optional
+from typing import Dict, Optional
 from uuid import UUID
 
 
@@ -86,6 +86,8 @@ class FeaturedReviewData(BaseModel):
 class BusinessReviewSummary(BaseModel):
     average_rating: float
     review_count: int
+    # star (1-5) -> number of reviews
+    rating_histogram: Dict[int, int] = {}
 
 
 class MyReviewsResponse(BaseModel):
@@ -2,6 +2,7 @@
 Super Admin schemas — request bodies and response models for all admin endpoints.
 Kept separate from public schemas to avoid polluting them with admin-only fields.
 """
+from datetime import datetime
 from typing import Optional, List
 from uuid import UUID
 from pydantic import BaseModel, Field
@@ -154,3 +155,7 @@ class AdminStats(BaseModel):
     total_services: int
     total_queues: int
     total_appointments: int
+    # Counters are kept exact by triggers; these say when they were last checked
+    # against a full recount (None: never, values were counted live).
+    counters_reconciled_at: Optional[datetime] = None
+    seconds_since_reconcile: Optional[int] = None
@@ -0,0 +1,179 @@
+"""
+ActivationTimer — activates SCHEDULED appointments at their due time instead of
+on the next minute tick.
+
+A min-heap of (due_at, queue_user_id) lives on the app event loop, where
+due_at = scheduled_start - SCHEDULED_ACTIVATION_LEAD_MINUTES for today's
+appointments. It is filled by the sweep job in main.py (load()) and by
+create_booking / update_appointment (schedule()). A single task sleeps until
+the earliest entry, activates everything due in one
+QueueService.activate_due_scheduled_appointments call (in a worker thread), and
+broadcasts the live-queue state of the affected queues only.
+
+Entries are never removed: a cancelled or rescheduled appointment is simply no
+longer SCHEDULED (or no longer due) when its entry fires, so the UPDATE skips
+it. Rescheduling pushes a fresh entry; the newest due time per appointment wins.
+The periodic sweep remains the safety net for anything the timer missed
+(another worker's bookings, restarts, clock jumps).
+"""
+import asyncio
+import heapq
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from app.core.constants import SCHEDULED_ACTIVATION_LEAD_MINUTES
+from app.core.utils import format_date_iso, localize_app_tz, now_app_tz, today_app_date
+from app.db.database import SessionLocal
+from app.services.queue_service import QueueService
+from app.services.realtime.customer_queue_manager import customer_queue_manager
+from app.services.realtime.live_queue_manager import live_queue_manager
+
+logger = logging.getLogger(__name__)
+
+
+class ActivationTimer:
+    def __init__(self, lead_minutes: int = SCHEDULED_ACTIVATION_LEAD_MINUTES) -> None:
+        self.lead = timedelta(minutes=lead_minutes)
+        self._heap: List[Tuple[datetime, UUID]] = []
+        self._due: Dict[UUID, datetime] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.activated = 0
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="activation-timer")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._loop = None
+
+    # ── Producers (any thread) ───────────────────────────────────────────────
+
+    def schedule(self, queue_user_id: UUID, queue_date: date, scheduled_start: Optional[time]) -> None:
+        """Register one SCHEDULED appointment. Other days are picked up by the
+        sweep once they become today."""
+        if scheduled_start is None or queue_date != today_app_date():
+            return
+        due_at = localize_app_tz(datetime.combine(queue_date, scheduled_start)) - self.lead
+        self._call(self._push, [(due_at, queue_user_id)])
+
+    def load(self, today: date, pending: Iterable[Tuple[UUID, time]]) -> None:
+        """Register today's pending appointments (from QueueService.get_pending_scheduled_activations)."""
+        entries = [
+            (localize_app_tz(datetime.combine(today, start)) - self.lead, queue_user_id)
+            for queue_user_id, start in pending
+        ]
+        self._call(self._reset, today, entries)
+
+    def broadcast_threadsafe(self, queue_ids: Iterable[UUID], date_str: str) -> None:
+        """Broadcast queues activated by the sweep job (scheduler thread)."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        ids = [str(q) for q in queue_ids]
+        asyncio.run_coroutine_threadsafe(self._broadcast(ids, date_str), loop)
+
+    def _call(self, fn, *args) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return  # timer not running — the sweep job still activates
+        try:
+            loop.call_soon_threadsafe(fn, *args)
+        except RuntimeError:
+            pass
+
+    # ── Loop side ────────────────────────────────────────────────────────────
+
+    def _push(self, entries: List[Tuple[datetime, UUID]]) -> None:
+        for due_at, queue_user_id in entries:
+            self._due[queue_user_id] = due_at
+            heapq.heappush(self._heap, (due_at, queue_user_id))
+        if self._wake is not None:
+            self._wake.set()
+
+    def _reset(self, today: date, entries: List[Tuple[datetime, UUID]]) -> None:
+        # Keep entries added since the sweep read the DB; drop other days.
+        keep = [(due_at, qid) for qid, due_at in self._due.items() if due_at.date() == today]
+        self._due = {}
+        self._heap = []
+        self._push(keep + entries)
+
+    def _pop_due(self, now: datetime) -> List[UUID]:
+        ids: List[UUID] = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, queue_user_id = heapq.heappop(self._heap)
+            if self._due.get(queue_user_id) == due_at:  # else superseded by a newer entry
+                del self._due[queue_user_id]
+                ids.append(queue_user_id)
+        return ids
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            self._wake.clear()
+            timeout = None
+            if self._heap:
+                timeout = (self._heap[0][0] - now_app_tz()).total_seconds()
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            ids = self._pop_due(now_app_tz())
+            if not ids:
+                continue
+            try:
+                activated = await asyncio.to_thread(self._activate, ids)
+            except Exception:
+                logger.exception("Activation timer: failed to activate %d appointment(s)", len(ids))
+                continue  # the sweep job retries them
+            if activated:
+                self.activated += sum(activated.values())
+                logger.info("Activation timer: started %d scheduled appointment(s)", sum(activated.values()))
+                await self._broadcast([str(q) for q in activated], format_date_iso(today_app_date()))
+
+    @staticmethod
+    def _activate(ids: List[UUID]) -> Dict[UUID, int]:
+        db = SessionLocal()
+        try:
+            now = now_app_tz()
+            return QueueService(db).activate_due_scheduled_appointments(now.date(), now.time(), ids)
+        finally:
+            db.close()
+
+    @staticmethod
+    async def _broadcast(queue_ids: List[str], date_str: str) -> None:
+        db = SessionLocal()
+        try:
+            for queue_id in queue_ids:
+                try:
+                    await live_queue_manager.broadcast(
+                        queue_id, date_str, "live_queue_update",
+                        live_queue_manager.get_live_queue_state(db, queue_id, date_str)
+                    )
+                    await customer_queue_manager.broadcast_to_queue(db, queue_id, date_str)
+                except Exception:
+                    logger.warning("Live broadcast failed after activation queue_id=%s", queue_id, exc_info=True)
+        finally:
+            db.close()
+
+
+# Global singleton
+activation_timer = ActivationTimer()
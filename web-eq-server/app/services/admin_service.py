@@ -12,12 +12,11 @@ from sqlalchemy.orm import Session, selectinload
 
 from app.models.business import Business
 from app.models.category import Category
-from app.models.queue import Queue, QueueUser
 from app.models.role import Role, UserRoles
-from app.models.service import Service
 from app.models.user import User
+from app.services.platform_counter_service import PlatformCounterService
+from app.core.utils import now_utc
 from app.core.constants import (
-    BUSINESS_ACTIVE,
     BUSINESS_STATUS_LABELS,
 )
 
@@ -181,26 +180,22 @@ class AdminService:
 
     def get_stats(self) -> dict:
         try:
-            total_users: int = self.db.query(func.count(User.uuid)).scalar() or 0
-            total_businesses: int = self.db.query(func.count(Business.uuid)).scalar() or 0
-            active_businesses: int = (
-                self.db.query(func.count(Business.uuid))
-                .filter(Business.status == BUSINESS_ACTIVE)
-                .scalar() or 0
-            )
-            total_categories: int = self.db.query(func.count(Category.uuid)).scalar() or 0
-            total_services: int = self.db.query(func.count(Service.uuid)).scalar() or 0
-            total_queues: int = self.db.query(func.count(Queue.uuid)).scalar() or 0
-            total_appointments: int = self.db.query(func.count(QueueUser.uuid)).scalar() or 0
+            counts, reconciled_at = PlatformCounterService(self.db).get_counts()
             return {
-                "total_users": total_users,
-                "total_businesses": total_businesses,
-                "active_businesses": active_businesses,
-                "total_categories": total_categories,
-                "total_services": total_services,
-                "total_queues": total_queues,
-                "total_appointments": total_appointments,
+                "total_users": counts["users"],
+                "total_businesses": counts["businesses"],
+                "active_businesses": counts["active_businesses"],
+                "total_categories": counts["categories"],
+                "total_services": counts["services"],
+                "total_queues": counts["queues"],
+                "total_appointments": counts["queue_users"],
+                "counters_reconciled_at": reconciled_at,
+                "seconds_since_reconcile": (
+                    int((now_utc() - reconciled_at).total_seconds()) if reconciled_at else None
+                ),
             }
+        except HTTPException:
+            raise
         except Exception:
             logger.exception("Failed to get_stats")
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
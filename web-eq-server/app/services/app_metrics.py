@@ -0,0 +1,83 @@
+"""
+Scrape-time metrics read from the process's long-lived singletons: WebSocket
+connections per manager, the notification outbox, scheduler leadership, the
+in-memory caches and their cross-worker invalidation. Registered with the metrics registry on import (main.py).
+"""
+from typing import Dict, Iterable, List
+
+from app.core.metrics import MetricFamily, Sample, gauge_family, metrics
+from app.core.qr import qr_cache
+from app.middleware.auth import token_cache
+from app.services.activation_timer import activation_timer
+from app.services.export_jobs import export_jobs
+from app.services.notification_outbox import notification_outbox
+from app.services.notification_service import unread_counters
+from app.services.realtime.customer_appointment_manager import customer_appointment_manager
+from app.services.realtime.customer_queue_manager import customer_queue_manager
+from app.services.realtime.live_queue_manager import live_queue_manager
+from app.services.realtime.notification_manager import notification_manager
+from app.services.realtime.queue_manager import queue_manager
+from app.services.scheduler_leader import scheduler_leader
+from app.services.unread_invalidation import unread_invalidation
+
+_OUTBOX_GAUGES = ("queue_depth", "last_batch_ms")
+
+
+def _counter_family(name: str, help: str, values: Dict[str, float], label: str) -> MetricFamily:
+    return MetricFamily(name, "counter", help, [Sample({label: key}, value) for key, value in values.items()])
+
+
+def collect_app_metrics() -> Iterable[MetricFamily]:
+    families: List[MetricFamily] = [
+        gauge_family("ws_connections", "Open WebSocket connections.", {
+            "live_queue": live_queue_manager.connection_count(),
+            "customer_queue": customer_queue_manager.connection_count(),
+            "customer_appointment": customer_appointment_manager.connection_count(),
+            "queue": queue_manager.connection_count(),
+            "notification": notification_manager.connection_count(),
+        }, label="manager"),
+    ]
+
+    outbox = notification_outbox.metrics()
+    families.append(_counter_family(
+        "notification_outbox_events_total", "Notification outbox events by outcome.",
+        {key: value for key, value in outbox.items() if key not in _OUTBOX_GAUGES}, "event",
+    ))
+    families.append(gauge_family("notification_outbox_queue_depth", "Intents waiting to be persisted.",
+                                 {"": outbox["queue_depth"]}))
+
+    leader = scheduler_leader.status()
+    families.append(gauge_family("scheduler_is_leader", "1 when this worker runs the leader-only jobs.",
+                                 {"": leader["is_leader"]}))
+    families.append(_counter_family("scheduler_leader_events_total", "Leader elections won / job runs skipped.",
+                                    {"elections": leader["elections"], "skipped_runs": leader["skipped_runs"]},
+                                    "event"))
+    families.append(_counter_family("scheduled_appointments_activated_total",
+                                    "SCHEDULED appointments started by the activation timer.",
+                                    {"timer": activation_timer.activated}, "source"))
+
+    for cache, stats in (
+        ("jwt_verify", token_cache.stats()),
+        ("qr", qr_cache.stats()),
+        ("unread_counters", {"entries": len(unread_counters.tracked_users()),
+                             "hits": unread_counters.hits, "misses": unread_counters.misses}),
+    ):
+        families.append(gauge_family(f"cache_{cache}_entries", f"Entries in the {cache} cache.",
+                                     {"": stats["entries"]}))
+        families.append(_counter_family(f"cache_{cache}_lookups_total", f"{cache} cache lookups by result.",
+                                        {k: v for k, v in stats.items() if k != "entries"}, "result"))
+
+    families.append(_counter_family("unread_invalidation_events_total",
+                                    "Cross-worker unread-count invalidations by event.",
+                                    unread_invalidation.metrics(), "event"))
+
+    jobs = export_jobs.metrics()
+    families.append(gauge_family("export_jobs_inflight", "Export renders running or queued.",
+                                 {"": jobs["inflight"]}))
+    families.append(_counter_family("export_jobs_total", "Export jobs by outcome.",
+                                    {"cache_hit": jobs["cache_hits"], "rendered": jobs["rendered"],
+                                     "failed": jobs["failed"]}, "outcome"))
+    return families
+
+
+metrics.register_collector(collect_app_metrics)
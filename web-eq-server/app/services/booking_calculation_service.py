@@ -1,3 +1,4 @@
+import heapq
 from uuid import UUID
 from sqlalchemy.orm import Session
 from typing import List, Dict, Optional, Any, Tuple
@@ -183,16 +184,63 @@ class BookingCalculationService:
         today_metrics: Optional[Dict] = None,
         services_by_queue: Optional[Dict] = None,
     ) -> Optional[Dict]:
-        queue_options = self.get_queue_options(
+        best = self.top_queue_options(
             business_id, booking_date, queue_service_ids,
             services_by_queue or {},
             today_metrics=today_metrics,
+            k=1,
         )
-        available = [o for o in queue_options if o["available"]]
-        if not available:
-            return None
-        available.sort(key=lambda x: x["estimated_wait_minutes"])
-        return available[0]
+        return best[0] if best else None
+
+    def top_queue_options(
+        self,
+        business_id: UUID,
+        booking_date: date,
+        queue_service_ids: List[UUID],
+        services_by_queue: Dict,
+        today_metrics: Optional[Dict] = None,
+        k: int = 1,
+        exclude_queue_ids: Optional[set] = None,
+    ) -> List[Dict]:
+        """The *k* available queues with the shortest wait, best first.
+
+        Queues are visited in order of their break-unaware wait (a lower bound —
+        break reconciliation only ever adds minutes), so the full option (employee
+        window, break walk, payload) is built only until no remaining queue can beat
+        the current k-th best.  Ties keep queue order, matching a stable sort over
+        get_queue_options().
+        """
+        ctx = self._load_option_context(
+            business_id, booking_date, queue_service_ids, services_by_queue, today_metrics
+        )
+        if ctx is None or k <= 0:
+            return []
+        excluded = exclude_queue_ids or set()
+
+        frontier = [
+            (self._lower_bound_wait(ctx, queue), idx)
+            for idx, queue in enumerate(ctx["queues"])
+            if str(queue.uuid) not in excluded
+        ]
+        heapq.heapify(frontier)
+
+        # Max-heap of the best k so far, keyed on (-wait, -idx) so the root is the worst.
+        best: List[Tuple[int, int, Dict]] = []
+        while frontier:
+            bound, idx = heapq.heappop(frontier)
+            if len(best) == k and (bound, idx) > (-best[0][0], -best[0][1]):
+                break
+            option = self._build_option(ctx, ctx["queues"][idx])
+            if not option["available"]:
+                continue
+            entry = (-option["estimated_wait_minutes"], -idx, option)
+            if len(best) < k:
+                heapq.heappush(best, entry)
+            elif entry[:2] > best[0][:2]:
+                heapq.heapreplace(best, entry)
+
+        best.sort(key=lambda e: (-e[0], -e[1]))
+        return [option for _, _, option in best]
 
     def get_queue_options(
         self,
@@ -206,17 +254,31 @@ class BookingCalculationService:
 
         today_metrics and services_by_queue are built by the controller from DB data.
         """
+        ctx = self._load_option_context(
+            business_id, booking_date, queue_service_ids, services_by_queue, today_metrics
+        )
+        if ctx is None:
+            return []
+        return [self._build_option(ctx, queue) for queue in ctx["queues"]]
+
+    def _load_option_context(
+        self,
+        business_id: UUID,
+        booking_date: date,
+        queue_service_ids: List[UUID],
+        services_by_queue: Dict,
+        today_metrics: Optional[Dict],
+    ) -> Optional[Dict[str, Any]]:
+        """Batch-load everything build_today_option / build_future_option need, once."""
         # employees already eager-loaded inside get_queues_offering_service_ids
         queues = self.queue.get_queues_offering_service_ids(business_id, queue_service_ids)
         if not queues:
-            return []
+            return None
 
         queue_ids = [q.uuid for q in queues]
-        today = today_app_date()
         percentile_map = self.queue.get_historical_percentile_wait_batch(
             queue_ids, booking_date, 0.75, float(DEFAULT_AVG_TIME)
         )
-        current_time = now_app_tz()
 
         # Batch-load employee schedules + exceptions for booking_date —
         # avoids 2N extra queries when iterating N queues below.
@@ -229,25 +291,53 @@ class BookingCalculationService:
             list(schedule_map.keys()), booking_date
         )
 
-        if booking_date == today:
-            metrics = today_metrics if today_metrics is not None else {}
-            return [
-                self.build_today_option(
-                    queue, metrics, percentile_map, current_time, services_by_queue,
-                    schedule_map, exception_map,
-                )
-                for queue in queues
-            ]
-
-        future_metrics = self.queue.get_future_date_metrics_batch(queue_ids, booking_date)
-        return [
-            self.build_future_option(
-                queue, future_metrics, percentile_map, booking_date, services_by_queue,
-                schedule_map, exception_map,
+        is_today = booking_date == today_app_date()
+        return {
+            "queues": queues,
+            "booking_date": booking_date,
+            "is_today": is_today,
+            "current_time": now_app_tz(),
+            "percentile_map": percentile_map,
+            "services_by_queue": services_by_queue,
+            "schedule_map": schedule_map,
+            "exception_map": exception_map,
+            "today_metrics": (today_metrics if today_metrics is not None else {}) if is_today else None,
+            "future_metrics": (
+                None if is_today
+                else self.queue.get_future_date_metrics_batch(queue_ids, booking_date)
+            ),
+        }
+
+    def _build_option(self, ctx: Dict[str, Any], queue: Any) -> Dict:
+        if ctx["is_today"]:
+            return self.build_today_option(
+                queue, ctx["today_metrics"], ctx["percentile_map"], ctx["current_time"],
+                ctx["services_by_queue"], ctx["schedule_map"], ctx["exception_map"],
             )
-            for queue in queues
-        ]
+        return self.build_future_option(
+            queue, ctx["future_metrics"], ctx["percentile_map"], ctx["booking_date"],
+            ctx["services_by_queue"], ctx["schedule_map"], ctx["exception_map"],
+        )
 
+    def _lower_bound_wait(self, ctx: Dict[str, Any], queue: Any) -> int:
+        """Break-unaware wait for *queue* — never more than the option's final wait."""
+        percentile = ctx["percentile_map"].get(queue.uuid, DEFAULT_AVG_TIME)
+        if ctx["is_today"]:
+            t = ctx["today_metrics"].get(
+                queue.uuid,
+                {"registered_count": 0, "in_progress_count": 0, "total_wait_minutes": 0},
+            )
+            _, wait_minutes, _ = self.compute_wait(
+                t["registered_count"], t["in_progress_count"], t["total_wait_minutes"],
+                percentile, buffer_pct=0.15,
+            )
+            return wait_minutes
+        qm = ctx["future_metrics"].get(queue.uuid, {})
+        _, wait_minutes, _ = self.compute_future_wait(
+            qm.get("count", 0), percentile,
+            buffer_pct=0.20, total_wait=qm.get("total_turn_time", 0),
+        )
+        return wait_minutes
 
     def build_today_option(
         self,
@@ -1,7 +1,7 @@
 import logging
 from sqlalchemy.orm import Session, joinedload, contains_eager
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func, case, and_, true
+from sqlalchemy import case, and_, true
 from uuid import UUID
 from typing import Optional, List, Tuple, Dict
 from collections import defaultdict
@@ -16,9 +16,9 @@ from app.models.queue import QueueService as QueueServiceModel
 from app.models.service import Service
 from app.models.address import Address, EntityType
 from app.models.schedule import Schedule, ScheduleEntityType
-from app.models.review import Review
 from app.core.constants import BUSINESS_DRAFT, BUSINESS_REGISTERED, BUSINESS_ACTIVE
 from app.schemas.business import BusinessBasicInfoInput, BusinessBasicInfoUpdate
+from app.services.review_service import ReviewService
 
 
 class BusinessService:
@@ -171,26 +171,8 @@ class BusinessService:
         return schedule_map
 
     def get_review_stats_by_businesses(self, business_ids: List[UUID]) -> Dict[UUID, Tuple[float, int]]:
-        """Get (avg_rating, review_count) for multiple businesses in a single query"""
-        if not business_ids:
-            return {}
-
-        results = (
-            self.db.query(
-                Review.business_id,
-                func.coalesce(func.avg(Review.rating), 0.0),
-                func.count(Review.uuid)
-            )
-            .filter(Review.business_id.in_(business_ids))
-            .group_by(Review.business_id)
-            .all()
-        )
-
-        stats: Dict[UUID, Tuple[float, int]] = {}
-        for business_id, avg_rating, count in results:
-            stats[business_id] = (round(float(avg_rating), 1), int(count))
-
-        return stats
+        """Get (avg_rating, review_count) for multiple businesses from review_summaries"""
+        return ReviewService(self.db).get_review_summaries_by_businesses(business_ids)
 
     def get_business_with_category(self, business_id: UUID) -> Optional[Business]:
         return self.db.query(Business).options(joinedload(Business.category)).filter(Business.uuid == business_id, Business.status == BUSINESS_ACTIVE).first()
@@ -2,7 +2,7 @@ import logging
 import math
 from uuid import UUID
 from datetime import timedelta
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Tuple
 from sqlalchemy import asc, desc, or_, and_
 from sqlalchemy.orm import Session, load_only, joinedload, selectinload
 from sqlalchemy.exc import IntegrityError
@@ -11,12 +11,13 @@ from fastapi import HTTPException
 from app.models.employee import Employee
 from app.models.business import Business
 from app.models.queue import Queue, QueueService
-from app.models.review import Review
+from app.models.review import Review, ReviewSummary
 from app.models.role import Role, UserRoles
 from app.schemas.employee import BusinessEmployeesInput, EmployeeUpdate
 from app.core.utils import generate_invitation_code, now_utc, normalize_email, normalize_phone, normalize_country_code
 from app.core.exceptions import handle_integrity_error
 from app.services.schedule_service import ScheduleService
+from app.services.review_service import SUMMARY_SCOPE_EMPLOYEE
 
 logger = logging.getLogger(__name__)
 
@@ -357,6 +358,25 @@ class EmployeeService:
             logger.exception("Failed to get_employee_by_uuid_and_business (employee_uuid=%s)", employee_uuid)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
+    def get_employees_with_queue(self, business_id: UUID) -> List[Any]:
+        """(uuid, full_name, queue_id, queue_name) for every employee with a queue, by name."""
+        try:
+            return (
+                self.db.query(
+                    Employee.uuid,
+                    Employee.full_name,
+                    Employee.queue_id,
+                    Queue.name.label("queue_name"),
+                )
+                .join(Queue, Queue.uuid == Employee.queue_id)
+                .filter(Employee.business_id == business_id)
+                .order_by(Employee.full_name)
+                .all()
+            )
+        except Exception:
+            logger.exception("Failed to get_employees_with_queue (business_id=%s)", business_id)
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
     def get_verified_employee_by_queue(self, queue_id: UUID, business_id: UUID) -> Optional[Employee]:
         try:
             return (
@@ -462,6 +482,9 @@ class EmployeeService:
             self.db.query(Review).filter(Review.employee_id == employee_id).update(
                 {Review.employee_id: None}, synchronize_session=False
             )
+            self.db.query(ReviewSummary).filter(
+                ReviewSummary.scope == SUMMARY_SCOPE_EMPLOYEE, ReviewSummary.subject_id == employee_id
+            ).delete(synchronize_session=False)
             self.db.delete(employee)
 
             if user_id is not None:
@@ -0,0 +1,305 @@
+"""
+ExportJobManager — large exports rendered off the request path.
+
+submit() hashes (kind, format, filters) into a cache key. If
+EXPORT_CACHE_DIR/<key>.<fmt> is younger than EXPORT_CACHE_TTL_SECONDS the job
+is done immediately; if an identical export is already rendering the job
+attaches to it; otherwise the export runs in a process pool (spawned workers
+with their own DB engine) so reportlab / openpyxl never hold a web worker or
+the GIL.
+
+The worker writes <key>.<fmt>.part and renames it into place when finished, so
+a cached file is always complete. Progress ("<done> <total>") goes to
+<key>.<fmt>.progress and is read back on poll. Files and job records older than
+the TTL are removed by purge_expired() (scheduled in main.py).
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time as _time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from app.core.config import EXPORT_CACHE_DIR, EXPORT_CACHE_TTL_SECONDS, EXPORT_WORKERS
+from app.services.export_service import (
+    CSV_MEDIA_TYPE, PDF_MEDIA_TYPE, XLSX_MEDIA_TYPE,
+    MAX_EXPORT_JOB_PDF_ROWS, MAX_STREAMING_EXPORT_ROWS,
+    QUEUE_USERS_EXPORT_COLUMNS, USERS_EXPORT_COLUMNS,
+    queue_user_export_row, stream_csv, write_pdf, write_xlsx,
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_KIND_QUEUE_USERS = "queue_users"
+EXPORT_KIND_USERS = "users_appointments"
+
+_MEDIA_TYPES = {"pdf": PDF_MEDIA_TYPE, "xlsx": XLSX_MEDIA_TYPE, "csv": CSV_MEDIA_TYPE}
+_FILENAME_PREFIXES = {EXPORT_KIND_QUEUE_USERS: "queue-users", EXPORT_KIND_USERS: "users"}
+_PROGRESS_EVERY_ROWS = 1000
+
+
+@dataclass(slots=True)
+class ExportJob:
+    job_id: str
+    owner_id: str
+    kind: str
+    fmt: str
+    path: str
+    filename: str
+    created_at: float
+    future: Optional[Future] = None
+    cached: bool = False
+
+    @property
+    def media_type(self) -> str:
+        return _MEDIA_TYPES[self.fmt]
+
+
+def export_cache_key(kind: str, fmt: str, filters: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"kind": kind, "fmt": fmt, "filters": {k: str(v) for k, v in filters.items() if v is not None}},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+# ── Worker process side ─────────────────────────────────────────────────────
+
+def _export_source(db: Any, kind: str, filters: Dict[str, Any], limit: int) -> Tuple[str, list, Iterable, int]:
+    from app.services.queue_service import QueueService
+    from app.services.user_service import UserService
+
+    if kind == EXPORT_KIND_QUEUE_USERS:
+        svc = QueueService(db)
+        total = svc.count_queue_users_export(**filters)
+        rows = (queue_user_export_row(r, r) for r in svc.iter_queue_users_export(**filters, limit=limit))
+        return "Queue Users Report", QUEUE_USERS_EXPORT_COLUMNS, rows, total
+    user_svc = UserService(db)
+    total = user_svc.count_users_with_appointments(**filters)
+    return "Users Report", USERS_EXPORT_COLUMNS, user_svc.iter_users_with_appointments_export(**filters, limit=limit), total
+
+
+def _render_export(kind: str, fmt: str, filters: Dict[str, Any], path: str) -> int:
+    """Runs in a pool process: query, render to <path>.part, rename into place."""
+    from app.db.database import SessionLocal
+
+    limit = MAX_EXPORT_JOB_PDF_ROWS if fmt == "pdf" else MAX_STREAMING_EXPORT_ROWS
+    progress_path = f"{path}.progress"
+    part_path = f"{path}.part"
+    db = SessionLocal()
+    try:
+        title, columns, rows, total = _export_source(db, kind, filters, limit)
+        total = min(total, limit)
+        done = 0
+
+        def report() -> None:
+            with open(progress_path, "w") as f:
+                f.write(f"{done} {total}")
+
+        def counted(source: Iterable) -> Iterable:
+            nonlocal done
+            for row in source:
+                yield row
+                done += 1
+                if done % _PROGRESS_EVERY_ROWS == 0:
+                    report()
+
+        report()
+        with open(part_path, "wb") as out:
+            if fmt == "pdf":
+                write_pdf(title, columns, counted(rows), out)
+            elif fmt == "xlsx":
+                write_xlsx(columns, counted(rows), out)
+            else:
+                for chunk in stream_csv(columns, counted(rows)):
+                    out.write(chunk)
+        os.replace(part_path, path)
+        return done
+    finally:
+        db.close()
+        for leftover in (progress_path, part_path):
+            try:
+                os.remove(leftover)
+            except FileNotFoundError:
+                pass
+
+
+# ── Web process side ────────────────────────────────────────────────────────
+
+class ExportJobManager:
+    def __init__(
+        self,
+        cache_dir: str = EXPORT_CACHE_DIR,
+        ttl_seconds: int = EXPORT_CACHE_TTL_SECONDS,
+        workers: int = EXPORT_WORKERS,
+        render: Callable[..., int] = _render_export,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.workers = max(1, workers)
+        self._render = render
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._jobs: Dict[str, ExportJob] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.rendered = 0
+        self.failed = 0
+
+    def stop(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, owner_id: str, kind: str, fmt: str, filters: Dict[str, Any]) -> ExportJob:
+        key = export_cache_key(kind, fmt, filters)
+        path = os.path.join(self.cache_dir, f"{key}.{fmt}")
+        job = ExportJob(
+            job_id=uuid.uuid4().hex,
+            owner_id=owner_id,
+            kind=kind,
+            fmt=fmt,
+            path=path,
+            filename=f"{_FILENAME_PREFIXES[kind]}-{date.today().strftime('%Y-%m-%d')}.{fmt}",
+            created_at=_time.time(),
+        )
+        started: Optional[Future] = None
+        with self._lock:
+            if self._is_fresh(path):
+                job.cached = True
+                self.cache_hits += 1
+            else:
+                future = self._inflight.get(key)
+                if future is None:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    future = started = self._get_pool().submit(self._render, kind, fmt, filters, path)
+                    self._inflight[key] = future
+                job.future = future
+            self._jobs[job.job_id] = job
+        if started is not None:
+            # Outside the lock: the callback runs inline if the job already finished.
+            started.add_done_callback(lambda f, k=key: self._on_done(k, f))
+        return job
+
+    def get(self, job_id: str, owner_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.owner_id != owner_id:
+            return None
+        return job
+
+    def status(self, job: ExportJob) -> Dict[str, Any]:
+        """Poll payload: status is queued | running | done | failed | expired."""
+        result: Dict[str, Any] = {
+            "job_id": job.job_id,
+            "kind": job.kind,
+            "format": job.fmt,
+            "filename": job.filename,
+            "cached": job.cached,
+            "rows_done": None,
+            "rows_total": None,
+            "error": None,
+        }
+        future = job.future
+        if future is not None and not future.done():
+            progress = self._read_progress(job.path)
+            result["status"] = "running" if progress else "queued"
+            if progress:
+                result["rows_done"], result["rows_total"] = progress
+        elif future is not None and (future.cancelled() or future.exception() is not None):
+            result["status"] = "failed"
+            result["error"] = "Export failed. Please try again."
+        elif os.path.exists(job.path):
+            result["status"] = "done"
+        else:
+            result["status"] = "expired"
+        return result
+
+    def purge_expired(self) -> int:
+        """Forget jobs and delete cached files older than the TTL. Returns files removed."""
+        cutoff = _time.time() - self.ttl_seconds
+        with self._lock:
+            self._jobs = {
+                job_id: job for job_id, job in self._jobs.items()
+                if job.created_at >= cutoff or (job.future is not None and not job.future.done())
+            }
+            inflight_paths = {os.path.basename(job.path) for job in self._jobs.values()
+                              if job.future is not None and not job.future.done()}
+        removed = 0
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            if name.removesuffix(".part").removesuffix(".progress") in inflight_paths:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            jobs = len(self._jobs)
+            inflight = len(self._inflight)
+        return {
+            "jobs": jobs,
+            "inflight": inflight,
+            "cache_hits": self.cache_hits,
+            "rendered": self.rendered,
+            "failed": self.failed,
+        }
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn, not fork: the web process has live threads and DB connections;
+            # workers are recycled so reportlab's memory goes back to the OS.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=20,
+            )
+        return self._pool
+
+    def _is_fresh(self, path: str) -> bool:
+        try:
+            return os.path.getmtime(path) >= _time.time() - self.ttl_seconds
+        except FileNotFoundError:
+            return False
+
+    def _on_done(self, key: str, future: Future) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.failed += 1
+            logger.error("Export job failed (key=%s)", key, exc_info=error)
+        else:
+            self.rendered += 1
+            logger.info("Export rendered (key=%s rows=%s)", key, future.result())
+
+    @staticmethod
+    def _read_progress(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            with open(f"{path}.progress") as f:
+                done, total = f.read().split()
+            return int(done), int(total)
+        except (FileNotFoundError, ValueError):
+            return None
+
+
+# Global singleton
+export_jobs = ExportJobManager()
@@ -1,17 +1,41 @@
 from __future__ import annotations
 
-from io import BytesIO
+import csv
+import tempfile
+from io import BytesIO, StringIO
 from datetime import date, datetime
-from typing import Any
+from itertools import chain, islice
+from typing import IO, Any, Iterable, Iterator
+from xml.sax.saxutils import escape
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Table, TableStyle
 
-MAX_EXPORT_ROWS = 10_000
+from app.core.constants import QUEUE_USER_STATUS_LABELS
+
+MAX_EXPORT_ROWS = 10_000  # PDF (built in memory)
+MAX_STREAMING_EXPORT_ROWS = 1_000_000  # CSV / XLSX (streamed)
+# PDF rendered by a background export job: reportlab keeps every finished page
+# until the file is written, ~50 MB at this cap (PDF_ROWS_PER_PAGE rows per page)
+MAX_EXPORT_JOB_PDF_ROWS = 100_000
+
+STREAM_CHUNK_BYTES = 64 * 1024
+PDF_ROWS_PER_PAGE = 23  # rows that fit one landscape A4 page at 8pt
+_WIDTH_SAMPLE_ROWS = 200
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+PDF_MEDIA_TYPE = "application/pdf"
+
+QUEUE_USERS_EXPORT_COLUMNS = ["Name", "Email", "Phone", "Token No.", "Queue Date", "Enqueue Time", "Status", "Priority"]
+USERS_EXPORT_COLUMNS = ["Name", "Email", "Phone", "Total Appointments", "Last Visit"]
 
 
 def _safe_str(value: Any) -> str:
@@ -24,38 +48,147 @@ def _safe_str(value: Any) -> str:
     return str(value)
 
 
-def build_xlsx(columns: list[str], rows: list[list[Any]]) -> BytesIO:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Export"
+def queue_user_export_row(user: Any, queue_user: Any) -> list:
+    """One queue-users export row. *user* / *queue_user* may be ORM objects or a
+    single column row from QueueService.iter_queue_users_export (passed as both)."""
+    return [
+        getattr(user, "full_name", "") or "",
+        getattr(user, "email", "") or "",
+        f"{getattr(user, 'country_code', '') or ''} {getattr(user, 'phone_number', '') or ''}".strip(),
+        queue_user.token_number or "",
+        queue_user.queue_date.strftime("%Y-%m-%d") if queue_user.queue_date else "",
+        queue_user.enqueue_time,
+        QUEUE_USER_STATUS_LABELS.get(queue_user.status, "Unknown"),
+        "Yes" if getattr(queue_user, "priority", False) else "No",
+    ]
 
-    ws.append(columns)
-    header_fill = PatternFill("solid", fgColor="00695C")
-    header_font = Font(bold=True, color="FFFFFF")
-    header_align = Alignment(horizontal="center", vertical="center")
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = header_align
 
+def stream_csv(columns: list[str], rows: Iterable[Iterable[Any]]) -> Iterator[bytes]:
+    """Yield a UTF-8 CSV (with BOM, so Excel detects the encoding) in ~64 KB chunks
+    while *rows* is still being read — memory stays flat whatever the row count."""
+    buf = StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")
+    writer.writerow(columns)
     for row in rows:
-        ws.append([_safe_str(v) for v in row])
+        writer.writerow([_safe_str(v) for v in row])
+        if buf.tell() >= STREAM_CHUNK_BYTES:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
 
-    # auto-width capped at 40 characters
-    for col in ws.columns:
-        col_width = max((len(_safe_str(cell.value)) for cell in col), default=10)
-        ws.column_dimensions[col[0].column_letter].width = min(col_width + 2, 40)
 
-    buf = BytesIO()
-    wb.save(buf)
-    buf.seek(0)
-    return buf
+def write_xlsx(columns: list[str], rows: Iterable[Iterable[Any]], fileobj: IO[bytes]) -> None:
+    """Write an .xlsx to *fileobj* with openpyxl's write-only mode.
 
+    Rows go straight to openpyxl's on-disk sheet buffer instead of a cell tree, so
+    memory stays flat. Column widths come from the first rows (write-only sheets
+    cannot be revisited).
+    """
+    rows = iter(rows)
+    sample = [[_safe_str(v) for v in row] for row in islice(rows, _WIDTH_SAMPLE_ROWS)]
 
-def build_pdf(title: str, columns: list[str], rows: list[list[Any]]) -> BytesIO:
-    buf = BytesIO()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Export")
+    for idx, name in enumerate(columns):
+        width = max([len(name)] + [len(row[idx]) for row in sample if idx < len(row)])
+        ws.column_dimensions[get_column_letter(idx + 1)].width = min(width + 2, 40)
+
+    header = []
+    for name in columns:
+        cell = WriteOnlyCell(ws, value=name)
+        cell.fill = PatternFill("solid", fgColor="00695C")
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+        header.append(cell)
+    ws.append(header)
+    for row in chain(sample, ([_safe_str(v) for v in row] for row in rows)):
+        ws.append(row)
+    wb.save(fileobj)
+
+
+def stream_xlsx(columns: list[str], rows: Iterable[Iterable[Any]]) -> Iterator[bytes]:
+    """Yield an .xlsx in chunks. An xlsx is a zip whose index is written last, so
+    it is assembled in a temp file (write_xlsx) and then streamed out."""
+    with tempfile.TemporaryFile() as tmp:
+        write_xlsx(columns, rows, tmp)
+        tmp.seek(0)
+        while True:
+            chunk = tmp.read(STREAM_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+_PDF_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#00695C")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#F0F8F6")]),
+        ("GRID", (0, 0), (-1, -1), 0.4, colors.HexColor("#CCCCCC")),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("TOPPADDING", (0, 0), (-1, -1), 5),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 5),
+        ("LEFTPADDING", (0, 0), (-1, -1), 6),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+    ]
+)
+
+
+class _FlowableStream(list):
+    """Flowable list for doc.build that refills from an iterator as the layout
+    consumes it. BaseDocTemplate.build loops on len(flowables) and pops from the
+    front, so only the flowable being laid out (and any split remainder) is held."""
+
+    def __init__(self, flowables: Iterator[Any]) -> None:
+        super().__init__()
+        self._pending = flowables
+
+    def __len__(self) -> int:
+        if not super().__len__():
+            self.extend(islice(self._pending, 1))
+        return super().__len__()
+
+
+def _pdf_tables(columns: list[str], rows: Iterator[Iterable[Any]]) -> Iterator[Table]:
+    col_count = len(columns)
+    page_width = landscape(A4)[0] - 40  # usable width after margins
+    col_widths = [page_width / col_count] * col_count
+    first = True
+    while True:
+        page = [[_safe_str(v) for v in row] for row in islice(rows, PDF_ROWS_PER_PAGE)]
+        if not page and not first:
+            return
+        first = False
+        t = Table([columns] + page, colWidths=col_widths, repeatRows=1)
+        t.setStyle(_PDF_TABLE_STYLE)
+        yield t
+        if len(page) < PDF_ROWS_PER_PAGE:
+            return
+
+
+def write_pdf(
+    title: str,
+    columns: list[str],
+    rows: Iterable[Iterable[Any]],
+    fileobj: IO[bytes],
+) -> None:
+    """Render a landscape A4 table report to *fileobj*.
+
+    Rows are laid out as one Table per PDF_ROWS_PER_PAGE rows (each with its own
+    header) rather than one Table of every row: reportlab measures and splits a
+    table as a whole, which costs memory and time proportional to the full row
+    count on every page break. The tables are built while the document is laid
+    out, so *rows* is read one page at a time; what still grows with the row
+    count is the finished pages' content, which reportlab holds until it writes
+    the file (~11 KB per page).
+    """
     doc = SimpleDocTemplate(
-        buf,
+        fileobj,
         pagesize=landscape(A4),
         topMargin=30,
         bottomMargin=20,
@@ -63,32 +196,57 @@ def build_pdf(title: str, columns: list[str], rows: list[list[Any]]) -> BytesIO:
         rightMargin=20,
     )
     styles = getSampleStyleSheet()
-    elements: list[Any] = [Paragraph(title, styles["Title"])]
+    title_para = Paragraph(title, styles["Title"])
+    doc.build(_FlowableStream(chain([title_para], _pdf_tables(columns, iter(rows)))))
 
-    data = [columns] + [[_safe_str(v) for v in row] for row in rows]
-    col_count = len(columns)
-    page_width = landscape(A4)[0] - 40  # usable width after margins
-    col_width = page_width / col_count
 
-    t = Table(data, colWidths=[col_width] * col_count, repeatRows=1)
+def build_pdf(title: str, columns: list[str], rows: Iterable[Iterable[Any]]) -> BytesIO:
+    buf = BytesIO()
+    write_pdf(title, columns, rows, buf)
+    buf.seek(0)
+    return buf
+
+
+QR_SHEET_COLUMNS = 3
+_QR_SHEET_IMAGE_SIZE = 50 * mm
+
+
+def build_qr_sheet_pdf(title: str, cards: list[tuple[str, str, bytes]]) -> bytes:
+    """Printable A4 grid of QR cards — (name, caption, png_bytes) each — built in
+    a single document pass; the grid breaks across pages between rows. Text is
+    plain: it is escaped here, since Paragraph parses its input as markup."""
+    buf = BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=A4, topMargin=30, bottomMargin=20, leftMargin=20, rightMargin=20)
+    styles = getSampleStyleSheet()
+    name_style = styles["Heading4"]
+    name_style.alignment = 1
+    caption_style = styles["Normal"]
+    caption_style.alignment = 1
+
+    cells = [
+        [
+            Image(BytesIO(png), width=_QR_SHEET_IMAGE_SIZE, height=_QR_SHEET_IMAGE_SIZE),
+            Paragraph(escape(name), name_style),
+            Paragraph(escape(caption), caption_style),
+        ]
+        for name, caption, png in cards
+    ]
+    grid = [cells[i:i + QR_SHEET_COLUMNS] for i in range(0, len(cells), QR_SHEET_COLUMNS)]
+    grid[-1] += [""] * (QR_SHEET_COLUMNS - len(grid[-1]))
+
+    col_width = (A4[0] - 40) / QR_SHEET_COLUMNS
+    t = Table(grid, colWidths=[col_width] * QR_SHEET_COLUMNS)
     t.setStyle(
         TableStyle(
             [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#00695C")),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, -1), 8),
-                ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#F0F8F6")]),
-                ("GRID", (0, 0), (-1, -1), 0.4, colors.HexColor("#CCCCCC")),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("TOPPADDING", (0, 0), (-1, -1), 5),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 5),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                ("VALIGN", (0, 0), (-1, -1), "TOP"),
+                ("BOX", (0, 0), (-1, -1), 0.4, colors.HexColor("#CCCCCC")),
+                ("INNERGRID", (0, 0), (-1, -1), 0.4, colors.HexColor("#CCCCCC")),
+                ("TOPPADDING", (0, 0), (-1, -1), 10),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 10),
             ]
         )
     )
-    elements.append(t)
-    doc.build(elements)
-    buf.seek(0)
-    return buf
+    doc.build([Paragraph(escape(title), styles["Title"]), t])
+    return buf.getvalue()
@@ -0,0 +1,70 @@
+"""
+JobMetrics — run counts and timings for the APScheduler jobs in main.py.
+
+Jobs are registered wrapped with job_metrics.timed(name, fn); each run records
+its duration and outcome. The jobs catch and log their own exceptions, so they
+report the outcome by returning False on failure; an exception that escapes
+counts as a failure too. A run slower than warn_after_seconds is logged, so a
+minute job creeping towards its interval shows up before runs start overlapping.
+Read with snapshot(); durations are also exported as a /metrics histogram.
+Runs can be profiled (PROFILE_JOBS / PROFILE_SLOW_JOB_SECONDS, app.core.profiling).
+"""
+import functools
+import logging
+import threading
+import time as _time
+from typing import Callable, Dict, Optional
+
+from app.core.metrics import JOB_BUCKETS, metrics
+from app.core.profiling import profile_job
+
+logger = logging.getLogger(__name__)
+
+scheduler_job_seconds = metrics.histogram(
+    "scheduler_job_duration_seconds", "APScheduler job run time.", ("job", "outcome"), JOB_BUCKETS,
+)
+
+
+class JobMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def timed(
+        self, name: str, fn: Callable[[], Optional[bool]], warn_after_seconds: Optional[float] = None
+    ) -> Callable[[], None]:
+        @functools.wraps(fn)
+        def run() -> None:
+            started = _time.perf_counter()
+            ok = False
+            try:
+                with profile_job(name):
+                    ok = fn() is not False
+            finally:
+                elapsed = _time.perf_counter() - started
+                self.record(name, elapsed, ok)
+                if warn_after_seconds is not None and elapsed > warn_after_seconds:
+                    logger.warning("Job %s took %.1fs (warn threshold %.0fs)", name, elapsed, warn_after_seconds)
+        return run
+
+    def record(self, name: str, seconds: float, ok: bool) -> None:
+        scheduler_job_seconds.observe(seconds, name, "ok" if ok else "error")
+        with self._lock:
+            stats = self._stats.setdefault(name, {
+                "runs": 0, "failures": 0, "total_seconds": 0.0, "max_seconds": 0.0, "last_seconds": 0.0,
+                "last_run_at": 0.0,
+            })
+            stats["runs"] += 1
+            stats["failures"] += 0 if ok else 1
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            stats["last_seconds"] = seconds
+            stats["last_run_at"] = _time.time()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+# Global singleton
+job_metrics = JobMetrics()
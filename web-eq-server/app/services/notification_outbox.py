@@ -0,0 +1,249 @@
+"""
+NotificationOutbox — takes notification persistence and delivery off the request path.
+
+Triggers enqueue a NotificationIntent and return immediately. A single background
+worker (started in main.lifespan) drains the queue in batches: one executemany
+INSERT ... RETURNING per batch via NotificationService.create_many, run in a
+worker thread, then a live push per row through NotificationManager on the loop. A failed batch is retried with
+exponential backoff; intents that exhaust NOTIFICATION_OUTBOX_MAX_ATTEMPTS are
+dropped and counted. Counters are exposed via metrics().
+
+Code running outside the event loop (the APScheduler thread) hands intents over
+with enqueue_threadsafe(), so its notifications are pushed live as well.
+
+The queue is in-process: intents still pending at shutdown are flushed by
+stop(), but a hard crash loses them. Notifications are informational, so that is
+the trade-off for keeping queue actions free of notification I/O.
+"""
+import asyncio
+import logging
+import time as _time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from app.core.config import (
+    NOTIFICATION_OUTBOX_BATCH_SIZE,
+    NOTIFICATION_OUTBOX_FLUSH_MS,
+    NOTIFICATION_OUTBOX_MAX_ATTEMPTS,
+)
+from app.db.database import SessionLocal
+from app.services.notification_service import NotificationService
+from app.services.realtime.notification_manager import notification_manager
+
+logger = logging.getLogger(__name__)
+
+_RETRY_BASE_SECONDS = 0.5
+_RETRY_MAX_SECONDS = 30.0
+
+
+@dataclass(slots=True)
+class NotificationIntent:
+    user_id: UUID
+    type: str
+    title: str
+    body: str
+    data: Optional[dict] = None
+    attempts: int = 0
+
+    def to_row(self) -> dict:
+        return {"user_id": self.user_id, "type": self.type, "title": self.title, "body": self.body, "data": self.data}
+
+
+def _row_to_dict(notif) -> dict:
+    """Serialise a Notification ORM row to a plain dict for WS push."""
+    return {
+        "uuid": str(notif.uuid),
+        "user_id": str(notif.user_id),
+        "type": notif.type,
+        "title": notif.title,
+        "body": notif.body,
+        "data": notif.data,
+        "is_read": notif.is_read,
+        "created_at": notif.created_at.isoformat() if notif.created_at else None,
+    }
+
+
+class NotificationOutbox:
+    def __init__(
+        self,
+        batch_size: int = NOTIFICATION_OUTBOX_BATCH_SIZE,
+        flush_ms: int = NOTIFICATION_OUTBOX_FLUSH_MS,
+        max_attempts: int = NOTIFICATION_OUTBOX_MAX_ATTEMPTS,
+    ) -> None:
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = max(0, flush_ms) / 1000
+        self.max_attempts = max(1, max_attempts)
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._counters: Dict[str, int] = {
+            "enqueued": 0,
+            "persisted": 0,
+            "pushed": 0,
+            "push_failed": 0,
+            "batches": 0,
+            "batch_failures": 0,
+            "retried": 0,
+            "dropped": 0,
+        }
+        self._last_batch_ms = 0.0
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Start the worker on the running event loop (idempotent)."""
+        if self._task is not None and not self._task.done():
+            return
+        self._queue = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+        self._task = asyncio.create_task(self._run(), name="notification-outbox")
+        logger.info(
+            "Notification outbox started (batch=%d flush=%.0fms attempts=%d)",
+            self.batch_size, self.flush_seconds * 1000, self.max_attempts,
+        )
+
+    async def stop(self) -> None:
+        """Stop the worker and flush whatever is still queued."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._loop = None
+        pending: List[NotificationIntent] = []
+        while self._queue is not None and not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for start in range(0, len(pending), self.batch_size):
+            await self._deliver(pending[start:start + self.batch_size], requeue=False)
+        logger.info("Notification outbox stopped (flushed %d pending)", len(pending))
+
+    # ── Producer side ────────────────────────────────────────────────────────
+
+    async def enqueue(self, intent: NotificationIntent) -> None:
+        self._counters["enqueued"] += 1
+        if self._task is None or self._queue is None:
+            # No worker (scripts, tests, before startup) — deliver inline.
+            await self._deliver([intent], requeue=False)
+            return
+        self._queue.put_nowait(intent)
+
+    def enqueue_threadsafe(self, intent: NotificationIntent) -> bool:
+        """Enqueue from a thread without an event loop. Returns False when no
+        worker is running — the caller then persists the notification itself."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return False
+        try:
+            loop.call_soon_threadsafe(self._accept, intent)
+        except RuntimeError:  # loop closed between the check and the call
+            return False
+        return True
+
+    def _accept(self, intent: NotificationIntent) -> None:
+        self._counters["enqueued"] += 1
+        if self._task is None or self._queue is None:
+            # Handed over while stop() was draining — deliver it directly.
+            asyncio.ensure_future(self._deliver([intent], requeue=False))
+            return
+        self._queue.put_nowait(intent)
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            **self._counters,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "last_batch_ms": round(self._last_batch_ms, 2),
+        }
+
+    # ── Worker ───────────────────────────────────────────────────────────────
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            batch = [await self._queue.get()]
+            deadline = _time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - _time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._deliver(batch, requeue=True)
+            except Exception:
+                logger.exception("Notification outbox worker error (batch of %d)", len(batch))
+
+    async def _deliver(self, batch: List[NotificationIntent], requeue: bool) -> None:
+        started = _time.perf_counter()
+        try:
+            # The insert and commit block, so they run off the loop; only the pushes stay on it.
+            payloads = await asyncio.to_thread(self._persist, [intent.to_row() for intent in batch])
+        except Exception:
+            self._counters["batch_failures"] += 1
+            logger.warning("Notification outbox: batch insert of %d failed", len(batch), exc_info=True)
+            failed = batch
+        else:
+            failed = None
+
+        if failed is not None:
+            if len(failed) > 1 and (not requeue or any(intent.attempts for intent in failed)):
+                # Failed again (or no retry possible): isolate a poison row, e.g. a
+                # deleted user, instead of failing the whole batch every time.
+                for intent in failed:
+                    await self._deliver([intent], requeue)
+            else:
+                self._retry_later(failed, requeue)
+            return
+
+        self._counters["batches"] += 1
+        self._counters["persisted"] += len(payloads)
+        for payload in payloads:
+            try:
+                await notification_manager.push_to_user(payload["user_id"], payload)
+                self._counters["pushed"] += 1
+            except Exception:
+                # The row is persisted — the client picks it up on its next fetch.
+                self._counters["push_failed"] += 1
+                logger.warning("Notification push failed for user %s", payload["user_id"], exc_info=True)
+        self._last_batch_ms = (_time.perf_counter() - started) * 1000
+
+    @staticmethod
+    def _persist(rows: List[dict]) -> List[dict]:
+        db = SessionLocal()
+        try:
+            return [_row_to_dict(row) for row in NotificationService(db).create_many(rows)]
+        finally:
+            db.close()
+
+    def _retry_later(self, batch: List[NotificationIntent], requeue: bool) -> None:
+        retry: List[NotificationIntent] = []
+        for intent in batch:
+            intent.attempts += 1
+            if requeue and intent.attempts < self.max_attempts:
+                retry.append(intent)
+            else:
+                self._counters["dropped"] += 1
+                logger.error(
+                    "Notification dropped after %d attempt(s): user=%s type=%s",
+                    intent.attempts, intent.user_id, intent.type,
+                )
+        if not retry:
+            return
+        self._counters["retried"] += len(retry)
+        delay = min(_RETRY_MAX_SECONDS, _RETRY_BASE_SECONDS * (2 ** (retry[0].attempts - 1)))
+        asyncio.get_running_loop().call_later(delay, self._requeue, retry)
+
+    def _requeue(self, intents: List[NotificationIntent]) -> None:
+        if self._queue is None:
+            return
+        for intent in intents:
+            self._queue.put_nowait(intent)
+
+
+# Global singleton
+notification_outbox = NotificationOutbox()
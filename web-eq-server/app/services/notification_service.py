@@ -1,19 +1,126 @@
 """
 NotificationService — DB CRUD for the notifications table.
 All queries are scoped to user_id.
+
+Unread counts are served from an in-process per-user counter (UnreadCounters),
+kept in step by create / create_many / mark_read / mark_all_read and reconciled
+periodically by the scheduler — the bell badge and /ws/notifications no longer
+COUNT on every call. Those writes also publish the user on Redis so the other
+workers drop their cached count (app.services.unread_invalidation).
+
+Lists page by keyset (created_at, uuid) when the client sends a cursor, so deep
+pages cost the same as the first. Old read rows are moved out of the table in
+chunks by purge_read_before (nightly retention job).
 """
+import base64
 import logging
-from typing import List, Optional, Tuple
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
 from uuid import UUID
 
 from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select, tuple_
 from sqlalchemy.orm import Session
 
-from app.models.notification import Notification
+from app.core.config import UNREAD_COUNTER_CACHE_SIZE
+from app.models.notification import Notification, NotificationArchive
+from app.services.unread_invalidation import unread_invalidation
 
 logger = logging.getLogger(__name__)
 
 
+class UnreadCounters:
+    """Thread-safe LRU of user_id -> unread count.
+
+    Only users whose count was loaded are tracked; mutations for other users are
+    no-ops (their next read does the COUNT). Every mutation bumps a per-user
+    generation so a COUNT that raced with a write is not stored.
+    """
+
+    def __init__(self, max_users: int) -> None:
+        self.max_users = max(1, max_users)
+        self._counts: "OrderedDict[UUID, int]" = OrderedDict()
+        self._generation: Dict[UUID, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: UUID) -> Tuple[Optional[int], int]:
+        """Return (count or None, generation to pass back to store())."""
+        with self._lock:
+            count = self._counts.get(user_id)
+            if count is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._counts.move_to_end(user_id)
+            return count, self._generation.get(user_id, 0)
+
+    def store(self, user_id: UUID, count: int, generation: int) -> bool:
+        """Cache *count* unless the user changed since *generation*. Returns True
+        when a previously cached value was corrected."""
+        with self._lock:
+            if self._generation.get(user_id, 0) != generation:
+                return False  # a write landed while counting — let the next read recount
+            corrected = self._counts.get(user_id, count) != count
+            self._counts[user_id] = count
+            self._counts.move_to_end(user_id)
+            while len(self._counts) > self.max_users:
+                evicted, _ = self._counts.popitem(last=False)
+                self._generation.pop(evicted, None)
+            return corrected
+
+    def add(self, user_id: UUID, delta: int) -> None:
+        with self._lock:
+            self._bump(user_id)
+            if user_id in self._counts:
+                self._counts[user_id] = max(0, self._counts[user_id] + delta)
+
+    def invalidate(self, user_id: UUID) -> None:
+        with self._lock:
+            self._bump(user_id)
+            self._counts.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            for user_id in self._counts:
+                self._generation[user_id] = self._generation.get(user_id, 0) + 1
+            self._counts.clear()
+
+    def _bump(self, user_id: UUID) -> None:
+        self._generation[user_id] = self._generation.get(user_id, 0) + 1
+        if len(self._generation) > 2 * self.max_users:
+            # Forget generations of untracked users; reconciliation covers the rare stale store.
+            self._generation = {uid: g for uid, g in self._generation.items() if uid in self._counts}
+
+    def tracked_users(self) -> List[UUID]:
+        with self._lock:
+            return list(self._counts)
+
+    def snapshot_generations(self, user_ids: Iterable[UUID]) -> Dict[UUID, int]:
+        with self._lock:
+            return {uid: self._generation.get(uid, 0) for uid in user_ids}
+
+
+unread_counters = UnreadCounters(UNREAD_COUNTER_CACHE_SIZE)
+
+
+def encode_notification_cursor(notif: Notification) -> str:
+    """Opaque, URL-safe keyset cursor pointing just past *notif* in newest-first order."""
+    raw = f"{notif.created_at.isoformat()}|{notif.uuid}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_notification_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        created_at, uuid = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(uuid)
+    except ValueError:
+        raise HTTPException(status_code=400, detail={"message": "Invalid pagination cursor."})
+
+
 class NotificationService:
     def __init__(self, db: Session) -> None:
         self.db = db
@@ -39,26 +146,62 @@ class NotificationService:
             self.db.add(notif)
             self.db.commit()
             self.db.refresh(notif)
+            unread_counters.add(user_id, 1)
+            unread_invalidation.publish([user_id])
             return notif
         except Exception:
             self.db.rollback()
             logger.exception("Failed to create notification (user_id=%s type=%s)", user_id, type)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
+    def create_many(self, items: List[dict]) -> List[Notification]:
+        """Insert many notifications in one executemany round trip (used by the outbox).
+
+        *items* are dicts with user_id, type, title, body, data. Rows come back in
+        input order. Errors propagate so the caller can retry the batch.
+        """
+        if not items:
+            return []
+        try:
+            rows = self.db.scalars(
+                insert(Notification).returning(Notification, sort_by_parameter_order=True),
+                [{**item, "is_read": False} for item in items],
+            ).all()
+            self.db.commit()
+            created_per_user = Counter(item["user_id"] for item in items)
+            for user_id, created in created_per_user.items():
+                unread_counters.add(user_id, created)
+            unread_invalidation.publish(created_per_user)
+            return list(rows)
+        except Exception:
+            self.db.rollback()
+            raise
+
     def get_for_user(
         self,
         user_id: UUID,
         limit: int = 20,
         offset: int = 0,
+        cursor: Optional[str] = None,
     ) -> Tuple[List[Notification], int]:
-        """Return (rows, total_count) ordered newest-first."""
+        """Return (rows, total_count) ordered newest-first.
+
+        With *cursor* (from encode_notification_cursor) the page starts right after
+        that row and *offset* is ignored — an index range scan on
+        ix_notifications_user_created instead of skipping offset rows.
+        """
+        after = decode_notification_cursor(cursor) if cursor else None
         try:
             base_q = self.db.query(Notification).filter(Notification.user_id == user_id)
             total = base_q.count()
+            page_q = base_q
+            if after is not None:
+                page_q = page_q.filter(tuple_(Notification.created_at, Notification.uuid) < after)
+            else:
+                page_q = page_q.offset(offset)
             rows = (
-                base_q
-                .order_by(Notification.created_at.desc())
-                .offset(offset)
+                page_q
+                .order_by(Notification.created_at.desc(), Notification.uuid.desc())
                 .limit(limit)
                 .all()
             )
@@ -68,8 +211,11 @@ class NotificationService:
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
     def get_unread_count(self, user_id: UUID) -> int:
+        cached, generation = unread_counters.get(user_id)
+        if cached is not None:
+            return cached
         try:
-            return (
+            count = (
                 self.db.query(Notification)
                 .filter(Notification.user_id == user_id, Notification.is_read == False)  # noqa: E712
                 .count()
@@ -77,6 +223,66 @@ class NotificationService:
         except Exception:
             logger.exception("Failed to get_unread_count (user_id=%s)", user_id)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+        unread_counters.store(user_id, count, generation)
+        return count
+
+    def reconcile_unread_counts(self) -> int:
+        """Recount every tracked user in one grouped query (index-only on
+        ix_notifications_user_unread). Returns how many cached counts were wrong."""
+        user_ids = unread_counters.tracked_users()
+        if not user_ids:
+            return 0
+        generations = unread_counters.snapshot_generations(user_ids)
+        try:
+            rows = (
+                self.db.query(Notification.user_id, func.count())
+                .filter(Notification.user_id.in_(user_ids), Notification.is_read == False)  # noqa: E712
+                .group_by(Notification.user_id)
+                .all()
+            )
+        except Exception:
+            logger.exception("Failed to reconcile_unread_counts (%d users)", len(user_ids))
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+        actual = {uid: int(n) for uid, n in rows}
+        return sum(
+            unread_counters.store(uid, actual.get(uid, 0), generations[uid]) for uid in user_ids
+        )
+
+    def purge_read_before(self, cutoff: datetime, batch_size: int, archive: bool = True) -> int:
+        """Remove read notifications created before *cutoff*, oldest first, in
+        chunks of *batch_size* (one short transaction each, rows being read by
+        someone else are skipped). With *archive* the rows are copied to
+        notifications_archive in the same statement. Returns rows removed.
+
+        Unread rows are never touched, so the cached unread counters stay valid.
+        """
+        columns = [c.name for c in Notification.__table__.columns]
+        removed = 0
+        while True:
+            chunk = (
+                select(Notification.uuid)
+                .where(Notification.is_read == True, Notification.created_at < cutoff)  # noqa: E712
+                .order_by(Notification.created_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            purge = delete(Notification).where(Notification.uuid.in_(chunk))
+            if archive:
+                moved = purge.returning(*Notification.__table__.columns).cte("moved")
+                stmt = insert(NotificationArchive).from_select(columns, select(*(moved.c[c] for c in columns)))
+            else:
+                stmt = purge
+            try:
+                count = self.db.execute(stmt).rowcount
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                logger.exception("Failed to purge read notifications (cutoff=%s, removed so far=%d)", cutoff, removed)
+                raise
+            removed += count
+            if count < batch_size:
+                return removed
 
     def mark_read(self, notification_id: UUID, user_id: UUID) -> Optional[Notification]:
         """Mark a single notification as read (scoped to user_id for safety)."""
@@ -95,6 +301,8 @@ class NotificationService:
                 notif.is_read = True  # type: ignore[assignment]
                 self.db.commit()
                 self.db.refresh(notif)
+                unread_counters.add(user_id, -1)
+                unread_invalidation.publish([user_id])
             return notif
         except HTTPException:
             raise
@@ -115,6 +323,8 @@ class NotificationService:
                 .update({"is_read": True}, synchronize_session=False)
             )
             self.db.commit()
+            unread_counters.invalidate(user_id)
+            unread_invalidation.publish([user_id])
             return updated
         except Exception:
             self.db.rollback()
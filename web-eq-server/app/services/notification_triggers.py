@@ -1,8 +1,9 @@
 """
 Notification trigger helpers.
 
-Each function persists a Notification row and pushes it live via WebSocket.
-All are async and must be called inside try/except in the controller so that
+Each async function hands a notification intent to the outbox, which persists
+it in a batch and pushes it live via WebSocket in the background — queue actions
+never wait on notification I/O. Call inside try/except in the controller so that
 notification failures never block a booking or queue operation.
 """
 import logging
@@ -22,42 +23,26 @@ from app.core.constants import (
     NOTIF_SKIPPED,
 )
 from app.services.notification_service import NotificationService
-from app.services.realtime.notification_manager import notification_manager
+from app.services.notification_outbox import NotificationIntent, notification_outbox
 
 logger = logging.getLogger(__name__)
 
 
-def _row_to_dict(notif) -> dict:
-    """Serialise a Notification ORM row to a plain dict for WS push."""
-    return {
-        "uuid": str(notif.uuid),
-        "user_id": str(notif.user_id),
-        "type": notif.type,
-        "title": notif.title,
-        "body": notif.body,
-        "data": notif.data,
-        "is_read": notif.is_read,
-        "created_at": notif.created_at.isoformat() if notif.created_at else None,
-    }
-
-
-async def _persist_and_push(
-    db: Session,
+async def _enqueue(
     user_id: UUID,
     type: str,
     title: str,
     body: str,
     data: Optional[dict] = None,
 ) -> None:
-    svc = NotificationService(db)
-    notif = svc.create(user_id=user_id, type=type, title=title, body=body, data=data)
-    await notification_manager.push_to_user(str(user_id), _row_to_dict(notif))
+    await notification_outbox.enqueue(
+        NotificationIntent(user_id=user_id, type=type, title=title, body=body, data=data)
+    )
 
 
 # ─── Public trigger functions ─────────────────────────────────────────────────
 
 async def notify_booking_confirmed(
-    db: Session,
     user_id: UUID,
     token_number: str,
     wait_minutes: int,
@@ -66,8 +51,7 @@ async def notify_booking_confirmed(
 ) -> None:
     """BOOKING_CONFIRMED → customer who just booked."""
     wait_text = f"{wait_minutes} min" if wait_minutes else "a few minutes"
-    await _persist_and_push(
-        db=db,
+    await _enqueue(
         user_id=user_id,
         type=NOTIF_BOOKING_CONFIRMED,
         title="Booking Confirmed",
@@ -82,7 +66,6 @@ async def notify_booking_confirmed(
 
 
 async def notify_new_customer(
-    db: Session,
     business_owner_id: UUID,
     employee_user_id: Optional[UUID],
     token_number: str,
@@ -93,23 +76,21 @@ async def notify_new_customer(
     body = f"Token #{token_number} has joined{' ' + queue_name if queue_name else ' the queue'}."
     data = {"token_number": token_number, "queue_name": queue_name}
 
-    await _persist_and_push(db=db, user_id=business_owner_id, type=NOTIF_NEW_CUSTOMER,
-                            title=title, body=body, data=data)
+    await _enqueue(user_id=business_owner_id, type=NOTIF_NEW_CUSTOMER,
+                   title=title, body=body, data=data)
 
     if employee_user_id and employee_user_id != business_owner_id:
-        await _persist_and_push(db=db, user_id=employee_user_id, type=NOTIF_NEW_CUSTOMER,
-                                title=title, body=body, data=data)
+        await _enqueue(user_id=employee_user_id, type=NOTIF_NEW_CUSTOMER,
+                       title=title, body=body, data=data)
 
 
 async def notify_in_service(
-    db: Session,
     user_id: UUID,
     token_number: str,
     queue_name: str = "",
 ) -> None:
     """IN_SERVICE → customer who just started being served."""
-    await _persist_and_push(
-        db=db,
+    await _enqueue(
         user_id=user_id,
         type=NOTIF_IN_SERVICE,
         title="You're Being Served",
@@ -119,14 +100,12 @@ async def notify_in_service(
 
 
 async def notify_called_next(
-    db: Session,
     user_id: UUID,
     token_number: str,
     queue_name: str = "",
 ) -> None:
     """CALLED_NEXT → customer who just moved to position 1 in the waiting list."""
-    await _persist_and_push(
-        db=db,
+    await _enqueue(
         user_id=user_id,
         type=NOTIF_CALLED_NEXT,
         title="You're Next!",
@@ -136,14 +115,12 @@ async def notify_called_next(
 
 
 async def notify_service_completed(
-    db: Session,
     user_id: UUID,
     token_number: str,
     queue_name: str = "",
 ) -> None:
     """SERVICE_COMPLETED → customer whose service just finished."""
-    await _persist_and_push(
-        db=db,
+    await _enqueue(
         user_id=user_id,
         type=NOTIF_SERVICE_COMPLETED,
         title="Service Complete",
@@ -153,14 +130,12 @@ async def notify_service_completed(
 
 
 async def notify_no_show(
-    db: Session,
     user_id: UUID,
     token_number: str,
     queue_name: str = "",
 ) -> None:
     """NO_SHOW → customer marked absent and removed from the queue."""
-    await _persist_and_push(
-        db=db,
+    await _enqueue(
         user_id=user_id,
         type=NOTIF_NO_SHOW,
         title="Marked as No Show",
@@ -170,14 +145,12 @@ async def notify_no_show(
 
 
 async def notify_skipped(
-    db: Session,
     user_id: UUID,
     token_number: str,
     queue_name: str = "",
 ) -> None:
     """SKIPPED → customer moved to the back of the queue."""
-    await _persist_and_push(
-        db=db,
+    await _enqueue(
         user_id=user_id,
         type=NOTIF_SKIPPED,
         title="Moved to Back of Queue",
@@ -195,11 +168,14 @@ def notify_heading_now_sync(
     queue_name: str = "",
     wait_minutes: int = 0,
 ) -> None:
-    """HEADING_NOW — persists DB notification only (called from sync scheduler)."""
+    """HEADING_NOW — called from the sync scheduler thread.
+
+    Handed to the outbox on the app loop so it is persisted and pushed live; if
+    the outbox is not running (scripts, shutdown) it is only persisted via *db*.
+    """
     try:
         wait_text = f"~{wait_minutes} min" if wait_minutes else "soon"
-        svc = NotificationService(db)
-        svc.create(
+        intent = NotificationIntent(
             user_id=user_id,
             type=NOTIF_HEADING_NOW,
             title="Time to Head Out!",
@@ -209,5 +185,7 @@ def notify_heading_now_sync(
             ),
             data={"token_number": token_number, "queue_name": queue_name, "wait_minutes": wait_minutes},
         )
+        if not notification_outbox.enqueue_threadsafe(intent):
+            NotificationService(db).create(**intent.to_row())
     except Exception:
         logger.exception("notify_heading_now_sync failed for user_id=%s", user_id)
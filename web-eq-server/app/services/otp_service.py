@@ -1,4 +1,5 @@
 import logging
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from datetime import datetime
@@ -66,3 +67,21 @@ class OTPService:
             self.db.rollback()
             logger.exception("Failed to mark_otp_used (record_id=%s)", getattr(otp_record, "uuid", None))
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
+    def purge_expired(self, before: datetime, batch_size: int = 5000) -> int:
+        """Delete user_logins rows that expired before *before*, in chunks. The table
+        is only written while Redis is down, so this drains the legacy backlog and
+        keeps idx_phone_lookup small. Returns rows deleted."""
+        removed = 0
+        while True:
+            chunk = select(UserLogin.uuid).where(UserLogin.expires_at < before).limit(batch_size).scalar_subquery()
+            try:
+                count = self.db.execute(delete(UserLogin).where(UserLogin.uuid.in_(chunk))).rowcount
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                logger.exception("Failed to purge_expired user_logins (before=%s, removed so far=%d)", before, removed)
+                raise
+            removed += count
+            if count < batch_size:
+                return removed
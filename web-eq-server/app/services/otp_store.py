@@ -0,0 +1,142 @@
+"""
+OtpStore — OTP issue / verify / rate limiting in Redis, with user_logins as the fallback.
+
+* otp:{country_code}{phone}     hash {hash, expires_at, used}, TTL = OTP expiry + a
+                                grace period so "expired" and "already used" stay
+                                distinguishable from "not found".
+* otp_sends:{country_code}{phone}  sorted set of send timestamps — sliding one-hour
+                                window for RATE_LIMIT_PER_HOUR.
+
+Both checks are single Lua calls, so concurrent requests for one phone cannot
+race past the limit or consume an OTP twice. When Redis is unavailable the
+previous Postgres path (OTPService) is used; a Redis miss also checks Postgres
+so an OTP issued during an outage still verifies afterwards.
+"""
+import logging
+import time as _time
+import uuid
+from datetime import timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import OTP_EXPIRY_MINUTES, RATE_LIMIT_PER_HOUR
+from app.core.utils import now_utc
+from app.schemas.auth import OTPVerifyErrorCode
+from app.services.otp_service import OTPService
+from app.services.realtime.queue_manager import queue_manager
+
+logger = logging.getLogger(__name__)
+
+_RATE_WINDOW_SECONDS = 3600
+_GRACE_SECONDS = 600
+
+# KEYS[1] send log; ARGV: now, window, limit, member. Returns 1 if allowed (and recorded).
+_ALLOW_SEND = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then return 0 end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# KEYS[1] otp hash; ARGV: otp_hash, now. Returns 0 ok, else an OTPVerifyErrorCode value.
+_CONSUME = """
+local stored = redis.call('HMGET', KEYS[1], 'hash', 'expires_at', 'used')
+if not stored[1] then return 1 end
+if stored[3] == '1' then return 4 end
+if tonumber(stored[2]) < tonumber(ARGV[2]) then return 2 end
+if stored[1] ~= ARGV[1] then return 3 end
+redis.call('HSET', KEYS[1], 'used', '1')
+return 0
+"""
+
+
+def _otp_key(country_code: str, phone_number: str) -> str:
+    return f"otp:{country_code}{phone_number}"
+
+
+def _sends_key(country_code: str, phone_number: str) -> str:
+    return f"otp_sends:{country_code}{phone_number}"
+
+
+class OtpStore:
+    def __init__(self, db: Session) -> None:
+        self.otp_service = OTPService(db)
+
+    async def _redis(self) -> Any:
+        await queue_manager.connect_to_redis()
+        return queue_manager.redis
+
+    async def allow_send(self, country_code: str, phone_number: str) -> bool:
+        """Record a send attempt if the phone is under RATE_LIMIT_PER_HOUR."""
+        redis = await self._redis()
+        if redis is not None:
+            try:
+                now = _time.time()
+                allowed = await redis.eval(
+                    _ALLOW_SEND, 1, _sends_key(country_code, phone_number),
+                    now, _RATE_WINDOW_SECONDS, RATE_LIMIT_PER_HOUR, f"{now}:{uuid.uuid4().hex[:8]}",
+                )
+                return bool(int(allowed))
+            except Exception:
+                logger.warning("OTP rate limit: Redis failed, using user_logins", exc_info=True)
+        since = now_utc() - timedelta(hours=1)
+        return self.otp_service.get_recent_otp_attempts(country_code, phone_number, since) < RATE_LIMIT_PER_HOUR
+
+    async def save(self, country_code: str, phone_number: str, otp_hash: str) -> None:
+        expires_at = now_utc() + timedelta(minutes=OTP_EXPIRY_MINUTES)
+        redis = await self._redis()
+        if redis is not None:
+            try:
+                key = _otp_key(country_code, phone_number)
+                async with redis.pipeline(transaction=True) as pipe:
+                    pipe.delete(key)
+                    pipe.hset(key, mapping={"hash": otp_hash, "expires_at": expires_at.timestamp(), "used": "0"})
+                    pipe.expire(key, OTP_EXPIRY_MINUTES * 60 + _GRACE_SECONDS)
+                    await pipe.execute()
+                return
+            except Exception:
+                logger.warning("OTP store: Redis failed, writing to user_logins", exc_info=True)
+        self.otp_service.create_otp_entry(
+            country_code=country_code,
+            phone_number=phone_number,
+            otp_hash=otp_hash,
+            expires_at=expires_at,
+            attempts=1,
+            status=1,
+        )
+
+    async def consume(self, country_code: str, phone_number: str, otp_hash: str) -> Optional[OTPVerifyErrorCode]:
+        """Mark the latest OTP used if *otp_hash* matches. Returns None on success,
+        otherwise the reason it was rejected."""
+        redis = await self._redis()
+        if redis is not None:
+            try:
+                result = int(await redis.eval(
+                    _CONSUME, 1, _otp_key(country_code, phone_number), otp_hash, now_utc().timestamp()
+                ))
+                if result == 0:
+                    return None
+                if result != OTPVerifyErrorCode.OTP_NOT_FOUND.value:
+                    return OTPVerifyErrorCode(result)
+            except Exception:
+                logger.warning("OTP verify: Redis failed, using user_logins", exc_info=True)
+        return self._consume_from_db(country_code, phone_number, otp_hash)
+
+    def _consume_from_db(self, country_code: str, phone_number: str, otp_hash: str) -> Optional[OTPVerifyErrorCode]:
+        otp_record = self.otp_service.get_latest_otp(country_code, phone_number)
+        if not otp_record:
+            return OTPVerifyErrorCode.OTP_NOT_FOUND
+        if int(otp_record.status) == 2:  # type: ignore[arg-type]
+            return OTPVerifyErrorCode.OTP_ALREADY_USED
+        expires_at = otp_record.expires_at
+        if expires_at is not None:
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            if expires_at < now_utc():
+                return OTPVerifyErrorCode.OTP_EXPIRED
+        if str(otp_record.otp_hash) != otp_hash:
+            return OTPVerifyErrorCode.OTP_INVALID
+        self.otp_service.mark_otp_used(otp_record)
+        return None
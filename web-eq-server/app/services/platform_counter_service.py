@@ -0,0 +1,214 @@
+"""
+PlatformCounterService — O(1) row counts for the admin dashboard.
+
+Statement-level AFTER triggers on users, businesses, categories, services,
+queues and queue_users add the number of inserted / deleted rows (and, for
+active_businesses, the change in rows with status ACTIVE) to one random shard
+of platform_counters in the same transaction as the write, so the counters are
+exact and cover ORM, Core and raw-SQL writers alike. Reading a counter is a sum
+over PLATFORM_COUNTER_SHARDS rows.
+
+reconcile() recounts each table nightly and overwrites the shards; the drift it
+reports should be zero unless rows changed with triggers disabled (TRUNCATE,
+restores, session_replication_role=replica).
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.constants import BUSINESS_ACTIVE, PLATFORM_COUNTER_SHARDS
+from app.models.business import Business
+from app.models.category import Category
+from app.models.platform_counter import PlatformCounter
+from app.models.queue import Queue, QueueUser
+from app.models.service import Service
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# counter name -> (table, extra filter)
+PLATFORM_COUNTERS: Dict[str, Tuple[Any, Any]] = {
+    "users": (User, None),
+    "businesses": (Business, None),
+    "active_businesses": (Business, Business.status == BUSINESS_ACTIVE),
+    "categories": (Category, None),
+    "services": (Service, None),
+    "queues": (Queue, None),
+    "queue_users": (QueueUser, None),
+}
+
+_INSTALL_LOCK_ID = 730125062
+
+_FUNCTIONS = f"""
+CREATE OR REPLACE FUNCTION platform_counter_add(counter text, delta bigint) RETURNS void AS $$
+BEGIN
+    IF delta <> 0 THEN
+        INSERT INTO platform_counters (name, shard, value, created_at, updated_at)
+        VALUES (counter, floor(random() * {PLATFORM_COUNTER_SHARDS})::int, delta, now(), now())
+        ON CONFLICT (name, shard) DO UPDATE
+            SET value = platform_counters.value + EXCLUDED.value, updated_at = now();
+    END IF;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION platform_counter_rows() RETURNS trigger AS $$
+DECLARE delta bigint;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT count(*) INTO delta FROM new_rows;
+    ELSE
+        SELECT -count(*) INTO delta FROM old_rows;
+    END IF;
+    PERFORM platform_counter_add(TG_ARGV[0], delta);
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION platform_counter_active_businesses() RETURNS trigger AS $$
+DECLARE delta bigint := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT delta + count(*) INTO delta FROM new_rows WHERE status = {BUSINESS_ACTIVE};
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT delta - count(*) INTO delta FROM old_rows WHERE status = {BUSINESS_ACTIVE};
+    END IF;
+    PERFORM platform_counter_add('active_businesses', delta);
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+"""
+
+
+def _trigger_ddl() -> Dict[str, str]:
+    ddl: Dict[str, str] = {}
+    for name, (model, criteria) in PLATFORM_COUNTERS.items():
+        if criteria is not None:
+            continue
+        table = model.__tablename__
+        ddl[f"trg_platform_counter_{table}_ins"] = (
+            f"CREATE TRIGGER trg_platform_counter_{table}_ins AFTER INSERT ON {table} "
+            f"REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT "
+            f"EXECUTE FUNCTION platform_counter_rows('{name}')"
+        )
+        ddl[f"trg_platform_counter_{table}_del"] = (
+            f"CREATE TRIGGER trg_platform_counter_{table}_del AFTER DELETE ON {table} "
+            f"REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT "
+            f"EXECUTE FUNCTION platform_counter_rows('{name}')"
+        )
+    for op, referencing in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        trigger = f"trg_platform_counter_active_businesses_{op.lower()[:3]}"
+        ddl[trigger] = (
+            f"CREATE TRIGGER {trigger} AFTER {op} ON businesses "
+            f"REFERENCING {referencing} FOR EACH STATEMENT "
+            f"EXECUTE FUNCTION platform_counter_active_businesses()"
+        )
+    return ddl
+
+
+def install_platform_counter_triggers(engine: Engine) -> None:
+    """Create the counter functions and any missing triggers. Existing triggers are
+    left alone, so a restart takes no table locks. Serialised across workers."""
+    ddl = _trigger_ddl()
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": _INSTALL_LOCK_ID})
+        conn.execute(text(_FUNCTIONS))
+        existing = set(conn.execute(
+            text("SELECT tgname FROM pg_trigger WHERE tgname LIKE 'trg_platform_counter_%'")
+        ).scalars())
+        for trigger, statement in ddl.items():
+            if trigger not in existing:
+                conn.execute(text(statement))
+                logger.info("Installed %s", trigger)
+
+
+class PlatformCounterService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_counts(self) -> Tuple[Dict[str, int], Optional[datetime]]:
+        """Every counter's value and the oldest reconciliation time (None until all
+        counters have been reconciled once). A counter that was never reconciled
+        (fresh install) is counted live instead."""
+        try:
+            rows = self.db.execute(
+                select(
+                    PlatformCounter.name,
+                    func.sum(PlatformCounter.value),
+                    func.min(PlatformCounter.reconciled_at),
+                ).group_by(PlatformCounter.name)
+            ).all()
+            counts: Dict[str, int] = {}
+            reconciled: List[datetime] = []
+            for name, value, reconciled_at in rows:
+                if name in PLATFORM_COUNTERS and reconciled_at is not None:
+                    counts[name] = int(value or 0)
+                    reconciled.append(reconciled_at)
+            for name in PLATFORM_COUNTERS:
+                if name not in counts:
+                    counts[name] = self._count(name)
+            oldest = min(reconciled) if len(reconciled) == len(PLATFORM_COUNTERS) else None
+            return counts, oldest
+        except Exception:
+            logger.exception("Failed to read platform counters")
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
+    def needs_reconcile(self) -> bool:
+        reconciled = self.db.execute(
+            select(func.count(func.distinct(PlatformCounter.name)))
+            .where(PlatformCounter.reconciled_at.isnot(None))
+        ).scalar() or 0
+        return reconciled < len(PLATFORM_COUNTERS)
+
+    def reconcile(self) -> Dict[str, int]:
+        """Recount every table and reset its counter. Returns the drift per counter
+        (actual - stored). Each counter is fixed in its own short transaction:
+        locking its shards first makes concurrent writers wait, so no delta is
+        lost or double-counted between the recount and the reset."""
+        drift: Dict[str, int] = {}
+        for name in PLATFORM_COUNTERS:
+            try:
+                self.db.execute(
+                    text(
+                        "INSERT INTO platform_counters (name, shard, value, created_at, updated_at) "
+                        "SELECT :name, g, 0, now(), now() FROM generate_series(0, :shards - 1) AS g "
+                        "ON CONFLICT (name, shard) DO NOTHING"
+                    ),
+                    {"name": name, "shards": PLATFORM_COUNTER_SHARDS},
+                )
+                self.db.commit()
+                stored = sum(self.db.execute(
+                    select(PlatformCounter.value)
+                    .where(PlatformCounter.name == name)
+                    .with_for_update()
+                ).scalars())
+                actual = self._count(name)
+                self.db.execute(
+                    text(
+                        "UPDATE platform_counters "
+                        "SET value = CASE WHEN shard = 0 THEN :actual ELSE 0 END, "
+                        "    reconciled_at = now(), updated_at = now() "
+                        "WHERE name = :name"
+                    ),
+                    {"name": name, "actual": actual},
+                )
+                self.db.commit()
+                drift[name] = actual - stored
+            except Exception:
+                self.db.rollback()
+                logger.exception("Failed to reconcile platform counter %s", name)
+                raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+        return drift
+
+    def _count(self, name: str) -> int:
+        model, criteria = PLATFORM_COUNTERS[name]
+        query = select(func.count()).select_from(model)
+        if criteria is not None:
+            query = query.where(criteria)
+        return int(self.db.execute(query).scalar() or 0)
@@ -1,15 +1,18 @@
 import logging
 import math
-from sqlalchemy import func, extract, or_, and_, select
+from sqlalchemy import Integer, func, or_, and_, select, update
 from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from fastapi import HTTPException
 from typing import List, Tuple, Dict, cast, Optional, Any
 from collections import defaultdict
 from uuid import UUID
 from datetime import datetime, date, time, timedelta
 
-from app.models.queue import Queue, QueueService as QueueServiceModel, QueueUser, QueueUserService, AppointmentSlot
+from app.models.queue import (
+    Queue, QueueService as QueueServiceModel, QueueUser, QueueUserService, AppointmentSlot, QueueTokenCounter,
+)
 from app.models.service import Service
 from app.models.employee import Employee
 from app.models.user import User
@@ -22,7 +25,8 @@ from app.schemas.queue import (
     QueueServiceAddItem,
     QueueServiceUpdate,
 )
-from app.core.utils import today_app_date, current_time_app_tz, now_app_tz, parse_time_string
+from app.core.config import QUEUE_USER_SWEEP_BATCH_SIZE
+from app.core.utils import today_app_date, current_time_app_tz, now_app_tz, parse_time_string, LiveQueueUser
 from app.core.constants import (
     QUEUE_USER_REGISTERED,
     QUEUE_USER_IN_PROGRESS,
@@ -32,6 +36,7 @@ from app.core.constants import (
     QUEUE_USER_EXPIRED,
     QUEUE_USER_SCHEDULED,
     SCHEDULED_ACTIVATION_LEAD_MINUTES,
+    TIMEZONE,
     DEFAULT_SLOT_MINUTES,
     SLOT_DURATION_FLOOR,
     SLOT_DURATION_CEILING,
@@ -39,6 +44,7 @@ from app.core.constants import (
     APPOINTMENT_TYPE_FIXED,
     APPOINTMENT_TYPE_APPROXIMATE,
 )
+from app.services.queue_stats_service import QueueStatsService
 
 logger = logging.getLogger(__name__)
 
@@ -316,6 +322,29 @@ class QueueService:
             logger.exception("Failed to get_user_upcoming_active_appointments (user_id=%s)", user_id)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
+    def get_user_active_appointments_on_date(
+        self, user_id: UUID, queue_date: date
+    ) -> List[Tuple[QueueUser, "Queue", "Business"]]:
+        """Active appointments on *queue_date* — one read serving both the duplicate and
+        the time-conflict checks of a booking."""
+        try:
+            rows = (
+                self.db.query(QueueUser, Queue, Business)
+                .join(Queue, Queue.uuid == QueueUser.queue_id)
+                .join(Business, Business.uuid == Queue.merchant_id)
+                .filter(
+                    QueueUser.user_id == user_id,
+                    QueueUser.queue_date == queue_date,
+                    QueueUser.status.in_([QUEUE_USER_REGISTERED, QUEUE_USER_IN_PROGRESS, QUEUE_USER_SCHEDULED]),
+                )
+                .order_by(QueueUser.scheduled_start.asc())
+                .all()
+            )
+            return [(qu, q, b) for qu, q, b in rows]
+        except Exception:
+            logger.exception("Failed to get_user_active_appointments_on_date (user_id=%s date=%s)", user_id, queue_date)
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
     def get_booking_at_time(
         self,
         user_id: UUID,
@@ -340,68 +369,137 @@ class QueueService:
             logger.exception("Failed to get_booking_at_time (user_id=%s date=%s)", user_id, queue_date)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
-    def activate_due_scheduled_appointments(self, today: date, now_time: time) -> int:
+    def activate_due_scheduled_appointments(
+        self,
+        today: date,
+        now_time: time,
+        queue_user_ids: Optional[List[UUID]] = None,
+    ) -> Dict[UUID, int]:
         """
         Transition SCHEDULED appointments whose slot is within the activation window
         into the live queue as REGISTERED. Sets enqueue_time = scheduled_start (IST)
         so they sort correctly among walk-ins by their slot time.
         Activates when scheduled_start <= now + SCHEDULED_ACTIVATION_LEAD_MINUTES.
+
+        queue_user_ids limits it to those rows (ActivationTimer); None is the full
+        sweep. One UPDATE ... RETURNING, so concurrent callers never activate a row
+        twice. Returns activated counts per queue_id.
         """
         try:
-            import pytz
-            tz = pytz.timezone("Asia/Kolkata")
-            from datetime import datetime as _dt, timedelta as _td
-            threshold_dt = _dt.combine(today, now_time) + _td(minutes=SCHEDULED_ACTIVATION_LEAD_MINUTES)
-            threshold_time = threshold_dt.time()
+            threshold_dt = datetime.combine(today, now_time) + timedelta(minutes=SCHEDULED_ACTIVATION_LEAD_MINUTES)
+            threshold_time = threshold_dt.time() if threshold_dt.date() == today else time.max
 
-            due = (
-                self.db.query(QueueUser)
-                .filter(
+            stmt = (
+                update(QueueUser)
+                .where(
                     QueueUser.status == QUEUE_USER_SCHEDULED,
                     QueueUser.queue_date == today,
                     QueueUser.scheduled_start.isnot(None),
                     QueueUser.scheduled_start <= threshold_time,
                 )
-                .all()
+                .values(
+                    status=QUEUE_USER_REGISTERED,
+                    enqueue_time=func.timezone(TIMEZONE, QueueUser.queue_date.op("+")(QueueUser.scheduled_start)),
+                )
+                .returning(QueueUser.queue_id)
+                .execution_options(synchronize_session=False)
             )
-            if not due:
-                return 0
-
-            for qu in due:
-                qu.status = QUEUE_USER_REGISTERED  # type: ignore[assignment]
-                slot_dt = _dt.combine(today, qu.scheduled_start)
-                qu.enqueue_time = tz.localize(slot_dt)  # type: ignore[assignment]
-
+            if queue_user_ids is not None:
+                if not queue_user_ids:
+                    return {}
+                stmt = stmt.where(QueueUser.uuid.in_(queue_user_ids))
+            activated: Dict[UUID, int] = defaultdict(int)
+            for queue_id in self.db.execute(stmt).scalars():
+                activated[queue_id] += 1
             self.db.commit()
-            return len(due)
+            return dict(activated)
         except Exception:
             self.db.rollback()
             logger.exception("Failed to activate_due_scheduled_appointments")
             raise
 
-    def expire_past_day_appointments(self, before_date: date) -> int:
+    def get_pending_scheduled_activations(self, today: date) -> List[Tuple[UUID, time]]:
+        """(queue_user_id, scheduled_start) of today's not-yet-activated SCHEDULED appointments."""
         try:
-            updated = (
-                self.db.query(QueueUser)
-                .filter(
-                    QueueUser.queue_date < before_date,
-                    QueueUser.status.in_([QUEUE_USER_REGISTERED, QUEUE_USER_IN_PROGRESS, QUEUE_USER_SCHEDULED]),
-                )
-                .update(
-                    {
-                        QueueUser.status: QUEUE_USER_EXPIRED,
-                        QueueUser.cancellation_reason: "auto_expired",
-                    },
-                    synchronize_session=False,
+            return [
+                (row.uuid, row.scheduled_start)
+                for row in self.db.query(QueueUser.uuid, QueueUser.scheduled_start).filter(
+                    QueueUser.status == QUEUE_USER_SCHEDULED,
+                    QueueUser.queue_date == today,
+                    QueueUser.scheduled_start.isnot(None),
                 )
+            ]
+        except Exception:
+            logger.exception("Failed to get_pending_scheduled_activations (date=%s)", today)
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
+    def _sweep_queue_users(self, label: str, criteria: List[Any], values: Dict[Any, Any], batch_size: int) -> int:
+        """UPDATE queue_users matching *criteria* in chunks of *batch_size*, one short
+        transaction per chunk, so a large backlog never holds row locks for the
+        whole scan. Rows locked by a live request are skipped (the next run picks
+        them up). Returns rows updated."""
+        total = 0
+        chunks = 0
+        while True:
+            chunk = (
+                select(QueueUser.uuid)
+                .where(*criteria)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
             )
+            stmt = (
+                update(QueueUser)
+                .where(QueueUser.uuid.in_(chunk))
+                .values(values)
+                .execution_options(synchronize_session=False)
+            )
+            count = self.db.execute(stmt).rowcount
             self.db.commit()
-            return updated
+            total += count
+            chunks += 1
+            if count < batch_size:
+                if chunks > 1:
+                    logger.info("%s: done, %d row(s) in %d chunk(s)", label, total, chunks)
+                return total
+            if chunks % 10 == 0:
+                logger.info("%s: %d row(s) so far", label, total)
+
+    def expire_past_day_appointments(self, before_date: date, batch_size: int = QUEUE_USER_SWEEP_BATCH_SIZE) -> int:
+        try:
+            return self._sweep_queue_users(
+                "Expiry",
+                [
+                    QueueUser.status.in_([QUEUE_USER_REGISTERED, QUEUE_USER_IN_PROGRESS, QUEUE_USER_SCHEDULED]),
+                    QueueUser.queue_date < before_date,
+                ],
+                {QueueUser.status: QUEUE_USER_EXPIRED, QueueUser.cancellation_reason: "auto_expired"},
+                batch_size,
+            )
         except Exception:
             self.db.rollback()
             logger.exception("Failed to expire_past_day_appointments (before_date=%s)", before_date)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
+    def schedule_registered_slot_appointments(self, from_date: date, batch_size: int = QUEUE_USER_SWEEP_BATCH_SIZE) -> int:
+        """Startup migration: Fixed/Approximate appointments still REGISTERED on or
+        after *from_date* become SCHEDULED. Idempotent."""
+        try:
+            return self._sweep_queue_users(
+                "Migration",
+                [
+                    QueueUser.status == QUEUE_USER_REGISTERED,
+                    QueueUser.queue_date >= from_date,
+                    QueueUser.appointment_type.in_([APPOINTMENT_TYPE_FIXED, APPOINTMENT_TYPE_APPROXIMATE]),
+                ],
+                {QueueUser.status: QUEUE_USER_SCHEDULED},
+                batch_size,
+            )
+        except Exception:
+            self.db.rollback()
+            logger.exception("Failed to schedule_registered_slot_appointments (from_date=%s)", from_date)
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
     def get_appointment_by_id_for_user(
         self, user_id: UUID, queue_user_id: UUID
     ) -> Optional[QueueUser]:
@@ -429,6 +527,7 @@ class QueueService:
         try:
             return (
                 self.db.query(QueueServiceModel)
+                .options(joinedload(QueueServiceModel.service))
                 .filter(
                     QueueServiceModel.uuid.in_(service_ids),
                     QueueServiceModel.business_id == business_id,
@@ -442,25 +541,17 @@ class QueueService:
     def get_booking_services_data(
         self, queue_services: List[QueueServiceModel]
     ) -> List[dict]:
-        if not queue_services:
-            return []
-        try:
-            service_ids = [qs.service_id for qs in queue_services]
-            services = self.db.query(Service).filter(Service.uuid.in_(service_ids)).all()
-            by_id = {s.uuid: s for s in services}
-            return [
-                {
-                    "uuid": str(qs.uuid),
-                    "name": by_id[qs.service_id].name,
-                    "price": qs.service_fee,
-                    "duration": qs.avg_service_time,
-                }
-                for qs in queue_services
-                if qs.service_id in by_id
-            ]
-        except Exception:
-            logger.exception("Failed to get_booking_services_data")
-            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+        """Services come eager-loaded from get_queue_services_for_booking — no extra query."""
+        return [
+            {
+                "uuid": str(qs.uuid),
+                "name": qs.service.name,
+                "price": qs.service_fee,
+                "duration": qs.avg_service_time,
+            }
+            for qs in queue_services
+            if qs.service is not None
+        ]
 
     def create_booking(
         self,
@@ -784,6 +875,50 @@ class QueueService:
             logger.warning("get_queue_service_avg_times failed (queue_id=%s), returning empty", queue_id)
             return []
 
+    # ─── Token counters (used by TokenAllocator on its own session) ───────────
+
+    def lease_token_block(self, queue_id: UUID, queue_date: date, size: int, floor: int = 0) -> int:
+        """Reserve the next *size* numbers atomically; returns the last number of the block.
+        The day's counter row is created above *floor* and above every token already
+        issued for the day (tokens from before the counter existed came from a plain
+        Redis INCR), so the first block never repeats them."""
+        bump = (
+            update(QueueTokenCounter)
+            .where(QueueTokenCounter.queue_id == queue_id, QueueTokenCounter.queue_date == queue_date)
+            .values(last_number=QueueTokenCounter.last_number + size, updated_at=func.now())
+            .returning(QueueTokenCounter.last_number)
+        )
+        try:
+            last = self.db.execute(bump).scalar_one_or_none()
+            if last is None:
+                seed = max(floor, self._highest_issued_token(queue_id, queue_date))
+                create = (
+                    pg_insert(QueueTokenCounter)
+                    .values(queue_id=queue_id, queue_date=queue_date, last_number=seed + size)
+                    .on_conflict_do_update(
+                        index_elements=[QueueTokenCounter.queue_id, QueueTokenCounter.queue_date],
+                        set_={"last_number": QueueTokenCounter.last_number + size, "updated_at": func.now()},
+                    )
+                    .returning(QueueTokenCounter.last_number)
+                )
+                last = self.db.execute(create).scalar_one()
+            self.db.commit()
+            return int(last)
+        except Exception:
+            self.db.rollback()
+            logger.exception("Failed to lease_token_block (queue_id=%s date=%s)", queue_id, queue_date)
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
+    def _highest_issued_token(self, queue_id: UUID, queue_date: date) -> int:
+        # "T<n>" tokens only; six digits and up are the old T<HHMMSS> no-Redis fallback
+        number = func.substring(QueueUser.token_number, r"^T(\d{1,5})$").cast(Integer)
+        highest = (
+            self.db.query(func.max(number))
+            .filter(QueueUser.queue_id == queue_id, QueueUser.queue_date == queue_date)
+            .scalar()
+        )
+        return int(highest or 0)
+
     def reserve_slot_atomic(self, slot_id: UUID) -> Optional[AppointmentSlot]:
         try:
             slot = (
@@ -909,7 +1044,7 @@ class QueueService:
 
     def get_today_active_queue_user_rows(
         self, queue_ids: List[UUID], booking_date: date
-    ) -> List[dict]:
+    ) -> List[LiveQueueUser]:
         if not queue_ids:
             return []
         try:
@@ -932,19 +1067,16 @@ class QueueService:
                 .all()
             )
             return [
-                {
-                    "uuid": row.uuid,
-                    "user_id": row.user_id,
-                    "queue_id": row.queue_id,
-                    "status": row.status,
-                    "turn_time": row.turn_time,
-                    "enqueue_time": row.enqueue_time,
-                    "appointment_type": row.appointment_type,
-                    "scheduled_start": (
-                        row.scheduled_start.strftime("%H:%M")
-                        if row.scheduled_start else None
-                    ),
-                }
+                LiveQueueUser(
+                    uuid=str(row.uuid),
+                    user_id=row.user_id,
+                    queue_id=row.queue_id,
+                    status=row.status,
+                    turn_time=row.turn_time,
+                    enqueue_time=row.enqueue_time,
+                    appointment_type=row.appointment_type or "QUEUE",
+                    scheduled_start=row.scheduled_start,
+                )
                 for row in rows
             ]
         except Exception:
@@ -992,34 +1124,14 @@ class QueueService:
         if not queue_ids:
             return {}
         try:
-            day_of_week = reference_date.weekday()
-            four_weeks_ago = reference_date - timedelta(days=28)
-            rows = (
-                self.db.query(
-                    QueueUser.queue_id,
-                    (func.extract("epoch", QueueUser.dequeue_time - QueueUser.enqueue_time) / 60).label("wait_minutes"),
-                )
-                .filter(
-                    QueueUser.queue_id.in_(queue_ids),
-                    extract("dow", QueueUser.queue_date) == (day_of_week + 1) % 7,
-                    QueueUser.queue_date >= four_weeks_ago,
-                    QueueUser.queue_date < reference_date,
-                    QueueUser.status == QUEUE_USER_COMPLETED,
-                    QueueUser.enqueue_time.isnot(None),
-                    QueueUser.dequeue_time.isnot(None),
-                )
-                .all()
-            )
-            by_queue: Dict[UUID, List[float]] = defaultdict(list)
-            for row in rows:
-                if row.wait_minutes and row.wait_minutes > 0:
-                    by_queue[row.queue_id].append(float(row.wait_minutes))
-            result: Dict[UUID, float] = {qid: default_minutes for qid in queue_ids}
-            for qid, times in by_queue.items():
-                times.sort()
-                index = int(len(times) * percentile)
-                result[qid] = times[min(index, len(times) - 1)]
-            return result
+            # Same weekday over the previous four weeks, from the daily rollup's
+            # service-time histograms (1-minute buckets) instead of raw rows.
+            days = [reference_date - timedelta(days=7 * week) for week in range(1, 5)]
+            percentiles = QueueStatsService(self.db).get_service_percentiles(queue_ids, days, percentile)
+            return {
+                qid: value if value is not None else default_minutes
+                for qid, value in percentiles.items()
+            }
         except Exception:
             logger.exception("Failed to get_historical_percentile_wait_batch (date=%s)", reference_date)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
@@ -1281,6 +1393,7 @@ class QueueService:
                 },
                 synchronize_session=False,
             )
+            QueueStatsService(self.db).record_skip(queue_user_id)
             self.db.flush()
         except Exception:
             logger.exception("Failed to mark_queue_user_skipped (queue_user_id=%s)", queue_user_id)
@@ -1342,58 +1455,16 @@ class QueueService:
             logger.exception("Failed to set_queue_status (queue_id=%s status=%s)", queue_id, status)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
-    def get_queues(self, business_id: UUID):  # type: ignore
+    def get_queues(self, business_id: UUID) -> List[Queue]:
+        """Queues of a business for the dashboard list. Employees and services are
+        loaded by get_queue_detail; nothing here touches queue_users."""
         try:
-            emp_subq = (
-                select(
-                    func.coalesce(
-                        func.json_agg(
-                            func.json_build_object("uuid", Employee.uuid, "name", Employee.full_name)
-                        ),
-                        "[]",
-                    )
-                )
-                .select_from(Employee)
-                .where(Employee.queue_id == Queue.uuid)
-                .correlate(Queue)
-                .scalar_subquery()
-            )
-            svc_subq = (
-                select(
-                    func.coalesce(
-                        func.json_agg(func.json_build_object("uuid", QueueServiceModel.uuid)),
-                        "[]",
-                    )
-                )
-                .select_from(QueueServiceModel)
-                .where(QueueServiceModel.queue_id == Queue.uuid)
-                .correlate(Queue)
-                .scalar_subquery()
-            )
-            user_count_subq = (
-                select(func.count(func.distinct(QueueUser.user_id)))
-                .select_from(QueueUser)
-                .where(QueueUser.queue_id == Queue.uuid)
-                .correlate(Queue)
-                .scalar_subquery()
-            )
-            result = (
-                self.db.query(
-                    Queue.uuid,
-                    Queue.merchant_id,
-                    Queue.name,
-                    Queue.status,
-                    Queue.is_counter,
-                    Queue.limit,
-                    Queue.created_at,
-                    emp_subq.label("employees"),
-                    svc_subq.label("services"),
-                    user_count_subq.label("unique_users"),
-                )
+            return (
+                self.db.query(Queue)
                 .filter(Queue.merchant_id == business_id)
+                .order_by(Queue.created_at)
                 .all()
             )
-            return result
         except Exception:
             logger.exception("Failed to get_queues (business_id=%s)", business_id)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
@@ -1447,33 +1518,9 @@ class QueueService:
         status: int | None,
     ) -> tuple[list[tuple[QueueUser, User]], int, int]:
         try:
-            query = (
-                self.db.query(QueueUser, User)
-                .join(User, User.uuid == QueueUser.user_id)
-                .join(Queue, Queue.uuid == QueueUser.queue_id)
+            query = self._queue_users_query(
+                (QueueUser, User), business_id, queue_id, employee_id, search, status
             )
-
-            if business_id is not None:
-                query = query.filter(Queue.merchant_id == business_id)
-
-            if queue_id is not None:
-                query = query.filter(QueueUser.queue_id == queue_id)
-
-            if employee_id is not None:
-                query = query.join(Employee, Employee.queue_id == QueueUser.queue_id).filter(Employee.uuid == employee_id)
-
-            if status is not None:
-                query = query.filter(QueueUser.status == status)
-
-            if search:
-                search_text = f"%{search}%"
-                query = query.filter(
-                    (User.full_name.ilike(search_text))
-                    | (User.email.ilike(search_text))
-                    | (User.phone_number.ilike(search_text))
-                    | (QueueUser.token_number.ilike(search_text))
-                )
-
             total: int = query.count()
             pages: int = math.ceil(total / limit) if total else 1
             offset = (page - 1) * limit
@@ -1487,6 +1534,83 @@ class QueueService:
             logger.exception("Failed to get_queue_users (business_id=%s page=%s)", business_id, page)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
+    def iter_queue_users_export(
+        self,
+        *,
+        business_id: UUID | None,
+        queue_id: UUID | None,
+        employee_id: UUID | None,
+        search: str | None,
+        limit: int,
+        batch_size: int = 2000,
+    ):
+        """Yield plain column tuples for the queue-users export, same filters and
+        order as get_queue_users. Uses a server-side cursor (yield_per), so only
+        *batch_size* rows are in memory at a time; no ORM objects are built."""
+        query = self._queue_users_query(
+            (
+                User.full_name, User.email, User.country_code, User.phone_number,
+                QueueUser.token_number, QueueUser.queue_date, QueueUser.enqueue_time,
+                QueueUser.status, QueueUser.priority,
+            ),
+            business_id, queue_id, employee_id, search, None,
+        )
+        query = query.order_by(
+            QueueUser.queue_date.desc().nullslast(),
+            QueueUser.enqueue_time.desc().nullslast(),
+        )
+        yield from query.limit(limit).yield_per(batch_size)
+
+    def count_queue_users_export(
+        self,
+        *,
+        business_id: UUID | None,
+        queue_id: UUID | None,
+        employee_id: UUID | None,
+        search: str | None,
+    ) -> int:
+        return self._queue_users_query(
+            (QueueUser.uuid,), business_id, queue_id, employee_id, search, None
+        ).count()
+
+    def _queue_users_query(
+        self,
+        entities: tuple,
+        business_id: UUID | None,
+        queue_id: UUID | None,
+        employee_id: UUID | None,
+        search: str | None,
+        status: int | None,
+    ):
+        query = (
+            self.db.query(*entities)
+            .select_from(QueueUser)
+            .join(User, User.uuid == QueueUser.user_id)
+            .join(Queue, Queue.uuid == QueueUser.queue_id)
+        )
+
+        if business_id is not None:
+            query = query.filter(Queue.merchant_id == business_id)
+
+        if queue_id is not None:
+            query = query.filter(QueueUser.queue_id == queue_id)
+
+        if employee_id is not None:
+            query = query.join(Employee, Employee.queue_id == QueueUser.queue_id).filter(Employee.uuid == employee_id)
+
+        if status is not None:
+            query = query.filter(QueueUser.status == status)
+
+        if search:
+            search_text = f"%{search}%"
+            query = query.filter(
+                (User.full_name.ilike(search_text))
+                | (User.email.ilike(search_text))
+                | (User.phone_number.ilike(search_text))
+                | (QueueUser.token_number.ilike(search_text))
+            )
+        return query
+
     def get_eta_notification_candidates(self, today: date) -> List[QueueUser]:
         """Return registered users today who declared an ETA and have not yet been notified."""
         try:
@@ -0,0 +1,225 @@
+"""
+QueueStatsService — the queue_daily_stats rollup and its readers.
+
+rollup(day) aggregates one day of queue_users per queue in two queries (KPIs,
+then the service-time histogram) and upserts the rows. main.py runs it for
+today every QUEUE_STATS_ROLLUP_MINUTES (incremental), for yesterday nightly
+once the expiry job has closed the day (final), and backfills missing days at
+startup. Dashboards and the booking estimator read the fact table instead of
+scanning queue_users.
+"""
+import logging
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException
+from sqlalchemy import Date, and_, cast, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.constants import (
+    TIMEZONE,
+    QUEUE_USER_CANCELLED,
+    QUEUE_USER_COMPLETED,
+    QUEUE_USER_EXPIRED,
+    QUEUE_USER_FAILED,
+)
+from app.core.utils import now_utc
+from app.models.queue import Queue, QueueDailyStats, QueueUser
+
+logger = logging.getLogger(__name__)
+
+# Service times of this many minutes or more share the last histogram bucket
+HISTOGRAM_MAX_MINUTES = 240
+
+_service_minutes = func.extract("epoch", QueueUser.dequeue_time - QueueUser.enqueue_time) / 60
+_arrival = func.coalesce(QueueUser.check_in_time, QueueUser.created_at)
+_wait_minutes = func.extract("epoch", QueueUser.enqueue_time - _arrival) / 60
+_served = and_(
+    QueueUser.status == QUEUE_USER_COMPLETED,
+    QueueUser.enqueue_time.isnot(None),
+    QueueUser.dequeue_time.isnot(None),
+)
+_same_day_arrival = cast(func.timezone(TIMEZONE, _arrival), Date) == QueueUser.queue_date
+_waited = and_(_served, _same_day_arrival, QueueUser.enqueue_time >= _arrival)
+
+
+def histogram_percentile(histogram: Dict[int, int], percentile: float) -> Optional[float]:
+    """Value at *percentile* of a {minute_bucket: count} histogram — the element
+    at index int(n * percentile) of the sorted values, as the bucket midpoint."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    target = min(int(total * percentile), total - 1)
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen > target:
+            return bucket + 0.5
+    return None
+
+
+class QueueStatsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ── Rollup ────────────────────────────────────────────────────────────────
+
+    def rollup(self, day: date) -> int:
+        """Recompute *day* for every queue that has appointments on it. Returns rows written."""
+        try:
+            kpis = self.db.execute(
+                select(
+                    QueueUser.queue_id,
+                    Queue.merchant_id,
+                    func.count().label("booked"),
+                    func.count().filter(QueueUser.status == QUEUE_USER_COMPLETED).label("served"),
+                    func.count().filter(QueueUser.status == QUEUE_USER_FAILED).label("no_show"),
+                    func.count().filter(QueueUser.status == QUEUE_USER_CANCELLED).label("cancelled"),
+                    func.count().filter(QueueUser.status == QUEUE_USER_EXPIRED).label("expired"),
+                    func.count(func.distinct(QueueUser.user_id)).label("unique_users"),
+                    func.avg(_wait_minutes).filter(_waited).label("avg_wait"),
+                    func.percentile_cont(0.5).within_group(_wait_minutes).filter(_waited).label("p50_wait"),
+                    func.percentile_cont(0.9).within_group(_wait_minutes).filter(_waited).label("p90_wait"),
+                    func.avg(_service_minutes).filter(_served).label("avg_service"),
+                    func.percentile_cont(0.5).within_group(_service_minutes).filter(_served).label("p50_service"),
+                    func.percentile_cont(0.9).within_group(_service_minutes).filter(_served).label("p90_service"),
+                    func.mode().within_group(
+                        func.extract("hour", func.timezone(TIMEZONE, _arrival))
+                    ).filter(_same_day_arrival).label("peak_hour"),
+                )
+                .join(Queue, Queue.uuid == QueueUser.queue_id)
+                .where(QueueUser.queue_date == day)
+                .group_by(QueueUser.queue_id, Queue.merchant_id)
+            ).all()
+            if not kpis:
+                return 0
+
+            bucket = func.least(func.floor(_service_minutes), HISTOGRAM_MAX_MINUTES)
+            histograms: Dict[UUID, List[List[int]]] = defaultdict(list)
+            for queue_id, minute, count in self.db.execute(
+                select(QueueUser.queue_id, bucket, func.count())
+                .where(QueueUser.queue_date == day, _served, _service_minutes > 0)
+                .group_by(QueueUser.queue_id, bucket)
+            ):
+                histograms[queue_id].append([int(minute), int(count)])
+
+            computed_at = now_utc()
+            values = [
+                {
+                    "queue_id": row.queue_id,
+                    "stat_date": day,
+                    "business_id": row.merchant_id,
+                    "booked": row.booked,
+                    "served": row.served,
+                    "no_show": row.no_show,
+                    "cancelled": row.cancelled,
+                    "expired": row.expired,
+                    "skipped": 0,
+                    "unique_users": row.unique_users,
+                    "avg_wait_minutes": _minutes(row.avg_wait),
+                    "p50_wait_minutes": _minutes(row.p50_wait),
+                    "p90_wait_minutes": _minutes(row.p90_wait),
+                    "avg_service_minutes": _minutes(row.avg_service),
+                    "p50_service_minutes": _minutes(row.p50_service),
+                    "p90_service_minutes": _minutes(row.p90_service),
+                    "service_histogram": sorted(histograms.get(row.queue_id, [])),
+                    "peak_hour": int(row.peak_hour) if row.peak_hour is not None else None,
+                    "computed_at": computed_at,
+                }
+                for row in kpis
+            ]
+            stmt = insert(QueueDailyStats).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[QueueDailyStats.queue_id, QueueDailyStats.stat_date],
+                # skipped is maintained by record_skip, never recounted
+                set_={
+                    col: stmt.excluded[col]
+                    for col in values[0]
+                    if col not in ("queue_id", "stat_date", "skipped")
+                },
+            )
+            self.db.execute(stmt)
+            self.db.commit()
+            return len(values)
+        except Exception:
+            self.db.rollback()
+            logger.exception("Failed to roll up queue_daily_stats (day=%s)", day)
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
+    def missing_days(self, start: date, end: date) -> List[date]:
+        """Days in [start, end) that have appointments but no rolled-up row."""
+        have = set(self.db.execute(
+            select(QueueDailyStats.stat_date)
+            .where(QueueDailyStats.stat_date >= start, QueueDailyStats.stat_date < end)
+            .distinct()
+        ).scalars())
+        booked = set(self.db.execute(
+            select(QueueUser.queue_date)
+            .where(QueueUser.queue_date >= start, QueueUser.queue_date < end)
+            .distinct()
+        ).scalars())
+        return sorted(booked - have)
+
+    def record_skip(self, queue_user_id: UUID) -> None:
+        """Count one skip on the appointment's queue/day, in the caller's transaction."""
+        self.db.execute(
+            text(
+                "INSERT INTO queue_daily_stats (queue_id, stat_date, business_id, booked, served, no_show, "
+                "  cancelled, expired, skipped, unique_users) "
+                "SELECT qu.queue_id, qu.queue_date, q.merchant_id, 0, 0, 0, 0, 0, 1, 0 "
+                "FROM queue_users qu JOIN queues q ON q.uuid = qu.queue_id WHERE qu.uuid = :id "
+                "ON CONFLICT (queue_id, stat_date) DO UPDATE "
+                "SET skipped = queue_daily_stats.skipped + 1"
+            ),
+            {"id": queue_user_id},
+        )
+
+    # ── Readers ───────────────────────────────────────────────────────────────
+
+    def get_daily_stats(
+        self,
+        business_id: UUID,
+        date_from: date,
+        date_to: date,
+        queue_id: Optional[UUID] = None,
+    ) -> List[QueueDailyStats]:
+        try:
+            query = (
+                self.db.query(QueueDailyStats)
+                .filter(
+                    QueueDailyStats.business_id == business_id,
+                    QueueDailyStats.stat_date >= date_from,
+                    QueueDailyStats.stat_date <= date_to,
+                )
+            )
+            if queue_id is not None:
+                query = query.filter(QueueDailyStats.queue_id == queue_id)
+            return query.order_by(QueueDailyStats.stat_date, QueueDailyStats.queue_id).all()
+        except Exception:
+            logger.exception("Failed to get_daily_stats (business_id=%s)", business_id)
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
+    def get_service_percentiles(
+        self,
+        queue_ids: Iterable[UUID],
+        days: Iterable[date],
+        percentile: float,
+    ) -> Dict[UUID, Optional[float]]:
+        """Service-time percentile per queue over *days*, merged from the daily histograms."""
+        queue_ids = list(queue_ids)
+        merged: Dict[UUID, Dict[int, int]] = {qid: defaultdict(int) for qid in queue_ids}
+        rows = self.db.execute(
+            select(QueueDailyStats.queue_id, QueueDailyStats.service_histogram)
+            .where(QueueDailyStats.queue_id.in_(queue_ids), QueueDailyStats.stat_date.in_(list(days)))
+        )
+        for queue_id, histogram in rows:
+            for minute, count in histogram or []:
+                merged[queue_id][minute] += count
+        return {qid: histogram_percentile(hist, percentile) for qid, hist in merged.items()}
+
+
+def _minutes(value: Any) -> Optional[float]:
+    return round(float(value), 2) if value is not None else None
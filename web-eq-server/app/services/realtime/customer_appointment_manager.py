@@ -4,6 +4,7 @@ CustomerAppointmentManager – user-scoped WebSocket for today's appointment upd
 Keyed by user_id. Send delta/initial payload when queue state changes (position, status, etc.).
 """
 import logging
+import time as _time
 from collections import defaultdict
 from typing import Any, Dict, List
 
@@ -11,6 +12,7 @@ from fastapi import WebSocket
 from starlette.websockets import WebSocketState
 
 from app.core.utils import now_iso
+from app.services.realtime.metrics import observe_broadcast
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +38,9 @@ class CustomerAppointmentManager:
             del self._clients[user_id]
         logger.info("Customer appointment WS disconnected: user_id=%s", user_id)
 
+    def connection_count(self) -> int:
+        return sum(len(sockets) for sockets in self._clients.values())
+
     async def broadcast_to_user(self, user_id: str, payload: Any) -> None:
         """
         Send appointment update to all connected clients for this user.
@@ -50,6 +55,7 @@ class CustomerAppointmentManager:
             "data": payload,
             "timestamp": now_iso(),
         }
+        started = _time.perf_counter()
         stale: List[WebSocket] = []
         for ws in clients:
             try:
@@ -60,6 +66,7 @@ class CustomerAppointmentManager:
             except Exception as exc:
                 logger.warning("Customer appointment broadcast error: %s", exc)
                 stale.append(ws)
+        observe_broadcast("customer_appointment", started, len(clients))
         for ws in stale:
             self._clients[user_id] = [w for w in self._clients[user_id] if w is not ws]
         if not self._clients.get(user_id):
@@ -6,6 +6,7 @@ Each customer connects with their queue_user_id — they only receive their own
 No Redis dependency — purely in-memory WebSocket broadcast.
 """
 import logging
+import time as _time
 from collections import defaultdict
 from datetime import date, datetime
 from typing import Any, Dict, List, Optional
@@ -18,6 +19,7 @@ from starlette.websockets import WebSocketState
 from app.core.utils import build_live_queue_users_raw, live_queue_key, now_iso, APP_TZ
 from app.services.booking_calculation_service import BookingCalculationService
 from app.services.realtime.live_queue_manager import calculate_queue_waits
+from app.services.realtime.metrics import observe_broadcast
 from app.services.queue_service import QueueService
 
 logger = logging.getLogger(__name__)
@@ -89,6 +91,9 @@ class CustomerQueueManager:
             queue_id, date_str, queue_user_id,
         )
 
+    def connection_count(self) -> int:
+        return sum(len(sockets) for users in self._clients.values() for sockets in users.values())
+
     # ─────────────────────────────────────────────────────────────────────────
     # Broadcast — called from queue_controller after every queue action
     # ─────────────────────────────────────────────────────────────────────────
@@ -115,6 +120,8 @@ class CustomerQueueManager:
             logger.error("CustomerQueueManager: failed to build waits: %s", exc)
             return
 
+        started = _time.perf_counter()
+        recipients = 0
         stale: List[tuple] = []  # (queue_user_id, websocket)
         for queue_user_id, sockets in list(user_map.items()):
             payload = waits.get(queue_user_id) or {
@@ -131,6 +138,7 @@ class CustomerQueueManager:
                 "data": payload,
                 "timestamp": now_iso(),
             }
+            recipients += len(sockets)
             for ws in list(sockets):
                 try:
                     if ws.client_state == WebSocketState.CONNECTED:
@@ -140,6 +148,7 @@ class CustomerQueueManager:
                 except Exception as exc:
                     logger.warning("CustomerQueue broadcast error: %s", exc)
                     stale.append((queue_user_id, ws))
+        observe_broadcast("customer_queue", started, recipients)
 
         for queue_user_id, ws in stale:
             await self.disconnect(queue_id, date_str, queue_user_id, ws)
@@ -177,12 +186,12 @@ class CustomerQueueManager:
 
         result: Dict[str, Any] = {}
         for u in users:
-            uid = str(u["uuid"])
+            uid = u.uuid
             wd = wait_data.get(uid, {})
             result[uid] = {
                 "queue_user_id": uid,
-                "position": position_map.get(uid, u.get("position")),
-                "status": u.get("status"),
+                "position": position_map.get(uid, u.position),
+                "status": u.status,
                 "expected_at_ts": wd.get("expected_at_ts"),
                 "expected_end_ts": wd.get("expected_end_ts"),
                 "estimated_wait_minutes": wd.get("estimated_wait_minutes"),
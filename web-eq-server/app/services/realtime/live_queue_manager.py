@@ -5,6 +5,8 @@ Keyed on  {queue_id}:{date_str}  (vs. QueueManager which is {business_id}:{date}
 No Redis dependency – purely in-memory WebSocket broadcast + DB read for state.
 """
 import logging
+import time as _time
+from bisect import bisect_left, bisect_right
 from collections import defaultdict
 from datetime import date, datetime, time, timedelta
 from typing import Any, Dict, List, Optional, Tuple
@@ -14,7 +16,7 @@ from sqlalchemy.orm import Session
 from starlette.websockets import WebSocketState
 
 import pytz
-from app.core.utils import build_live_queue_users_raw, live_queue_key, now_iso, now_app_tz, format_time_12h, serialise_dt, json_safe, advance_work_minutes
+from app.core.utils import build_live_queue_users_raw, live_queue_key, now_iso, now_app_tz, format_time_12h, serialise_dt, json_safe, localize_app_tz, work_calendar, WorkCalendar, LiveQueueUser
 from app.core.constants import (
     TIMEZONE,
     QUEUE_USER_REGISTERED,
@@ -24,6 +26,7 @@ from app.core.constants import (
 )
 from app.services.queue_service import QueueService
 from app.services.booking_calculation_service import BookingCalculationService
+from app.services.realtime.metrics import observe_broadcast
 from uuid import UUID
 
 _APP_TZ = pytz.timezone(TIMEZONE)
@@ -35,25 +38,16 @@ logger = logging.getLogger(__name__)
 # Shared wait-calculation helpers — used by LiveQueueManager AND customer API
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _scheduled_start_dt(u: dict, ref_date: date) -> Optional[datetime]:
-    """Return tz-aware scheduled_start for Fixed/Approximate users; None for walk-ins."""
-    if u.get("appointment_type") not in ("FIXED", "APPROXIMATE"):
-        return None
-    s_str = u.get("scheduled_start")
-    if not s_str:
-        return None
-    try:
-        s_time = datetime.strptime(s_str, "%H:%M").time()
-        return _APP_TZ.localize(datetime.combine(ref_date, s_time))
-    except (ValueError, AttributeError):
-        return None
+def _to_app_tz(dt: datetime) -> datetime:
+    return localize_app_tz(dt) if dt.tzinfo is None else dt.astimezone(_APP_TZ)
 
 
 def calculate_queue_waits(
-    users: List[dict],
+    users: List[LiveQueueUser],
     now: Optional[datetime] = None,
     open_dt: Optional[datetime] = None,
     breaks: Optional[List[Tuple[time, time]]] = None,
+    calendar: Optional[WorkCalendar] = None,
 ) -> Dict[str, Any]:
     """
     Cursor-based wait estimation for mixed queues (Fixed + Approximate + Walk-in).
@@ -65,13 +59,17 @@ def calculate_queue_waits(
 
     *breaks* (sorted (start, end) time tuples) are skipped when projecting every
     service window, so the live timeline matches the break-aware booking preview.
+    Pass a prebuilt *calendar* (``work_calendar(breaks)``) to skip recompiling them.
+
+    Internally users are addressed by list index; string uuids appear only in the
+    returned maps.
 
     Returns:
         {
             "current_token":  Optional[str],
             "wait_data":      { "<uuid>": { "expected_at_ts", "estimated_wait_minutes",
                                             "estimated_appointment_time" } },
-            "ordered_waiting": List[dict],   # REGISTERED users in correct service order
+            "ordered_waiting": List[LiveQueueUser],  # REGISTERED users in service order
             "position_map":    { "<uuid>": int },  # 1-based, includes SCHEDULED ahead
         }
     """
@@ -81,62 +79,51 @@ def calculate_queue_waits(
     ref_date = open_dt.date() if open_dt is not None else now.date()
     cursor = max(now, open_dt) if open_dt is not None else now
 
-    def advance(start_dt: datetime, work_minutes: float) -> datetime:
-        """Project *work_minutes* of service from *start_dt*, skipping break windows."""
-        return advance_work_minutes(start_dt, work_minutes, breaks)
+    cal = calendar if calendar is not None else work_calendar(breaks)
+    break_dts = cal.localized_breaks(ref_date)
 
-    def begin_after_breaks(start_dt: datetime) -> datetime:
-        """A turn can never *begin* inside a break — if it lands in one, push it to
-        the break's end. (Projecting zero work minutes performs exactly this bump.)
-        This also corrects the displayed wait, since wait = start − now."""
-        return advance_work_minutes(start_dt, 0, breaks)
+    # Project *work_minutes* of service from a start time, skipping break windows.
+    advance = cal.advance
+    # A turn can never *begin* inside a break — if it lands in one, push it to the
+    # break's end. This also corrects the displayed wait, since wait = start − now.
+    begin_after_breaks = cal.begin
 
     def _spans_break_info(start_dt: datetime, end_dt: datetime) -> tuple:
         """Return (True, '1:00 PM – 2:00 PM') when a break *starts* inside the service
         window [start_dt, end_dt).  This means the employee begins serving the customer,
         then hits a break mid-service, and resumes after the break ends."""
-        for bs, be in (breaks or []):
-            if bs >= be:
-                continue
-            bs_dt = _APP_TZ.localize(datetime.combine(ref_date, bs))
-            be_dt = _APP_TZ.localize(datetime.combine(ref_date, be))
+        for bs_dt, be_dt in break_dts:
             if start_dt < bs_dt < end_dt:
                 return True, f"{format_time_12h(bs_dt)} – {format_time_12h(be_dt)}"
         return False, None
 
     # Self-adapting fallback turn_time
     completed_times = [
-        u["turn_time"] for u in users
-        if u["status"] == QUEUE_USER_COMPLETED and (u.get("turn_time") or 0) > 0
+        u.turn_time for u in users
+        if u.status == QUEUE_USER_COMPLETED and (u.turn_time or 0) > 0
     ]
     waiting_times = [
-        u["turn_time"] for u in users
-        if u["status"] == QUEUE_USER_REGISTERED and (u.get("turn_time") or 0) > 0
+        u.turn_time for u in users
+        if u.status == QUEUE_USER_REGISTERED and (u.turn_time or 0) > 0
     ]
     fallback_turn_time: float = (
         sum(completed_times) / len(completed_times) if completed_times
         else sum(waiting_times) / len(waiting_times) if waiting_times
         else 15.0
     )
+    turns: List[float] = [float(u.turn_time or fallback_turn_time) for u in users]
 
     # ── IN_PROGRESS ────────────────────────────────────────────────────────────
     current_token: Optional[str] = None
     in_progress_start_dt: Optional[datetime] = None
     in_progress_finish_dt: Optional[datetime] = None
 
-    for u in users:
-        if u["status"] == QUEUE_USER_IN_PROGRESS:
-            current_token = u.get("token")
-            enqueue_time = u.get("enqueue_time")
-            turn_time = float(u.get("turn_time") or fallback_turn_time)
-            if enqueue_time:
-                et = enqueue_time
-                if et.tzinfo is None:
-                    et = _APP_TZ.localize(et)
-                else:
-                    et = et.astimezone(_APP_TZ)
-                in_progress_start_dt = et
-                in_progress_finish_dt = advance(et, turn_time)
+    for i, u in enumerate(users):
+        if u.status == QUEUE_USER_IN_PROGRESS:
+            current_token = u.token
+            if u.enqueue_time:
+                in_progress_start_dt = _to_app_tz(u.enqueue_time)
+                in_progress_finish_dt = advance(in_progress_start_dt, turns[i])
             break
 
     if in_progress_finish_dt:
@@ -146,146 +133,145 @@ def calculate_queue_waits(
         if dt is None:
             return None
         if dt.tzinfo is None:
-            dt = _APP_TZ.localize(dt)
+            dt = localize_app_tz(dt)
         return int(dt.timestamp() * 1000)
 
     # ── SCHEDULED blocks (not yet activated — walk-ins must not overlap) ───────
     sched_blocks: List[tuple] = []
-    for u in users:
-        if u.get("status") == QUEUE_USER_SCHEDULED:
-            s_dt = _scheduled_start_dt(u, ref_date)
+    for i, u in enumerate(users):
+        if u.status == QUEUE_USER_SCHEDULED:
+            s_dt = u.scheduled_start_dt(ref_date)
             if s_dt is not None:
-                sched_blocks.append((s_dt, float(u.get("turn_time") or fallback_turn_time)))
+                sched_blocks.append((s_dt, turns[i]))
     sched_blocks.sort(key=lambda x: x[0])
 
+    # Precompute each block's break-aware end once, plus a running max of the ends:
+    # every block before ``sched_head`` has finished by the (monotonic) cursor, so
+    # conflict scans start there instead of at the first block of the day.
+    sched_starts: List[datetime] = [s_dt for s_dt, _ in sched_blocks]
+    sched_ends: List[datetime] = [advance(s_dt, s_turn) for s_dt, s_turn in sched_blocks]
+    sched_max_end: List[datetime] = []
+    for s_end in sched_ends:
+        sched_max_end.append(max(sched_max_end[-1], s_end) if sched_max_end else s_end)
+    sched_head = 0
+
     def _advance_past_conflicts(cursor_dt: datetime, wu_turn: float) -> datetime:
         # Slide cursor past any SCHEDULED block that overlaps this walk-in's window.
         # Skip condition: s_end <= cursor_dt means block has fully finished — safe.
         # Using s_end (not s_dt) correctly handles cursor landing inside a block.
-        for s_dt, s_turn in sched_blocks:
-            s_end = advance(s_dt, s_turn)
+        # Blocks are sorted by start, so the first block starting at/after the
+        # walk-in's window ends the scan — no later block can overlap either.
+        nonlocal sched_head
+        while sched_head < len(sched_blocks) and sched_max_end[sched_head] <= cursor_dt:
+            sched_head += 1
+        for j in range(sched_head, len(sched_blocks)):
+            s_end = sched_ends[j]
             if s_end <= cursor_dt:
                 continue
-            if s_dt < advance(cursor_dt, wu_turn):
-                cursor_dt = max(cursor_dt, s_end)
+            if sched_starts[j] >= advance(cursor_dt, wu_turn):
+                break
+            cursor_dt = max(cursor_dt, s_end)
         return cursor_dt
 
     # ── Split REGISTERED users: Fixed/Approximate vs Walk-in ───────────────────
-    registered = [u for u in users if u["status"] == QUEUE_USER_REGISTERED]
-    sched_dts: Dict[str, datetime] = {}
-    fixed_reg: List[dict] = []
-    walkins: List[dict] = []
+    sched_dts: Dict[int, datetime] = {}
+    fixed_reg: List[int] = []
+    walkins: List[int] = []
 
-    for u in registered:
-        s_dt = _scheduled_start_dt(u, ref_date)
+    for i, u in enumerate(users):
+        if u.status != QUEUE_USER_REGISTERED:
+            continue
+        s_dt = u.scheduled_start_dt(ref_date)
         if s_dt is not None:
-            sched_dts[str(u["uuid"])] = s_dt
-            fixed_reg.append(u)
+            sched_dts[i] = s_dt
+            fixed_reg.append(i)
         else:
-            walkins.append(u)
-
-    fixed_reg.sort(key=lambda u: sched_dts[str(u["uuid"])])
+            walkins.append(i)
 
-    def _safe_enqueue_key(u: dict) -> datetime:
-        et = u.get("enqueue_time")
-        if et is None:
-            return _APP_TZ.localize(datetime(9999, 1, 1))
-        return _APP_TZ.localize(et) if et.tzinfo is None else et.astimezone(_APP_TZ)
+    fixed_reg.sort(key=sched_dts.__getitem__)
 
-    walkins.sort(key=_safe_enqueue_key)
+    _no_enqueue = localize_app_tz(datetime(9999, 1, 1))
+    walkins.sort(key=lambda i: _to_app_tz(users[i].enqueue_time) if users[i].enqueue_time is not None else _no_enqueue)
 
     # ── Cursor-based merge: determine correct service order ────────────────────
-    ordered: List[dict] = []
-    expected_dts: Dict[str, datetime] = {}
+    ordered: List[int] = []
+    expected_dts: Dict[int, datetime] = {}
     fi = wi = 0
     cursor_val = cursor
 
     while fi < len(fixed_reg) or wi < len(walkins):
         if fi >= len(fixed_reg):
-            wu = walkins[wi]
-            wu_turn = float(wu.get("turn_time") or fallback_turn_time)
-            start = begin_after_breaks(_advance_past_conflicts(cursor_val, wu_turn))
-            expected_dts[str(wu["uuid"])] = start
-            cursor_val = advance(start, wu_turn)
-            ordered.append(wu)
+            w = walkins[wi]
+            start = begin_after_breaks(_advance_past_conflicts(cursor_val, turns[w]))
+            expected_dts[w] = start
+            cursor_val = advance(start, turns[w])
+            ordered.append(w)
             wi += 1
         elif wi >= len(walkins):
-            fu = fixed_reg[fi]
-            fu_turn = float(fu.get("turn_time") or fallback_turn_time)
-            start = begin_after_breaks(max(cursor_val, sched_dts[str(fu["uuid"])]))
-            expected_dts[str(fu["uuid"])] = start
-            cursor_val = advance(start, fu_turn)
-            ordered.append(fu)
+            f = fixed_reg[fi]
+            start = begin_after_breaks(max(cursor_val, sched_dts[f]))
+            expected_dts[f] = start
+            cursor_val = advance(start, turns[f])
+            ordered.append(f)
             fi += 1
         else:
-            wu = walkins[wi]
-            fu = fixed_reg[fi]
-            wu_turn = float(wu.get("turn_time") or fallback_turn_time)
-            fu_turn = float(fu.get("turn_time") or fallback_turn_time)
-            fixed_start = sched_dts[str(fu["uuid"])]
-            adjusted = _advance_past_conflicts(cursor_val, wu_turn)
-            if advance(adjusted, wu_turn) <= fixed_start:
+            w = walkins[wi]
+            f = fixed_reg[fi]
+            fixed_start = sched_dts[f]
+            adjusted = _advance_past_conflicts(cursor_val, turns[w])
+            if advance(adjusted, turns[w]) <= fixed_start:
                 # Walk-in fits in gap before next fixed slot — serve it first
                 start = begin_after_breaks(adjusted)
-                expected_dts[str(wu["uuid"])] = start
-                cursor_val = advance(start, wu_turn)
-                ordered.append(wu)
+                expected_dts[w] = start
+                cursor_val = advance(start, turns[w])
+                ordered.append(w)
                 wi += 1
             else:
                 # Fixed appointment takes priority over walk-in
                 start = begin_after_breaks(max(cursor_val, fixed_start))
-                expected_dts[str(fu["uuid"])] = start
-                cursor_val = advance(start, fu_turn)
-                ordered.append(fu)
+                expected_dts[f] = start
+                cursor_val = advance(start, turns[f])
+                ordered.append(f)
                 fi += 1
 
     # ── Build wait_data ─────────────────────────────────────────────────────────
     wait_data: Dict[str, dict] = {}
 
-    for u in users:
-        if u["status"] == QUEUE_USER_IN_PROGRESS:
-            in_progress_turn = float(u.get("turn_time") or fallback_turn_time)
+    for i, u in enumerate(users):
+        if u.status == QUEUE_USER_IN_PROGRESS:
             ip_spans, ip_break_label = (
                 _spans_break_info(in_progress_start_dt, in_progress_finish_dt)
                 if (in_progress_start_dt and in_progress_finish_dt) else (False, None)
             )
-            wait_data[str(u["uuid"])] = {
+            wait_data[u.uuid] = {
                 "expected_at_ts": _to_epoch_ms(in_progress_finish_dt),
                 "expected_end_ts": _to_epoch_ms(in_progress_finish_dt),
                 "estimated_wait_minutes": None,
                 "estimated_appointment_time": format_time_12h(in_progress_finish_dt) if in_progress_finish_dt else None,
                 "estimated_end_time": format_time_12h(in_progress_finish_dt) if in_progress_finish_dt else None,
-                "service_duration_minutes": int(in_progress_turn),
+                "service_duration_minutes": int(turns[i]),
                 "spans_break": ip_spans,
                 "break_during_label": ip_break_label,
             }
 
-    for u in ordered:
-        exp_dt = expected_dts.get(str(u["uuid"]))
-        tu = float(u.get("turn_time") or fallback_turn_time)
-        exp_end_dt = advance(exp_dt, tu) if exp_dt else None
-        wait_mins = (
-            max(0, int(round((exp_dt - now).total_seconds() / 60)))
-            if exp_dt else None
-        )
-        spans, break_label = (
-            _spans_break_info(exp_dt, exp_end_dt)
-            if (exp_dt and exp_end_dt) else (False, None)
-        )
-        wait_data[str(u["uuid"])] = {
+    for i in ordered:
+        exp_dt = expected_dts[i]
+        exp_end_dt = advance(exp_dt, turns[i])
+        spans, break_label = _spans_break_info(exp_dt, exp_end_dt)
+        wait_data[users[i].uuid] = {
             "expected_at_ts": _to_epoch_ms(exp_dt),
             "expected_end_ts": _to_epoch_ms(exp_end_dt),
-            "estimated_wait_minutes": wait_mins,
+            "estimated_wait_minutes": max(0, int(round((exp_dt - now).total_seconds() / 60))),
             "estimated_appointment_time": format_time_12h(exp_dt),
             "estimated_end_time": format_time_12h(exp_end_dt),
-            "service_duration_minutes": int(tu),
+            "service_duration_minutes": int(turns[i]),
             "spans_break": spans,
             "break_during_label": break_label,
         }
 
     for u in users:
-        if u["status"] == QUEUE_USER_COMPLETED:
-            wait_data[str(u["uuid"])] = {
+        if u.status == QUEUE_USER_COMPLETED:
+            wait_data[u.uuid] = {
                 "expected_at_ts": None,
                 "expected_end_ts": None,
                 "estimated_wait_minutes": None,
@@ -299,21 +285,14 @@ def calculate_queue_waits(
     # the walk-in's position number must account for it — preventing a confusing
     # jump when that slot activates and becomes REGISTERED.
     position_map: Dict[str, int] = {}
-    for i, u in enumerate(ordered):
-        exp_dt = expected_dts.get(str(u["uuid"]))
-        sched_ahead = sum(
-            1 for s_dt, _ in sched_blocks
-            if exp_dt is not None and now < s_dt < exp_dt
-        )
-        position_map[str(u["uuid"])] = i + 1 + sched_ahead
+    sched_before_now = bisect_right(sched_starts, now)
+    for rank, i in enumerate(ordered):
+        sched_ahead = max(0, bisect_left(sched_starts, expected_dts[i]) - sched_before_now)
+        position_map[users[i].uuid] = rank + 1 + sched_ahead
 
     # ── Are we *currently* inside a break? Surface "on break until …" to the UI ─
     on_break_until_dt: Optional[datetime] = None
-    for bs, be in (breaks or []):
-        if bs >= be:
-            continue
-        be_dt = _APP_TZ.localize(datetime.combine(ref_date, be))
-        bs_dt = _APP_TZ.localize(datetime.combine(ref_date, bs))
+    for bs_dt, be_dt in break_dts:
         if bs_dt <= now < be_dt:
             on_break_until_dt = be_dt
             break
@@ -321,7 +300,7 @@ def calculate_queue_waits(
     return {
         "current_token": current_token,
         "wait_data": wait_data,
-        "ordered_waiting": ordered,
+        "ordered_waiting": [users[i] for i in ordered],
         "position_map": position_map,
         "on_break_until": format_time_12h(on_break_until_dt) if on_break_until_dt else None,
         "on_break_until_ts": _to_epoch_ms(on_break_until_dt),
@@ -371,6 +350,9 @@ class LiveQueueManager:
         self._clients[key] = [ws for ws in self._clients[key] if ws is not websocket]
         logger.info("LiveQueue WS disconnected: queue=%s date=%s", queue_id, date_str)
 
+    def connection_count(self) -> int:
+        return sum(len(sockets) for sockets in self._clients.values())
+
     # ─────────────────────────────────────────────────────────────────────────
     # Broadcast
     # ─────────────────────────────────────────────────────────────────────────
@@ -393,6 +375,7 @@ class LiveQueueManager:
             "data": json_safe(data),
             "timestamp": now_iso(),
         }
+        started = _time.perf_counter()
         stale: List[WebSocket] = []
         for ws in clients:
             try:
@@ -403,6 +386,7 @@ class LiveQueueManager:
             except Exception as exc:
                 logger.warning("LiveQueue broadcast error: %s", exc)
                 stale.append(ws)
+        observe_broadcast("live_queue", started, len(clients))
 
         for ws in stale:
             await self.disconnect(queue_id, date_str, ws)
@@ -425,9 +409,9 @@ class LiveQueueManager:
         rows, svc_by_user = svc.get_live_queue_users_raw(UUID(queue_id), queue_date)
         users = build_live_queue_users_raw(rows, svc_by_user)
 
-        waiting_count = sum(1 for u in users if u["status"] == QUEUE_USER_REGISTERED)
-        in_progress_count = sum(1 for u in users if u["status"] == QUEUE_USER_IN_PROGRESS)
-        completed_count = sum(1 for u in users if u["status"] == QUEUE_USER_COMPLETED)
+        waiting_count = sum(1 for u in users if u.status == QUEUE_USER_REGISTERED)
+        in_progress_count = sum(1 for u in users if u.status == QUEUE_USER_IN_PROGRESS)
+        completed_count = sum(1 for u in users if u.status == QUEUE_USER_COMPLETED)
 
         employee_on_leave = False
         open_dt: Optional[datetime] = None
@@ -447,29 +431,29 @@ class LiveQueueManager:
 
         # Sort users for display: IN_PROGRESS → REGISTERED (correct service order)
         #   → SCHEDULED (by scheduled_start) → COMPLETED
-        waiting_rank = {str(u["uuid"]): i for i, u in enumerate(ordered_waiting)}
+        waiting_rank = {u.uuid: i for i, u in enumerate(ordered_waiting)}
 
-        def _display_sort(u: dict) -> tuple:
-            s = u["status"]
+        def _display_sort(u: LiveQueueUser) -> tuple:
+            s = u.status
             if s == QUEUE_USER_IN_PROGRESS:
-                return (0, 0, "")
+                return (0, 0, time.min)
             if s == QUEUE_USER_REGISTERED:
-                return (1, waiting_rank.get(str(u["uuid"]), 9999), "")
+                return (1, waiting_rank.get(u.uuid, 9999), time.min)
             if s == QUEUE_USER_SCHEDULED:
-                return (2, 0, u.get("scheduled_start") or "99:99")
-            return (3, 0, "")  # COMPLETED
+                return (2, 0, u.scheduled_start or time.max)
+            return (3, 0, time.min)  # COMPLETED
 
         display_users = sorted(users, key=_display_sort)
 
-        def _user_payload(u: dict) -> dict:
-            wd = wait_data.get(str(u["uuid"]), {})
+        def _user_payload(u: LiveQueueUser) -> dict:
+            wd = wait_data.get(u.uuid, {})
             return {
-                **u,
-                "enqueue_time": serialise_dt(u.get("enqueue_time")),
-                "dequeue_time": serialise_dt(u.get("dequeue_time")),
-                "estimated_enqueue_time": serialise_dt(u.get("estimated_enqueue_time")),
-                "estimated_dequeue_time": serialise_dt(u.get("estimated_dequeue_time")),
-                "position": position_map.get(str(u["uuid"]), u.get("position")),
+                **u.to_dict(),
+                "enqueue_time": serialise_dt(u.enqueue_time),
+                "dequeue_time": serialise_dt(u.dequeue_time),
+                "estimated_enqueue_time": serialise_dt(u.estimated_enqueue_time),
+                "estimated_dequeue_time": serialise_dt(u.estimated_dequeue_time),
+                "position": position_map.get(u.uuid, u.position),
                 "estimated_wait_minutes": wd.get("estimated_wait_minutes"),
                 "estimated_appointment_time": wd.get("estimated_appointment_time"),
                 "expected_at_ts": wd.get("expected_at_ts"),
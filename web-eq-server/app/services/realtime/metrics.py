@@ -0,0 +1,17 @@
+"""Broadcast fan-out metrics shared by the WebSocket managers."""
+import time as _time
+
+from app.core.metrics import metrics
+
+ws_broadcast_seconds = metrics.histogram(
+    "ws_broadcast_duration_seconds", "Time to fan one update out to every subscribed socket.", ("manager",),
+)
+ws_broadcast_recipients = metrics.counter(
+    "ws_broadcast_recipients_total", "Sockets an update was sent to.", ("manager",),
+)
+
+
+def observe_broadcast(manager: str, started: float, recipients: int) -> None:
+    """Record one fan-out that began at perf_counter() == *started*."""
+    ws_broadcast_seconds.observe(_time.perf_counter() - started, manager)
+    ws_broadcast_recipients.inc(manager, amount=recipients)
@@ -7,6 +7,7 @@ Notifications are persisted to DB by notification_triggers.py before push —
 this manager only handles the live delivery channel.
 """
 import logging
+import time as _time
 from collections import defaultdict
 from typing import Any, Dict, List
 
@@ -14,6 +15,7 @@ from fastapi import WebSocket
 from starlette.websockets import WebSocketState
 
 from app.core.utils import now_iso
+from app.services.realtime.metrics import observe_broadcast
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +36,9 @@ class NotificationManager:
             self._clients.pop(user_id, None)
         logger.info("Notification WS disconnected: user_id=%s", user_id)
 
+    def connection_count(self) -> int:
+        return sum(len(sockets) for sockets in self._clients.values())
+
     async def push_to_user(self, user_id: str, payload: Any) -> None:
         clients = list(self._clients.get(user_id, []))
         if not clients:
@@ -44,6 +49,7 @@ class NotificationManager:
             "data": payload,
             "timestamp": now_iso(),
         }
+        started = _time.perf_counter()
         stale: List[WebSocket] = []
         for ws in clients:
             try:
@@ -54,6 +60,7 @@ class NotificationManager:
             except Exception as exc:
                 logger.warning("Notification push error for user %s: %s", user_id, exc)
                 stale.append(ws)
+        observe_broadcast("notification", started, len(clients))
 
         for ws in stale:
             self._clients[user_id] = [
@@ -1,4 +1,5 @@
 import logging
+import time as _time
 from fastapi import WebSocket
 from starlette.websockets import WebSocketState
 from sqlalchemy.orm import Session
@@ -10,8 +11,10 @@ from enum import Enum
 import pytz
 
 from app.services.queue_service import QueueService
+from app.services.token_allocator import token_allocator
 from app.core.constants import TIMEZONE
 from app.core.config import REDIS_URL, MAX_QUEUE_SIZE
+from app.services.realtime.metrics import observe_broadcast
 
 logger = logging.getLogger(__name__)
 
@@ -114,11 +117,15 @@ class QueueManager:
                 ws for ws in self.websocket_clients[ws_key] if ws != websocket
             ]
             logger.info(f"WebSocket disconnected: business={business_id}, date={date_str}")
+
+    def connection_count(self) -> int:
+        return sum(len(sockets) for sockets in self.websocket_clients.values())
     
     async def broadcast_to_business(self, business_id: str, date_str: str, message: Dict):
         """Broadcast message to all WebSocket clients for a business/date."""
         ws_key = f"{business_id}:{date_str}"
         clients = self.websocket_clients.get(ws_key, [])
+        started = _time.perf_counter()
         
         disconnected = []
         for websocket in clients:
@@ -130,6 +137,8 @@ class QueueManager:
             except Exception as e:
                 logger.error(f"Error broadcasting to client: {e}")
                 disconnected.append(websocket)
+        if clients:
+            observe_broadcast("queue", started, len(clients))
         
         # Clean up disconnected clients
         for ws in disconnected:
@@ -428,14 +437,8 @@ class QueueManager:
     # ─────────────────────────────────────────────────────────────────────────
     
     async def generate_token_number(self, queue_id: str, date_str: str) -> str:
-        """Generate next token number for a queue."""
-        if self.redis:
-            key = f"queue:{queue_id}:{date_str}:last_token"
-            token_num = await self.redis.incr(key)
-            return f"T{token_num:03d}"
-        else:
-            # Fallback: use timestamp-based token
-            return f"T{datetime.now().strftime('%H%M%S')}"
+        """Generate next token number for a queue (unique per queue and date, with or without Redis)."""
+        return await token_allocator.next_token(self.redis, queue_id, date_str)
 
 
 # Global instance
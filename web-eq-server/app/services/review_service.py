@@ -1,16 +1,81 @@
 import logging
+import threading
+import time as _time
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_, cast, Float
+from sqlalchemy import func, or_, cast, Float, literal, select, delete, text, union_all
+from sqlalchemy.dialects.postgresql import insert
 from fastapi import HTTPException
 from uuid import UUID
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from app.models.review import Review
+from app.core.config import FEATURED_REVIEWS_REFRESH_MINUTES
+from app.core.constants import FEATURED_REVIEWS_POOL_SIZE
+from app.models.review import Review, ReviewSummary
 from app.models.business import Business
 from app.models.user import User
+from app.schemas.review import FeaturedReviewData
 
 logger = logging.getLogger(__name__)
 
+SUMMARY_SCOPE_BUSINESS = "business"
+SUMMARY_SCOPE_EMPLOYEE = "employee"
+
+_STAR_COLUMNS = {
+    1: ReviewSummary.star_1,
+    2: ReviewSummary.star_2,
+    3: ReviewSummary.star_3,
+    4: ReviewSummary.star_4,
+    5: ReviewSummary.star_5,
+}
+
+
+def _average(rating_sum: float, rating_count: int) -> float:
+    return round(rating_sum / rating_count, 1) if rating_count else 0.0
+
+
+class FeaturedReviews:
+    """The landing page's featured reviews, precomputed per process.
+
+    refresh() runs the query on the scheduler (main.py); requests only slice the
+    stored list. A process that has not refreshed yet, or whose list is older
+    than two refresh intervals, loads it on the request path."""
+
+    def __init__(self, refresh_minutes: int) -> None:
+        self.max_age_seconds = 2 * 60 * max(1, refresh_minutes)
+        self._reviews: Optional[List[FeaturedReviewData]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, limit: int) -> List[FeaturedReviewData]:
+        with self._lock:
+            reviews, loaded_at = self._reviews, self._loaded_at
+        if reviews is None or _time.monotonic() - loaded_at > self.max_age_seconds:
+            reviews = self.refresh(db)
+        return reviews[:limit]
+
+    def refresh(self, db: Session) -> List[FeaturedReviewData]:
+        rows = (
+            db.query(Review)
+            .join(Business, Review.business_id == Business.uuid)
+            .options(joinedload(Review.user), joinedload(Review.business))
+            .filter(Review.comment.isnot(None), Review.comment != "", Review.rating >= 4)
+            .order_by(Review.created_at.desc())
+            .limit(FEATURED_REVIEWS_POOL_SIZE)
+            .all()
+        )
+        reviews = [FeaturedReviewData.from_review(r) for r in rows]
+        with self._lock:
+            self._reviews, self._loaded_at = reviews, _time.monotonic()
+        return reviews
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._reviews = None
+
+
+# Global singleton
+featured_reviews = FeaturedReviews(FEATURED_REVIEWS_REFRESH_MINUTES)
+
 
 class ReviewService:
     def __init__(self, db: Session):
@@ -29,8 +94,13 @@ class ReviewService:
                 comment=data.get("comment"),
             )
             self.db.add(review)
+            self._add_to_summary(SUMMARY_SCOPE_BUSINESS, review.business_id, review.rating)
+            if review.employee_id is not None:
+                self._add_to_summary(SUMMARY_SCOPE_EMPLOYEE, review.employee_id, review.rating)
             self.db.commit()
             self.db.refresh(review)
+            if review.rating >= 4 and review.comment:
+                featured_reviews.invalidate()
             return review
         except Exception:
             self.db.rollback()
@@ -60,45 +130,100 @@ class ReviewService:
             logger.exception("Failed to get_reviews_by_business (business_id=%s)", business_id)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
+    def _add_to_summary(self, scope: str, subject_id: UUID, rating: float) -> None:
+        star = _STAR_COLUMNS[min(5, max(1, round(rating)))]
+        stmt = insert(ReviewSummary).values(
+            scope=scope, subject_id=subject_id, rating_count=1, rating_sum=rating,
+            **{column.key: int(column is star) for column in _STAR_COLUMNS.values()},
+        )
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[ReviewSummary.scope, ReviewSummary.subject_id],
+            set_={
+                "rating_count": ReviewSummary.rating_count + 1,
+                "rating_sum": ReviewSummary.rating_sum + rating,
+                star.key: star + 1,
+                "updated_at": func.now(),
+            },
+        ))
+
+    def _get_summary(self, scope: str, subject_id: UUID) -> Optional[ReviewSummary]:
+        return self.db.get(ReviewSummary, (scope, subject_id))
+
     def get_review_summary_by_business(self, business_id: UUID) -> Tuple[float, int]:
         try:
-            result = (
-                self.db.query(
-                    func.coalesce(func.avg(Review.rating), 0.0),
-                    func.count(Review.uuid)
-                )
-                .filter(Review.business_id == business_id)
-                .first()
-            )
-            avg_rating = round(float(result[0]), 1) if result else 0.0
-            count = int(result[1]) if result else 0
-            return avg_rating, count
+            summary = self._get_summary(SUMMARY_SCOPE_BUSINESS, business_id)
+            if summary is None:
+                return 0.0, 0
+            return _average(summary.rating_sum, summary.rating_count), summary.rating_count
         except Exception:
             logger.exception("Failed to get_review_summary_by_business (business_id=%s)", business_id)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
+    def get_rating_histogram_by_business(self, business_id: UUID) -> Dict[int, int]:
+        """Review count per star (1-5) for the business detail page."""
+        try:
+            summary = self._get_summary(SUMMARY_SCOPE_BUSINESS, business_id)
+            return {
+                star: getattr(summary, column.key) if summary is not None else 0
+                for star, column in _STAR_COLUMNS.items()
+            }
+        except Exception:
+            logger.exception("Failed to get_rating_histogram_by_business (business_id=%s)", business_id)
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
     def get_review_summaries_by_businesses(self, business_ids: List[UUID]) -> dict[UUID, Tuple[float, int]]:
         if not business_ids:
             return {}
         try:
             results = (
-                self.db.query(
-                    Review.business_id,
-                    func.coalesce(func.avg(Review.rating), 0.0),
-                    func.count(Review.uuid)
+                self.db.query(ReviewSummary.subject_id, ReviewSummary.rating_sum, ReviewSummary.rating_count)
+                .filter(
+                    ReviewSummary.scope == SUMMARY_SCOPE_BUSINESS,
+                    ReviewSummary.subject_id.in_(business_ids),
+                    ReviewSummary.rating_count > 0,
                 )
-                .filter(Review.business_id.in_(business_ids))
-                .group_by(Review.business_id)
                 .all()
             )
-            summaries: dict[UUID, Tuple[float, int]] = {}
-            for business_id, avg_rating, count in results:
-                summaries[business_id] = (round(float(avg_rating), 1), int(count))
-            return summaries
+            return {
+                business_id: (_average(rating_sum, count), count)
+                for business_id, rating_sum, count in results
+            }
         except Exception:
             logger.exception("Failed to get_review_summaries_by_businesses")
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
+    def reconcile_summaries(self) -> int:
+        """Rebuild review_summaries from reviews. Returns the number of summary rows."""
+        try:
+            rounded = func.round(cast(Review.rating, Float))
+            stars = [func.count().filter(rounded == star) for star in _STAR_COLUMNS]
+            by_business = (
+                select(literal(SUMMARY_SCOPE_BUSINESS), Review.business_id, func.count(), func.sum(Review.rating), *stars)
+                .group_by(Review.business_id)
+            )
+            by_employee = (
+                select(literal(SUMMARY_SCOPE_EMPLOYEE), Review.employee_id, func.count(), func.sum(Review.rating), *stars)
+                .where(Review.employee_id.isnot(None))
+                .group_by(Review.employee_id)
+            )
+            columns = ["scope", "subject_id", "rating_count", "rating_sum", *(c.key for c in _STAR_COLUMNS.values())]
+            # Blocks the _add_to_summary upserts (ROW EXCLUSIVE) until commit, and waits for
+            # in-flight ones, so the rebuild below neither loses nor double-counts a review.
+            self.db.execute(text(f"LOCK TABLE {ReviewSummary.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+            self.db.execute(delete(ReviewSummary))
+            result = self.db.execute(
+                insert(ReviewSummary).from_select(columns, union_all(by_business, by_employee))
+            )
+            self.db.commit()
+            return result.rowcount
+        except Exception:
+            self.db.rollback()
+            logger.exception("Failed to reconcile_summaries")
+            raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
+
+    def has_summaries(self) -> bool:
+        return self.db.query(ReviewSummary.scope).limit(1).first() is not None
+
     def get_user_review_for_business(self, user_id: UUID, business_id: UUID) -> Optional[Review]:
         try:
             return (
@@ -146,17 +271,10 @@ class ReviewService:
 
     def get_review_summary_by_employee(self, employee_id: UUID) -> Tuple[float, int]:
         try:
-            result = (
-                self.db.query(
-                    func.coalesce(func.avg(Review.rating), 0.0),
-                    func.count(Review.uuid)
-                )
-                .filter(Review.employee_id == employee_id)
-                .first()
-            )
-            avg_rating = round(float(result[0]), 1) if result else 0.0
-            count = int(result[1]) if result else 0
-            return avg_rating, count
+            summary = self._get_summary(SUMMARY_SCOPE_EMPLOYEE, employee_id)
+            if summary is None:
+                return 0.0, 0
+            return _average(summary.rating_sum, summary.rating_count), summary.rating_count
         except Exception:
             logger.exception("Failed to get_review_summary_by_employee (employee_id=%s)", employee_id)
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
@@ -185,31 +303,23 @@ class ReviewService:
 
     def get_all_reviews_summary(self) -> Tuple[float, int]:
         try:
-            result = (
+            # Every review has a business, so the business rows cover them all.
+            rating_sum, count = (
                 self.db.query(
-                    func.coalesce(func.avg(Review.rating), 0.0),
-                    func.count(Review.uuid)
+                    func.coalesce(func.sum(ReviewSummary.rating_sum), 0.0),
+                    func.coalesce(func.sum(ReviewSummary.rating_count), 0),
                 )
-                .first()
+                .filter(ReviewSummary.scope == SUMMARY_SCOPE_BUSINESS)
+                .one()
             )
-            avg_rating = round(float(result[0]), 1) if result else 0.0
-            count = int(result[1]) if result else 0
-            return avg_rating, count
+            return _average(float(rating_sum), int(count)), int(count)
         except Exception:
             logger.exception("Failed to get_all_reviews_summary")
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
 
-    def get_featured_reviews(self, limit: int = 6) -> List[Review]:
+    def get_featured_reviews(self, limit: int = 6) -> List[FeaturedReviewData]:
         try:
-            return (
-                self.db.query(Review)
-                .join(Business, Review.business_id == Business.uuid)
-                .options(joinedload(Review.user), joinedload(Review.business))
-                .filter(Review.comment.isnot(None), Review.comment != "", Review.rating >= 4)
-                .order_by(Review.created_at.desc())
-                .limit(limit)
-                .all()
-            )
+            return featured_reviews.get(self.db, limit)
         except Exception:
             logger.exception("Failed to get_featured_reviews")
             raise HTTPException(status_code=500, detail={"message": "An unexpected error occurred. Please try again."})
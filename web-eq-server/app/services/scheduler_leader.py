@@ -0,0 +1,148 @@
+"""
+SchedulerLeader — makes exactly one worker process run the APScheduler jobs.
+
+Every worker starts a scheduler, but each job is wrapped with guard() and only
+runs in the worker holding a session-level Postgres advisory lock
+(pg_try_advisory_lock(SCHEDULER_LEADER_LOCK_ID)) on a dedicated connection.
+
+* Leader:   checks its connection every SCHEDULER_LEADER_RETRY_SECONDS. If the
+            connection is gone the lock is gone with it, so it steps down.
+* Follower: retries the lock on the same interval. When the leader process dies
+            Postgres drops its session and the lock, and a follower takes over
+            within one retry interval.
+
+The lock connection runs in AUTOCOMMIT so it never sits idle in a transaction;
+it is invalidated (not returned to the pool) when leadership is lost, so a
+pooled connection can never keep holding the lock.
+"""
+import logging
+import threading
+import time as _time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import SCHEDULER_LEADER_LOCK_ID, SCHEDULER_LEADER_RETRY_SECONDS
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerLeader:
+    def __init__(
+        self,
+        lock_id: int = SCHEDULER_LEADER_LOCK_ID,
+        retry_seconds: int = SCHEDULER_LEADER_RETRY_SECONDS,
+    ) -> None:
+        self.lock_id = lock_id
+        self.retry_seconds = max(1, retry_seconds)
+        self._conn: Optional[Connection] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._leader_since: Optional[float] = None
+        self.elections = 0
+        self.skipped_runs = 0
+
+    @property
+    def is_leader(self) -> bool:
+        return self._conn is not None
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Try for the lock once (so startup work can check is_leader), then keep
+        checking in a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._tick()
+        self._thread = threading.Thread(target=self._run, name="scheduler-leader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Release the lock so a follower can take over without waiting for a timeout."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        conn = self._conn
+        if conn is None:
+            return
+        self._conn = None
+        try:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": self.lock_id})
+            conn.close()
+            logger.info("Scheduler leadership released")
+        except Exception:
+            conn.invalidate()
+            conn.close()
+
+    # ── Jobs ──────────────────────────────────────────────────────────────────
+
+    def guard(self, fn: Callable[[], None]) -> Callable[[], None]:
+        """Wrap a scheduler job so it only runs on the leader."""
+        def run() -> None:
+            if not self.is_leader:
+                self.skipped_runs += 1
+                return
+            fn()
+        run.__name__ = getattr(fn, "__name__", "job")
+        return run
+
+    def status(self) -> Dict[str, float]:
+        since = self._leader_since
+        return {
+            "is_leader": int(self.is_leader),
+            "leader_for_seconds": round(_time.monotonic() - since, 1) if since is not None and self.is_leader else 0,
+            "elections": self.elections,
+            "skipped_runs": self.skipped_runs,
+        }
+
+    # ── Election ──────────────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.retry_seconds):
+            self._tick()
+
+    def _tick(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT 1"))
+                return
+            except Exception:
+                logger.warning("Scheduler leader lost its lock connection; stepping down", exc_info=True)
+                self._step_down()
+        try:
+            conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        except Exception:
+            logger.warning("Scheduler leader election: cannot connect", exc_info=True)
+            return
+        try:
+            acquired = conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": self.lock_id}).scalar()
+        except Exception:
+            logger.warning("Scheduler leader election failed", exc_info=True)
+            conn.invalidate()
+            conn.close()
+            return
+        if not acquired:
+            conn.close()
+            return
+        self._conn = conn
+        self._leader_since = _time.monotonic()
+        self.elections += 1
+        logger.info("This worker is now the scheduler leader (lock %d)", self.lock_id)
+
+    def _step_down(self) -> None:
+        conn, self._conn = self._conn, None
+        self._leader_since = None
+        if conn is not None:
+            try:
+                conn.invalidate()
+                conn.close()
+            except Exception:
+                pass
+
+
+# Global singleton
+scheduler_leader = SchedulerLeader()
@@ -13,6 +13,7 @@ from sqlalchemy.orm import Session
 from app.models.queue import Queue, AppointmentSlot
 from app.services.queue_service import QueueService
 from app.services.booking_calculation_service import BookingCalculationService
+from app.core.utils import work_calendar
 from app.core.constants import BOOKING_MODE_FIXED, BOOKING_MODE_APPROXIMATE, BOOKING_MODE_HYBRID, DEFAULT_SLOT_MINUTES, SLOT_DURATION_FLOOR, SLOT_DURATION_CEILING
 
 logger = logging.getLogger(__name__)
@@ -24,14 +25,6 @@ def _time_add(t: time, delta_minutes: int, ref_date: date) -> time:
     return dt.time()
 
 
-def _overlaps_break(slot_start: time, slot_end: time, breaks: List[tuple]) -> bool:
-    """True if [slot_start, slot_end) overlaps any (break_start, break_end)."""
-    for b_start, b_end in breaks:
-        if slot_start < b_end and slot_end > b_start:
-            return True
-    return False
-
-
 class SlotGenerationService:
     """Generate and retrieve appointment slots for a queue on a given date."""
 
@@ -107,6 +100,7 @@ class SlotGenerationService:
         raw_interval = queue.slot_interval_minutes
         slot_interval = raw_interval if (raw_interval is not None and int(raw_interval) > 0) else slot_duration  # type: ignore[operator]
         capacity = max(1, queue.max_per_slot or 1)  # type: ignore[operator]
+        calendar = work_calendar(breaks)
 
         slots: List[AppointmentSlot] = []
         current = open_time
@@ -118,7 +112,7 @@ class SlotGenerationService:
             # it will be numerically less than current, causing an infinite loop.
             if slot_end <= current or slot_end > close_time:
                 break
-            if not _overlaps_break(current, slot_end, breaks):
+            if not calendar.overlaps_break(current, slot_end):
                 slots.append(
                     AppointmentSlot(
                         queue_id=queue.uuid,
@@ -0,0 +1,157 @@
+"""
+TokenAllocator — per-(queue, date) token numbers that stay unique across restarts,
+Redis flushes, Redis outages and several workers.
+
+Postgres (queue_token_counters.last_number) is the single source of numbers: it
+hands out disjoint blocks of TOKEN_LEASE_BLOCK_SIZE in one atomic
+UPDATE ... RETURNING, and every token comes from exactly one leased block. A
+day's row starts above the tokens already issued for it — in queue_users, or by
+a plain Redis INCR counter from before the blocks existed.
+
+* Redis up:   the block currently being used is shared through Redis — the
+              counter queue:{id}:{date}:last_token INCRs up to the block's end
+              (queue:{id}:{date}:token_block_end), so numbers stay dense across
+              workers. When the block is used up, or the keys are gone (flush /
+              eviction), the worker that notices leases the next block and
+              installs it (or parks it as the next block if another worker
+              got there first).
+* Redis down: the worker hands out a block it leased for itself, locally.
+
+Another worker's outage lease can therefore never overlap the Redis block: both
+were carved out of the same Postgres counter. A booking costs one Redis round
+trip (or none, inside a local block) plus one Postgres round trip per block.
+Numbers skip where a block is abandoned (three workers racing for the next Redis
+block, a flushed counter, a restart); they never repeat, but a worker that
+falls back to its local block mid-day issues numbers below the shared counter.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+from app.core.config import TOKEN_LEASE_BLOCK_SIZE
+from app.core.utils import today_app_date
+from app.db.database import SessionLocal
+from app.services.queue_service import QueueService
+
+logger = logging.getLogger(__name__)
+
+# KEYS: counter (last number issued), end of the installed block, next block ("first:last").
+# Next number of the installed block — switching to the parked next block when it is
+# used up — or -1 - counter when there is nothing left (keys gone: -1). A counter
+# with no block end is a pre-block INCR counter, and the first lease must start above it.
+_NEXT_IN_BLOCK = """
+local cur = tonumber(redis.call('GET', KEYS[1]))
+local last = tonumber(redis.call('GET', KEYS[2]))
+if cur and last and cur < last then return redis.call('INCR', KEYS[1]) end
+local nxt = redis.call('GET', KEYS[3])
+if not nxt then return -1 - (cur or 0) end
+local first, next_last = string.match(nxt, '(%d+):(%d+)')
+redis.call('SET', KEYS[1], tonumber(first) - 1, 'EX', tonumber(ARGV[1]))
+redis.call('SET', KEYS[2], next_last, 'EX', tonumber(ARGV[1]))
+redis.call('DEL', KEYS[3])
+return redis.call('INCR', KEYS[1])
+"""
+
+# Installs the freshly leased block [ARGV[1], ARGV[2]] and takes a number. If another
+# worker installed one in the meantime, ours is parked as the next block instead —
+# abandoned (a gap, never a repeat) only when a next block is already parked too.
+_INSTALL_BLOCK = """
+local cur = tonumber(redis.call('GET', KEYS[1]))
+local last = tonumber(redis.call('GET', KEYS[2]))
+if not cur or not last or cur >= last then
+  redis.call('SET', KEYS[1], tonumber(ARGV[1]) - 1, 'EX', tonumber(ARGV[3]))
+  redis.call('SET', KEYS[2], ARGV[2], 'EX', tonumber(ARGV[3]))
+else
+  redis.call('SET', KEYS[3], ARGV[1] .. ':' .. ARGV[2], 'NX', 'EX', tonumber(ARGV[3]))
+end
+return redis.call('INCR', KEYS[1])
+"""
+
+_COUNTER_TTL_SECONDS = 3 * 24 * 3600
+
+Key = Tuple[str, str]  # (queue_id, date_str)
+
+
+def format_token(number: int) -> str:
+    return f"T{number:03d}"
+
+
+class TokenAllocator:
+    def __init__(self, block_size: int = TOKEN_LEASE_BLOCK_SIZE) -> None:
+        self.block_size = max(1, block_size)
+        self._locks: Dict[Key, asyncio.Lock] = defaultdict(asyncio.Lock)
+        # Locally leased numbers for the Redis-down path: key -> [next, last]. Kept
+        # while Redis works again — nobody else can issue them — for the next outage.
+        self._blocks: Dict[Key, List[int]] = {}
+
+    async def next_token(self, redis: Any, queue_id: str, date_str: str) -> str:
+        return format_token(await self.next_number(redis, queue_id, date_str))
+
+    async def next_number(self, redis: Any, queue_id: str, date_str: str) -> int:
+        key = (queue_id, date_str)
+        if key not in self._locks:
+            self._forget_past_days()
+        async with self._locks[key]:
+            if redis is not None:
+                try:
+                    return await self._next_from_redis(redis, key)
+                except Exception:
+                    logger.warning(
+                        "Redis token counter failed (queue=%s date=%s); using a leased block",
+                        queue_id, date_str, exc_info=True,
+                    )
+            return self._next_from_block(key)
+
+    # ── Redis path ────────────────────────────────────────────────────────────
+
+    async def _next_from_redis(self, redis: Any, key: Key) -> int:
+        prefix = f"queue:{key[0]}:{key[1]}"
+        redis_keys = (f"{prefix}:last_token", f"{prefix}:token_block_end", f"{prefix}:token_next_block")
+        number = int(await redis.eval(_NEXT_IN_BLOCK, 3, *redis_keys, _COUNTER_TTL_SECONDS))
+        if number < 0:
+            last = self._lease(key, floor=-1 - number)
+            first = last - self.block_size + 1
+            try:
+                number = int(await redis.eval(_INSTALL_BLOCK, 3, *redis_keys, first, last, _COUNTER_TTL_SECONDS))
+            except Exception:
+                # Keep the lease for the local fallback rather than abandoning it.
+                if key not in self._blocks:
+                    self._blocks[key] = [first, last]
+                raise
+        return number
+
+    # ── Postgres lease path ───────────────────────────────────────────────────
+
+    def _next_from_block(self, key: Key) -> int:
+        block = self._blocks.get(key)
+        if block is None or block[0] > block[1]:
+            last = self._lease(key)
+            block = self._blocks[key] = [last - self.block_size + 1, last]
+        number = block[0]
+        block[0] += 1
+        return number
+
+    def _forget_past_days(self) -> None:
+        today = today_app_date().isoformat()
+        for key in [k for k in self._blocks if k[1] < today]:
+            del self._blocks[key]
+        for key in [k for k, lock in self._locks.items() if k[1] < today and not lock.locked()]:
+            del self._locks[key]
+
+    # ── Durable counter (own short transaction, never tied to a booking) ─────
+
+    def _lease(self, key: Key, floor: int = 0) -> int:
+        db = SessionLocal()
+        try:
+            return QueueService(db).lease_token_block(
+                UUID(key[0]), date.fromisoformat(key[1]), self.block_size, floor
+            )
+        finally:
+            db.close()
+
+
+# Global singleton
+token_allocator = TokenAllocator()
@@ -0,0 +1,173 @@
+"""
+UnreadInvalidation — keeps the per-process unread counters
+(notification_service.UnreadCounters) in step across workers.
+
+A NotificationService write that changes a user's unread count (create,
+create_many, mark_read, mark_all_read) publishes the user id on the Redis
+channel UNREAD_INVALIDATION_CHANNEL. Every other worker drops that user's
+cached count, so its next read does the COUNT; the writing worker has already
+adjusted its own counter and skips its own messages.
+
+Writes run in threads (threadpool endpoints, the outbox insert, the scheduler),
+so publish() hands user ids to the loop with call_soon_threadsafe; one task
+publishes them, another listens. While the subscription is down messages can be
+missed, so every cached count is dropped each time it (re)subscribes; without
+Redis each process only sees its own writes and the unread_reconcile job bounds
+the drift.
+"""
+import asyncio
+import logging
+import time as _time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from app.core.config import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+UNREAD_INVALIDATION_CHANNEL = "notifications:unread_invalidate"
+
+_RETRY_BASE_SECONDS = 0.5
+_RETRY_MAX_SECONDS = 30.0
+
+
+class UnreadInvalidation:
+    def __init__(self, redis_url: str) -> None:
+        self.redis_url = redis_url
+        # Identifies this process's messages on the shared channel
+        self.origin = uuid.uuid4().hex
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._on_invalidate: Callable[[UUID], None] = lambda user_id: None
+        self._on_reset: Callable[[], None] = lambda: None
+        self._counters: Dict[str, int] = {"published": 0, "publish_failed": 0, "received": 0, "resets": 0}
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self, on_invalidate: Callable[[UUID], None], on_reset: Callable[[], None]) -> None:
+        """Start publishing and listening on the running event loop (idempotent).
+        *on_invalidate* drops one user's cached count, *on_reset* all of them."""
+        if self._tasks:
+            return
+        self._on_invalidate = on_invalidate
+        self._on_reset = on_reset
+        self._queue = asyncio.Queue()
+        self._loop = asyncio.get_running_loop()
+        self._tasks = [
+            asyncio.create_task(self._publish_loop(), name="unread-invalidation-publish"),
+            asyncio.create_task(self._listen_loop(), name="unread-invalidation-listen"),
+        ]
+
+    async def stop(self) -> None:
+        self._loop = None
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def metrics(self) -> Dict[str, int]:
+        return dict(self._counters)
+
+    # ── Producer side (any thread) ───────────────────────────────────────────
+
+    def publish(self, user_ids: Iterable[UUID]) -> None:
+        """Tell the other workers these users' unread counts changed. No-op when
+        not started (scripts, tests, a single process)."""
+        loop, queue = self._loop, self._queue
+        if loop is None or queue is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, [str(user_id) for user_id in user_ids])
+        except RuntimeError:  # loop closed between the check and the call
+            pass
+
+    # ── Workers ──────────────────────────────────────────────────────────────
+
+    async def _connect(self) -> Any:
+        from redis import asyncio as aioredis
+        client = aioredis.from_url(self.redis_url, decode_responses=True)
+        try:
+            await client.ping()
+        except BaseException:
+            await client.aclose()
+            raise
+        return client
+
+    async def _publish_loop(self) -> None:
+        assert self._queue is not None
+        client = None
+        retry_at = 0.0
+        failures = 0
+        try:
+            while True:
+                batch = await self._queue.get()
+                while not self._queue.empty():
+                    batch.extend(self._queue.get_nowait())
+                if _time.monotonic() < retry_at:
+                    self._counters["publish_failed"] += len(batch)
+                    continue
+                try:
+                    if client is None:
+                        client = await self._connect()
+                    await client.publish(UNREAD_INVALIDATION_CHANNEL, " ".join([self.origin, *batch]))
+                    self._counters["published"] += len(batch)
+                    failures = 0
+                except Exception:
+                    # Other workers keep serving their cached counts until unread_reconcile.
+                    self._counters["publish_failed"] += len(batch)
+                    logger.warning("Unread invalidation: publish of %d user(s) failed", len(batch),
+                                   exc_info=failures == 0)
+                    retry_at = _time.monotonic() + min(_RETRY_MAX_SECONDS, _RETRY_BASE_SECONDS * 2 ** failures)
+                    failures += 1
+                    if client is not None:
+                        await client.aclose()
+                        client = None
+        finally:
+            if client is not None:
+                await client.aclose()
+
+    async def _listen_loop(self) -> None:
+        failures = 0
+        while True:
+            client = None
+            try:
+                client = await self._connect()
+                async with client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(UNREAD_INVALIDATION_CHANNEL)
+                    if failures:
+                        logger.info("Unread invalidation: subscribed again after %d failure(s)", failures)
+                    failures = 0
+                    # Anything published while we were not subscribed is lost.
+                    self._on_reset()
+                    self._counters["resets"] += 1
+                    async for message in pubsub.listen():
+                        self._handle(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except ImportError:
+                logger.warning("redis package not available; unread counts are not shared across workers")
+                return
+            except Exception:
+                logger.warning("Unread invalidation: subscription failed", exc_info=failures == 0)
+            finally:
+                if client is not None:
+                    await client.aclose()
+            await asyncio.sleep(min(_RETRY_MAX_SECONDS, _RETRY_BASE_SECONDS * 2 ** failures))
+            failures += 1
+
+    def _handle(self, data: str) -> None:
+        origin, *user_ids = data.split()
+        if origin == self.origin:
+            return
+        for user_id in user_ids:
+            try:
+                self._on_invalidate(UUID(user_id))
+            except ValueError:
+                continue
+            self._counters["received"] += 1
+
+
+# Global singleton
+unread_invalidation = UnreadInvalidation(REDIS_URL)
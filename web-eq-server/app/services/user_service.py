@@ -19,6 +19,13 @@ from app.utils.pagination import paginate_query
 logger = logging.getLogger(__name__)
 
 
+def _phone_display(country_code: Optional[str], phone_number: Optional[str]) -> str:
+    phone_number = (phone_number or "").strip()
+    if country_code and phone_number:
+        return f"{country_code} {phone_number}"
+    return phone_number
+
+
 class UserService:
     def __init__(self, db: Session):
         self.db = db
@@ -190,6 +197,66 @@ class UserService:
         limit: int = 20,
         search: Optional[str] = None,
     ) -> Tuple[List[AppointmentUserItem], int]:
+        base_grouped = self._users_with_appointments_query(business_id, queue_id, search)
+        rows, total = paginate_query(
+            base_grouped,
+            page=page,
+            limit=limit,
+            order_by=func.max(QueueUser.created_at).desc(),
+        )
+
+        items: List[AppointmentUserItem] = []
+        for row in rows:
+            items.append(
+                AppointmentUserItem(
+                    user_id=str(row.user_id),
+                    full_name=row.full_name,
+                    email=row.email,
+                    country_code=row.country_code,
+                    phone_number=_phone_display(row.country_code, row.phone_number),
+                    total_appointments=row.total_appointments or 0,
+                    last_visit_date=row.last_visit_date,
+                )
+            )
+        return items, total
+
+    def iter_users_with_appointments_export(
+        self,
+        business_id: Optional[UUID] = None,
+        queue_id: Optional[UUID] = None,
+        limit: int = 1_000_000,
+        batch_size: int = 2000,
+    ):
+        """Yield (name, email, phone, total_appointments, last_visit_date) export rows,
+        newest visit first, through a server-side cursor (yield_per) so only
+        *batch_size* rows are held at a time."""
+        query = (
+            self._users_with_appointments_query(business_id, queue_id, None)
+            .order_by(func.max(QueueUser.created_at).desc())
+            .limit(limit)
+        )
+        for row in query.yield_per(batch_size):
+            yield (
+                row.full_name or "",
+                row.email or "",
+                _phone_display(row.country_code, row.phone_number),
+                row.total_appointments or 0,
+                row.last_visit_date.date() if row.last_visit_date else None,
+            )
+
+    def count_users_with_appointments(
+        self,
+        business_id: Optional[UUID] = None,
+        queue_id: Optional[UUID] = None,
+    ) -> int:
+        return self._users_with_appointments_query(business_id, queue_id, None).count()
+
+    def _users_with_appointments_query(
+        self,
+        business_id: Optional[UUID],
+        queue_id: Optional[UUID],
+        search: Optional[str],
+    ):
         base = (
             self.db.query(
                 User.uuid.label("user_id"),
@@ -218,32 +285,6 @@ class UserService:
                 )
             )
 
-        base_grouped = base.group_by(User.uuid, User.full_name, User.email, User.country_code, User.phone_number)
-        rows, total = paginate_query(
-            base_grouped,
-            page=page,
-            limit=limit,
-            order_by=func.max(QueueUser.created_at).desc(),
-        )
-
-        items: List[AppointmentUserItem] = []
-        for row in rows:
-            phone_number = (row.phone_number or "").strip()
-            if row.country_code and phone_number:
-                phone_display = f"{row.country_code} {phone_number}"
-            else:
-                phone_display = phone_number
-            items.append(
-                AppointmentUserItem(
-                    user_id=str(row.user_id),
-                    full_name=row.full_name,
-                    email=row.email,
-                    country_code=row.country_code,
-                    phone_number=phone_display,
-                    total_appointments=row.total_appointments or 0,
-                    last_visit_date=row.last_visit_date,
-                )
-            )
-        return items, total
+        return base.group_by(User.uuid, User.full_name, User.email, User.country_code, User.phone_number)
 
 
@@ -1,22 +1,51 @@
+import hmac
 import os
 import logging
 import uvicorn
 from contextlib import asynccontextmanager
-from datetime import date
+from datetime import date, timedelta
+from typing import Optional
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from apscheduler.schedulers.background import BackgroundScheduler
 from sqlalchemy.exc import IntegrityError
 
 from app.routers.routers import routers
 from app.db.database import engine, Base, SessionLocal
+from app.core.metrics import metrics
+from app.core.profiling import profiler
 from app.middleware.auth_middleware import AuthMiddleware
+from app.middleware.metrics_middleware import MetricsMiddleware
+from app.middleware.query_budget_middleware import QueryBudgetMiddleware
+from app.middleware.profiling_middleware import ProfilingMiddleware, profile_sync_endpoints
+from app.db.query_budget import query_report
+from app.services import app_metrics  # noqa: F401  (registers the /metrics collectors)
 from app.services.queue_service import QueueService
+from app.services.activation_timer import activation_timer
+from app.services.export_jobs import export_jobs
+from app.services.job_metrics import job_metrics
+from app.services.notification_outbox import notification_outbox
+from app.services.unread_invalidation import unread_invalidation
+from app.services.notification_service import NotificationService, unread_counters
+from app.services.otp_service import OTPService
+from app.services.platform_counter_service import PlatformCounterService, install_platform_counter_triggers
+from app.services.queue_stats_service import QueueStatsService
+from app.services.review_service import ReviewService, featured_reviews
+from app.services.scheduler_leader import scheduler_leader
 from app.controllers.queue_controller import QueueController
-from app.core.config import CORS_ORIGINS
-from app.core.utils import today_app_date, current_time_app_tz
-from app.core.constants import QUEUE_USER_SCHEDULED, APPOINTMENT_TYPE_FIXED, APPOINTMENT_TYPE_APPROXIMATE
+from app.core.config import (
+    CORS_ORIGINS,
+    FEATURED_REVIEWS_REFRESH_MINUTES,
+    METRICS_TOKEN,
+    NOTIFICATION_RETENTION_BATCH_SIZE,
+    NOTIFICATION_RETENTION_DAYS,
+    NOTIFICATION_RETENTION_MODE,
+    QUEUE_STATS_BACKFILL_DAYS,
+    QUEUE_STATS_ROLLUP_MINUTES,
+    SCHEDULED_ACTIVATION_SWEEP_MINUTES,
+)
+from app.core.utils import today_app_date, current_time_app_tz, now_app_tz, now_utc
 
 # Import all models to ensure they're registered with SQLAlchemy
 from app.models import (
@@ -28,64 +57,68 @@ from app.models import (
 
 # Create the database schema
 Base.metadata.create_all(bind=engine)
+# create_all skips tables that already exist — add indexes declared on them later.
+for _table in Base.metadata.sorted_tables:
+    for _index in _table.indexes:
+        _index.create(bind=engine, checkfirst=True)
+install_platform_counter_triggers(engine)
 
 logger = logging.getLogger(__name__)
 
 
-def run_migration_job() -> None:
+def run_migration_job() -> bool:
     """One-time startup migration: convert existing Fixed/Approximate REGISTERED appointments to SCHEDULED.
     Idempotent — safe to run on every startup."""
     db = SessionLocal()
     try:
-        from app.models.queue import QueueUser
-        today = today_app_date()
-        updated = (
-            db.query(QueueUser)
-            .filter(
-                QueueUser.status == 1,  # QUEUE_USER_REGISTERED — avoid circular import at module level
-                QueueUser.appointment_type.in_([APPOINTMENT_TYPE_FIXED, APPOINTMENT_TYPE_APPROXIMATE]),
-                QueueUser.queue_date >= today,
-            )
-            .update({QueueUser.status: QUEUE_USER_SCHEDULED}, synchronize_session=False)
-        )
-        db.commit()
+        updated = QueueService(db).schedule_registered_slot_appointments(today_app_date())
         if updated:
             logger.info("Migration: converted %d Fixed/Approximate appointments to SCHEDULED", updated)
+        return True
     except Exception:
-        db.rollback()
         logger.exception("Migration job failed")
+        return False
     finally:
         db.close()
 
 
-def run_expiry_job() -> None:
+def run_expiry_job() -> bool:
     db = SessionLocal()
     try:
         today = today_app_date()
         updated = QueueService(db).expire_past_day_appointments(today)
         if updated:
             logger.info("Expiry job: marked %d appointment(s) as expired (before %s)", updated, today)
+        return True
     except Exception:
         logger.exception("Expiry job failed")
+        return False
     finally:
         db.close()
 
 
-def run_activate_scheduled_job() -> None:
+def run_activate_scheduled_job() -> bool:
+    """Safety-net sweep: activate whatever the activation timer missed, then
+    reload the timer with today's pending appointments."""
     db = SessionLocal()
     try:
         today = today_app_date()
         now_time = current_time_app_tz()
-        updated = QueueService(db).activate_due_scheduled_appointments(today, now_time)
-        if updated:
-            logger.info("Activate job: started %d scheduled appointment(s) at %s", updated, now_time)
+        svc = QueueService(db)
+        activated = svc.activate_due_scheduled_appointments(today, now_time)
+        if activated:
+            logger.info("Activate job: started %d scheduled appointment(s) at %s", sum(activated.values()), now_time)
+            activation_timer.broadcast_threadsafe(activated, today.isoformat())
+        activation_timer.load(today, svc.get_pending_scheduled_activations(today))
+        return True
     except Exception:
         logger.exception("Activate scheduled appointments job failed")
+        return False
     finally:
         db.close()
 
 
-def run_eta_notification_job() -> None:
+def run_eta_notification_job() -> bool:
     """Every minute: send 'Time to Head Out!' push when wait <= customer's eta_minutes."""
     db = SessionLocal()
     try:
@@ -93,26 +126,235 @@ def run_eta_notification_job() -> None:
         eta_notified = controller.check_and_notify_eta()
         if eta_notified:
             logger.info("ETA notification job: sent %d heading-now notification(s)", eta_notified)
+        return True
     except Exception:
         logger.exception("ETA notification job failed")
+        return False
+    finally:
+        db.close()
+
+
+def run_unread_reconcile_job() -> bool:
+    """Every 10 min: correct cached unread-notification counters against the DB."""
+    db = SessionLocal()
+    try:
+        drift = NotificationService(db).reconcile_unread_counts()
+        if drift:
+            logger.info("Unread reconcile job: corrected %d cached count(s)", drift)
+        return True
+    except Exception:
+        logger.exception("Unread reconcile job failed")
+        return False
+    finally:
+        db.close()
+
+
+def run_notification_retention_job() -> bool:
+    """Nightly: archive (or delete) read notifications older than the retention horizon."""
+    if NOTIFICATION_RETENTION_DAYS <= 0:
+        return True
+    db = SessionLocal()
+    try:
+        cutoff = now_app_tz() - timedelta(days=NOTIFICATION_RETENTION_DAYS)
+        removed = NotificationService(db).purge_read_before(
+            cutoff,
+            NOTIFICATION_RETENTION_BATCH_SIZE,
+            archive=NOTIFICATION_RETENTION_MODE != "delete",
+        )
+        if removed:
+            logger.info(
+                "Notification retention job: %s %d read notification(s) created before %s",
+                "deleted" if NOTIFICATION_RETENTION_MODE == "delete" else "archived", removed, cutoff,
+            )
+        return True
+    except Exception:
+        logger.exception("Notification retention job failed")
+        return False
+    finally:
+        db.close()
+
+
+def _leader_job(name: str, fn, warn_after_seconds=None):
+    """Scheduler job that only runs on the elected leader worker, with timing."""
+    return scheduler_leader.guard(job_metrics.timed(name, fn, warn_after_seconds))
+
+
+def run_otp_cleanup_job() -> bool:
+    """Nightly: delete legacy user_logins OTP rows expired for more than a day."""
+    db = SessionLocal()
+    try:
+        removed = OTPService(db).purge_expired(now_utc() - timedelta(days=1))
+        if removed:
+            logger.info("OTP cleanup job: deleted %d expired user_logins row(s)", removed)
+        return True
+    except Exception:
+        logger.exception("OTP cleanup job failed")
+        return False
+    finally:
+        db.close()
+
+
+def run_export_cache_cleanup_job() -> bool:
+    """Every 10 min: drop export jobs and cached export files past their TTL."""
+    try:
+        removed = export_jobs.purge_expired()
+        if removed:
+            logger.info("Export cache cleanup: removed %d file(s)", removed)
+        return True
+    except Exception:
+        logger.exception("Export cache cleanup failed")
+        return False
+
+
+def run_platform_counter_reconcile_job() -> bool:
+    """Nightly: recount the admin-dashboard tables and correct any counter drift."""
+    db = SessionLocal()
+    try:
+        drift = PlatformCounterService(db).reconcile()
+        corrected = {name: delta for name, delta in drift.items() if delta}
+        if corrected:
+            logger.warning("Platform counter reconcile: corrected drift %s", corrected)
+        return True
+    except Exception:
+        logger.exception("Platform counter reconcile job failed")
+        return False
+    finally:
+        db.close()
+
+
+def run_queue_stats_rollup_job(day: Optional[date] = None) -> bool:
+    """Every QUEUE_STATS_ROLLUP_MINUTES: re-aggregate today into queue_daily_stats."""
+    db = SessionLocal()
+    try:
+        QueueStatsService(db).rollup(day or today_app_date())
+        return True
+    except Exception:
+        logger.exception("Queue stats rollup job failed")
+        return False
+    finally:
+        db.close()
+
+
+def run_queue_stats_final_rollup_job() -> bool:
+    """Nightly, after the expiry job: final figures for yesterday."""
+    return run_queue_stats_rollup_job(today_app_date() - timedelta(days=1))
+
+
+def run_queue_stats_backfill_job() -> bool:
+    """Roll up recent days that have appointments but no queue_daily_stats rows."""
+    db = SessionLocal()
+    try:
+        today = today_app_date()
+        svc = QueueStatsService(db)
+        missing = svc.missing_days(today - timedelta(days=QUEUE_STATS_BACKFILL_DAYS), today)
+        for day in missing:
+            svc.rollup(day)
+        if missing:
+            logger.info("Queue stats backfill: rolled up %d day(s)", len(missing))
+        return True
+    except Exception:
+        logger.exception("Queue stats backfill failed")
+        return False
+    finally:
+        db.close()
+
+
+def run_review_summary_reconcile_job() -> bool:
+    """Nightly: rebuild review_summaries from reviews (covers deletes and manual edits)."""
+    db = SessionLocal()
+    try:
+        rows = ReviewService(db).reconcile_summaries()
+        logger.info("Review summary reconcile: %d summary row(s)", rows)
+        return True
+    except Exception:
+        logger.exception("Review summary reconcile job failed")
+        return False
+    finally:
+        db.close()
+
+
+def run_featured_reviews_refresh_job() -> bool:
+    """Every FEATURED_REVIEWS_REFRESH_MINUTES: recompute this worker's featured reviews."""
+    db = SessionLocal()
+    try:
+        featured_reviews.refresh(db)
+        return True
+    except Exception:
+        logger.exception("Featured reviews refresh failed")
+        return False
+    finally:
+        db.close()
+
+
+def run_startup_jobs() -> bool:
+    """Catch-up work after a restart. Runs once on the scheduler thread, so the
+    app starts serving while a large backlog is still being swept. Every step
+    runs even if an earlier one failed."""
+    results = [run_migration_job(), run_expiry_job(), run_activate_scheduled_job()]
+    db = SessionLocal()
+    try:
+        first_reconcile = PlatformCounterService(db).needs_reconcile()
+        first_review_summaries = not ReviewService(db).has_summaries()
     finally:
         db.close()
+    if first_reconcile:
+        results.append(run_platform_counter_reconcile_job())
+    if first_review_summaries:
+        results.append(run_review_summary_reconcile_job())
+    results.append(run_queue_stats_backfill_job())
+    results.append(run_queue_stats_rollup_job())
+    return all(results)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    run_migration_job()
-    run_expiry_job()
-    run_activate_scheduled_job()
+    scheduler_leader.start()
+    activation_timer.start()
+    # Outbox first: the ETA job hands heading-now pushes to it on this loop.
+    notification_outbox.start()
+    unread_invalidation.start(unread_counters.invalidate, unread_counters.clear)
     scheduler = BackgroundScheduler(timezone="Asia/Kolkata")
-    scheduler.add_job(run_expiry_job, "cron", hour=0, minute=5, id="expire_appointments")
-    scheduler.add_job(run_activate_scheduled_job, "interval", minutes=1, id="activate_scheduled")
-    scheduler.add_job(run_eta_notification_job, "interval", minutes=1, id="eta_notification")
+    scheduler.add_job(_leader_job("startup", run_startup_jobs), id="startup")  # no trigger: once, now
+    scheduler.add_job(_leader_job("expire_appointments", run_expiry_job),
+                      "cron", hour=0, minute=5, id="expire_appointments")
+    scheduler.add_job(_leader_job("activate_scheduled", run_activate_scheduled_job, warn_after_seconds=30),
+                      "interval", minutes=SCHEDULED_ACTIVATION_SWEEP_MINUTES, id="activate_scheduled")
+    scheduler.add_job(_leader_job("eta_notification", run_eta_notification_job, warn_after_seconds=30),
+                      "interval", minutes=1, id="eta_notification")
+    scheduler.add_job(job_metrics.timed("unread_reconcile", run_unread_reconcile_job),
+                      "interval", minutes=10, id="unread_reconcile")
+    scheduler.add_job(_leader_job("notification_retention", run_notification_retention_job),
+                      "cron", hour=3, minute=30, id="notification_retention")
+    scheduler.add_job(_leader_job("otp_cleanup", run_otp_cleanup_job),
+                      "cron", hour=4, minute=0, id="otp_cleanup")
+    scheduler.add_job(_leader_job("platform_counter_reconcile", run_platform_counter_reconcile_job),
+                      "cron", hour=3, minute=45, id="platform_counter_reconcile")
+    scheduler.add_job(_leader_job("queue_stats_rollup", run_queue_stats_rollup_job),
+                      "interval", minutes=QUEUE_STATS_ROLLUP_MINUTES, id="queue_stats_rollup")
+    scheduler.add_job(_leader_job("queue_stats_final_rollup", run_queue_stats_final_rollup_job),
+                      "cron", hour=0, minute=20, id="queue_stats_final_rollup")
+    scheduler.add_job(_leader_job("review_summary_reconcile", run_review_summary_reconcile_job),
+                      "cron", hour=3, minute=50, id="review_summary_reconcile")
+    # Per process: each worker holds its own featured list
+    scheduler.add_job(job_metrics.timed("featured_reviews_refresh", run_featured_reviews_refresh_job),
+                      "interval", minutes=FEATURED_REVIEWS_REFRESH_MINUTES, id="featured_reviews_refresh")
+    # Per process: the export cache is on this machine's disk
+    scheduler.add_job(job_metrics.timed("export_cache_cleanup", run_export_cache_cleanup_job),
+                      "interval", minutes=10, id="export_cache_cleanup")
     scheduler.start()
-    logger.info("APScheduler started: expiry at 00:05 IST, activate-scheduled every 1 min, ETA notification every 1 min")
+    logger.info(
+        "APScheduler started (%s): expiry at 00:05 IST, activate-scheduled sweep every %d min, "
+        "ETA notification every 1 min",
+        "leader" if scheduler_leader.is_leader else "follower", SCHEDULED_ACTIVATION_SWEEP_MINUTES,
+    )
     yield
     scheduler.shutdown(wait=False)
     logger.info("APScheduler shut down")
+    scheduler_leader.stop()
+    await activation_timer.stop()
+    await notification_outbox.stop()
+    await unread_invalidation.stop()
+    export_jobs.stop()
 
 
 app = FastAPI(
@@ -146,7 +388,12 @@ app.add_middleware(
 )
 
 app.add_middleware(AuthMiddleware)
+app.add_middleware(QueryBudgetMiddleware)
+# Outside auth, so latency includes authentication
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
 app.include_router(routers, prefix="/api")
+profile_sync_endpoints(app.routes)
 
 
 @app.exception_handler(IntegrityError)
@@ -178,6 +425,52 @@ def healthz():
     return {"status": "ok"}
 
 
+@app.get("/healthz/scheduler")
+def healthz_scheduler():
+    return {"leader": scheduler_leader.status(), "jobs": job_metrics.snapshot()}
+
+
+def metrics_authorized(request: Request) -> bool:
+    """Bearer METRICS_TOKEN. Closed when no token is configured: these routes skip
+    AuthMiddleware and expose SQL shapes and stack traces."""
+    return bool(METRICS_TOKEN) and hmac.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint(request: Request):
+    if not metrics_authorized(request):
+        return JSONResponse(status_code=401, content={"detail": {"message": "Not authenticated."}})
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/metrics/queries", include_in_schema=False)
+def query_report_endpoint(request: Request, limit: int = 20):
+    """Routes with the most SQL statements per request, and their repeated (N+1) statements."""
+    if not metrics_authorized(request):
+        return JSONResponse(status_code=401, content={"detail": {"message": "Not authenticated."}})
+    return {"routes": query_report.worst(limit)}
+
+
+@app.get("/metrics/profiles", include_in_schema=False)
+def list_profiles(request: Request):
+    """Folded-stack profiles written by the sampling profiler, newest first."""
+    if not metrics_authorized(request):
+        return JSONResponse(status_code=401, content={"detail": {"message": "Not authenticated."}})
+    return {"profiles": profiler.list_files()}
+
+
+@app.get("/metrics/profiles/{name}", include_in_schema=False)
+def download_profile(name: str, request: Request):
+    if not metrics_authorized(request):
+        return JSONResponse(status_code=401, content={"detail": {"message": "Not authenticated."}})
+    path = profiler.path_for(name)
+    if path is None:
+        return JSONResponse(status_code=404, content={"detail": {"message": "Profile not found."}})
+    return FileResponse(path, media_type="text/plain", filename=name)
+
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port, log_level="info")
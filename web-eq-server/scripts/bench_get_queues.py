@@ -0,0 +1,164 @@
+"""
+Benchmark — dashboard queue list (get_queues) on a business with long history.
+
+Usage (from web-eq-server/, against a local Postgres):
+    python -m scripts.bench_get_queues [--queues 30] [--queue-users 1000000] [--calls 50]
+
+Seeds a synthetic owner, business and --queues queues, then --queue-users
+historical appointments spread over them (and over 5000 synthetic customers)
+server-side with generate_series. Times the previous query, which ran three
+correlated subqueries per queue (employees json, services json and an all-time
+count(distinct user_id) over queue_users), against QueueService.get_queues.
+All synthetic rows are removed afterwards.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time as _time
+
+from sqlalchemy import func, select, text
+
+from app.db.database import SessionLocal
+from app.models.employee import Employee
+from app.models.queue import Queue, QueueService as QueueServiceModel, QueueUser
+from app.services.queue_service import QueueService
+
+PHONE_PREFIX = "bench-queues-"
+CUSTOMERS = 5000
+
+
+def seed(db, n_queues: int, n_queue_users: int):
+    owner_id = db.execute(
+        text(
+            "INSERT INTO users (uuid, country_code, phone_number, email_verify, created_at, updated_at) "
+            "VALUES (gen_random_uuid(), '+91', :phone, false, now(), now()) RETURNING uuid"
+        ),
+        {"phone": PHONE_PREFIX + "owner"},
+    ).scalar()
+    business_id = db.execute(
+        text(
+            "INSERT INTO businesses (uuid, name, country_code, phone_number, email_verify, status, "
+            "  is_always_open, owner_id, business_type, created_at, updated_at) "
+            "VALUES (gen_random_uuid(), 'Queue Bench', '+91', :phone, false, 1, false, :owner, 1, now(), now()) "
+            "RETURNING uuid"
+        ),
+        {"phone": PHONE_PREFIX + "business", "owner": owner_id},
+    ).scalar()
+    db.execute(
+        text(
+            "INSERT INTO queues (uuid, merchant_id, name, booking_mode, created_at, updated_at) "
+            "SELECT gen_random_uuid(), :business, 'Bench queue ' || g, 'QUEUE', now(), now() "
+            "FROM generate_series(1, :n) AS g"
+        ),
+        {"business": business_id, "n": n_queues},
+    )
+    db.execute(
+        text(
+            "INSERT INTO users (uuid, country_code, phone_number, email_verify, created_at, updated_at) "
+            "SELECT gen_random_uuid(), '+91', :prefix || g, false, now(), now() "
+            "FROM generate_series(1, :n) AS g"
+        ),
+        {"prefix": PHONE_PREFIX, "n": CUSTOMERS},
+    )
+    db.execute(
+        text(
+            "INSERT INTO queue_users (uuid, user_id, queue_id, queue_date, status, token_number, "
+            "  appointment_type, is_scheduled, reschedule_count, joined_queue, is_checked_in, "
+            "  delay_minutes, created_at, updated_at) "
+            "SELECT gen_random_uuid(), u.uuid, q.uuid, date '2020-01-01' + (g % 2000), 3, 'B-' || g, "
+            "  'QUEUE', false, 0, true, false, 0, now(), now() "
+            "FROM generate_series(1, :n) AS g "
+            "JOIN (SELECT uuid, row_number() OVER () - 1 AS idx FROM queues WHERE merchant_id = :business) q "
+            "  ON q.idx = g % :queues "
+            "JOIN (SELECT uuid, row_number() OVER () - 1 AS idx FROM users WHERE phone_number LIKE :like "
+            "      AND phone_number <> :owner_phone) u "
+            "  ON u.idx = (g * 7919) % :customers"
+        ),
+        {
+            "n": n_queue_users, "business": business_id, "queues": n_queues,
+            "like": PHONE_PREFIX + "%", "owner_phone": PHONE_PREFIX + "owner", "customers": CUSTOMERS,
+        },
+    )
+    db.execute(text("ANALYZE queues"))
+    db.execute(text("ANALYZE queue_users"))
+    db.commit()
+    return business_id
+
+
+def cleanup(db) -> None:
+    params = {"business_phone": PHONE_PREFIX + "business", "like": PHONE_PREFIX + "%"}
+    business_ids = "SELECT uuid FROM businesses WHERE phone_number = :business_phone"
+    queue_ids = f"SELECT uuid FROM queues WHERE merchant_id IN ({business_ids})"
+    db.execute(text(f"DELETE FROM queue_users WHERE queue_id IN ({queue_ids})"), params)
+    db.execute(text(f"DELETE FROM queues WHERE merchant_id IN ({business_ids})"), params)
+    db.execute(text(f"DELETE FROM businesses WHERE uuid IN ({business_ids})"), params)
+    db.execute(text("DELETE FROM users WHERE phone_number LIKE :like"), params)
+    db.commit()
+
+
+def legacy_get_queues(db, business_id):
+    """The get_queues query before the rewrite."""
+    emp_subq = (
+        select(func.coalesce(
+            func.json_agg(func.json_build_object("uuid", Employee.uuid, "name", Employee.full_name)), "[]",
+        ))
+        .select_from(Employee).where(Employee.queue_id == Queue.uuid).correlate(Queue).scalar_subquery()
+    )
+    svc_subq = (
+        select(func.coalesce(func.json_agg(func.json_build_object("uuid", QueueServiceModel.uuid)), "[]"))
+        .select_from(QueueServiceModel).where(QueueServiceModel.queue_id == Queue.uuid)
+        .correlate(Queue).scalar_subquery()
+    )
+    user_count_subq = (
+        select(func.count(func.distinct(QueueUser.user_id)))
+        .select_from(QueueUser).where(QueueUser.queue_id == Queue.uuid).correlate(Queue).scalar_subquery()
+    )
+    return (
+        db.query(
+            Queue.uuid, Queue.merchant_id, Queue.name, Queue.status, Queue.is_counter, Queue.limit,
+            Queue.created_at, emp_subq.label("employees"), svc_subq.label("services"),
+            user_count_subq.label("unique_users"),
+        )
+        .filter(Queue.merchant_id == business_id)
+        .all()
+    )
+
+
+def timed(label: str, fn, calls: int) -> float:
+    fn()  # warm the buffer cache
+    started = _time.perf_counter()
+    for _ in range(calls):
+        fn()
+    per_call = (_time.perf_counter() - started) / calls
+    print(f"{label:<28} {per_call * 1000:9.2f} ms / call")
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queues", type=int, default=30)
+    parser.add_argument("--queue-users", type=int, default=1_000_000)
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        cleanup(db)
+        started = _time.perf_counter()
+        business_id = seed(db, args.queues, args.queue_users)
+        print(f"seeded {args.queues} queues, {args.queue_users} queue_users "
+              f"in {_time.perf_counter() - started:.1f}s")
+
+        svc = QueueService(db)
+        before = timed("correlated subqueries", lambda: legacy_get_queues(db, business_id), args.calls)
+        after = timed("get_queues", lambda: (svc.get_queues(business_id), db.expunge_all()), args.calls)
+        print(f"speedup {before / after:.0f}x")
+    finally:
+        cleanup(db)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
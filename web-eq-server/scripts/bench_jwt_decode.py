@@ -0,0 +1,71 @@
+"""
+Benchmark — access-token verification cost per request under dashboard polling.
+
+Usage (from web-eq-server/, no database needed):
+    python -m scripts.bench_jwt_decode [--users 200] [--requests 50000]
+
+Mints --users session tokens the way AuthService does, then replays --requests
+requests in random user order (a polling dashboard re-sends the same token every
+few seconds) through each verification path:
+  * python-jose decode on every request (the previous middleware behaviour)
+  * PyJWT decode on every request (skipped if PyJWT is not installed)
+  * decode_access_token's verification cache in front of each backend
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time as _time
+import uuid
+from datetime import timedelta
+
+from app.middleware.auth import (
+    TokenVerificationCache, _JoseBackend, _PyJWTBackend, create_access_token,
+)
+
+
+def run(label: str, decode, tokens: list) -> float:
+    started = _time.perf_counter()
+    for token in tokens:
+        decode(token)
+    per_call = (_time.perf_counter() - started) / len(tokens)
+    print(f"{label:<28} {per_call * 1e6:8.1f} us / request")
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=50_000)
+    args = parser.parse_args()
+
+    sessions = [
+        create_access_token(
+            {"sub": str(uuid.uuid4()), "user_type": "BUSINESS", "client_type": "web"},
+            timedelta(hours=12),
+        )
+        for _ in range(args.users)
+    ]
+    rng = random.Random(5)
+    traffic = [rng.choice(sessions) for _ in range(args.requests)]
+    print(f"{args.users} sessions, {args.requests} requests")
+
+    backends = [_JoseBackend()]
+    try:
+        backends.append(_PyJWTBackend())
+    except ImportError:
+        print("(PyJWT not installed — pyjwt rows skipped)")
+
+    baseline = None
+    for backend in backends:
+        raw = run(f"{backend.name} decode", backend.decode, traffic)
+        baseline = baseline or raw
+        cache = TokenVerificationCache(max_entries=10_000, ttl_seconds=300)
+        cached = run(f"{backend.name} + cache", lambda t, c=cache, b=backend: c.decode(t, b), traffic)
+        print(f"{'':<28} {baseline / cached:8.0f}x vs jose decode, cache {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
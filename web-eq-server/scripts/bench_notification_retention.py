@@ -0,0 +1,98 @@
+"""
+Benchmark — notification paging (OFFSET vs keyset cursor) and the retention job.
+
+Usage (from web-eq-server/, against a local Postgres):
+    python -m scripts.bench_notification_retention [--notifications 5000000] [--users 50] \
+        [--depth 20000] [--older-than-days 30] [--mode archive|delete]
+
+Seeds --users synthetic users and --notifications rows spread one second apart
+(about two thirds read), then:
+  * checks that walking the first pages by cursor returns exactly the OFFSET pages,
+  * times one page at --depth rows deep with OFFSET and with a keyset cursor,
+  * times purge_read_before for read rows older than --older-than-days.
+The synthetic users are deleted afterwards (live and archived rows cascade).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time as _time
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from app.core.config import NOTIFICATION_RETENTION_BATCH_SIZE
+from app.core.utils import now_app_tz
+from app.db.database import SessionLocal
+from app.services.notification_service import NotificationService, encode_notification_cursor
+from scripts.bench_unread_count import cleanup, seed
+
+PAGE = 20
+
+
+def timed(fn, repeat: int = 20) -> float:
+    started = _time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (_time.perf_counter() - started) / repeat
+
+
+def check_pages(svc: NotificationService, user_id, pages: int) -> None:
+    cursor = None
+    for page in range(pages):
+        by_offset, _ = svc.get_for_user(user_id, limit=PAGE, offset=page * PAGE)
+        by_cursor, _ = svc.get_for_user(user_id, limit=PAGE, cursor=cursor)
+        if [n.uuid for n in by_offset] != [n.uuid for n in by_cursor]:
+            raise SystemExit(f"cursor page {page} differs from offset page")
+        if len(by_cursor) < PAGE:
+            break
+        cursor = encode_notification_cursor(by_cursor[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notifications", type=int, default=5_000_000)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=20_000, help="Rows skipped before the timed page")
+    parser.add_argument("--older-than-days", type=int, default=30)
+    parser.add_argument("--mode", choices=["archive", "delete"], default="archive")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        cleanup(db)
+        started = _time.perf_counter()
+        user_ids = seed(db, args.users, args.notifications)
+        print(f"seeded {args.notifications} notifications for {len(user_ids)} users "
+              f"in {_time.perf_counter() - started:.1f}s")
+
+        svc = NotificationService(db)
+        user_id = user_ids[0]
+        check_pages(svc, user_id, pages=50)
+        print("cursor pages match offset pages (first 50)")
+
+        anchor, _ = svc.get_for_user(user_id, limit=1, offset=args.depth - 1)
+        if not anchor:
+            raise SystemExit(f"--depth {args.depth} is past this user's notifications")
+        cursor = encode_notification_cursor(anchor[0])
+        offset_s = timed(lambda: svc.get_for_user(user_id, limit=PAGE, offset=args.depth))
+        cursor_s = timed(lambda: svc.get_for_user(user_id, limit=PAGE, cursor=cursor))
+        print(f"page at depth {args.depth}: OFFSET {offset_s * 1000:.1f} ms, "
+              f"cursor {cursor_s * 1000:.1f} ms (both include the total COUNT)")
+
+        cutoff = now_app_tz() - timedelta(days=args.older_than_days)
+        started = _time.perf_counter()
+        removed = svc.purge_read_before(cutoff, NOTIFICATION_RETENTION_BATCH_SIZE, archive=args.mode == "archive")
+        elapsed = _time.perf_counter() - started
+        remaining = db.execute(text("SELECT count(*) FROM notifications")).scalar()
+        print(f"retention ({args.mode}, older than {args.older_than_days}d, "
+              f"batch {NOTIFICATION_RETENTION_BATCH_SIZE}): {removed} rows in {elapsed:.1f}s "
+              f"({removed / elapsed if elapsed else 0:.0f} rows/s), {remaining} rows left")
+    finally:
+        cleanup(db)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
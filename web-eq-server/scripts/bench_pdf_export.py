@@ -0,0 +1,55 @@
+"""
+Benchmark — PDF report rendering, one table per page vs one table for all rows.
+
+Usage (from web-eq-server/, no database needed):
+    python -m scripts.bench_pdf_export [--rows 20000]
+
+Renders --rows synthetic queue-user rows with export_service.write_pdf twice:
+with PDF_ROWS_PER_PAGE tables (current) and with a single table of every row
+(the previous build_pdf layout), and reports time, pages and peak RSS.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import resource
+import tempfile
+import time as _time
+
+from app.services import export_service
+from app.services.export_service import QUEUE_USERS_EXPORT_COLUMNS, write_pdf
+
+
+def rows(n: int):
+    for i in range(n):
+        yield [f"Customer {i}", f"customer{i}@example.com", "+91 9876543210", f"T-{i}",
+               "2024-01-01", "2024-01-01 10:00", "Completed", "No"]
+
+
+def render(label: str, rows_per_table: int, n: int) -> None:
+    export_service.PDF_ROWS_PER_PAGE = rows_per_table
+    with tempfile.TemporaryFile() as out:
+        started = _time.perf_counter()
+        write_pdf("Queue Users Report", QUEUE_USERS_EXPORT_COLUMNS, rows(n), out)
+        elapsed = _time.perf_counter() - started
+        out.seek(0)
+        pages = out.read().count(b"/Type /Page\n")
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{label:<18} {elapsed:7.2f}s  {pages:6d} pages  peak RSS {rss_mb:.0f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    per_page = export_service.PDF_ROWS_PER_PAGE
+    print(f"{args.rows} rows")
+    # Per-page first: peak RSS is process-wide and only grows.
+    render(f"{per_page} rows / table", per_page, args.rows)
+    render("single table", args.rows + 1, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark — live-queue wait projection (calculate_queue_waits) on a synthetic busy day.
+
+Usage (from web-eq-server/):
+    python -m scripts.bench_queue_waits [--users 200] [--runs 50]
+
+Pure CPU benchmark: builds a HYBRID-style day (walk-ins, Fixed/Approximate
+appointments, not-yet-activated SCHEDULED blocks and a few breaks) in memory.
+No database connection is needed. Reports CPU time and tracemalloc peak
+allocation per recompute.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time as _time
+import tracemalloc
+import uuid
+from datetime import date, datetime, time
+
+from app.core.constants import (
+    QUEUE_USER_COMPLETED,
+    QUEUE_USER_IN_PROGRESS,
+    QUEUE_USER_REGISTERED,
+    QUEUE_USER_SCHEDULED,
+)
+from app.core.utils import APP_TZ, LiveQueueUser, work_calendar
+from app.services.realtime.live_queue_manager import calculate_queue_waits
+
+BREAKS = [(time(11, 0), time(11, 15)), (time(13, 0), time(14, 0)), (time(16, 30), time(16, 45))]
+
+
+def build_day(n_users: int, day: date, seed: int = 7) -> list[LiveQueueUser]:
+    """Synthetic live-queue users in the shape produced by build_live_queue_users_raw."""
+    rng = random.Random(seed)
+    users: list[LiveQueueUser] = []
+    for i in range(n_users):
+        status = rng.choice([
+            QUEUE_USER_REGISTERED, QUEUE_USER_REGISTERED, QUEUE_USER_REGISTERED,
+            QUEUE_USER_COMPLETED, QUEUE_USER_SCHEDULED,
+        ])
+        appointment_type = rng.choice(["QUEUE", "QUEUE", "FIXED", "APPROXIMATE"])
+        if status == QUEUE_USER_SCHEDULED and appointment_type == "QUEUE":
+            appointment_type = "FIXED"
+        scheduled_start = None
+        if appointment_type != "QUEUE":
+            scheduled_start = time(rng.randint(9, 19), rng.choice([0, 15, 30, 45]))
+        users.append(LiveQueueUser(
+            uuid=str(uuid.UUID(int=rng.getrandbits(128))),
+            token=f"T{i + 1:03d}",
+            status=status,
+            turn_time=rng.choice([10, 15, 20, 30]),
+            enqueue_time=datetime.combine(day, time(rng.randint(8, 11), rng.randint(0, 59))),
+            appointment_type=appointment_type,
+            scheduled_start=scheduled_start,
+        ))
+    users[0].status = QUEUE_USER_IN_PROGRESS
+    return users
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    day = date(2026, 1, 5)
+    users = build_day(args.users, day)
+    open_dt = APP_TZ.localize(datetime.combine(day, time(9, 0)))
+    now = APP_TZ.localize(datetime.combine(day, time(10, 0)))
+    calendar = work_calendar(BREAKS)
+
+    calculate_queue_waits(users, now=now, open_dt=open_dt, calendar=calendar)  # warm-up
+    started = _time.perf_counter()
+    for _ in range(args.runs):
+        calculate_queue_waits(users, now=now, open_dt=open_dt, calendar=calendar)
+    elapsed = (_time.perf_counter() - started) / args.runs
+
+    tracemalloc.start()
+    calculate_queue_waits(users, now=now, open_dt=open_dt, calendar=calendar)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"users={args.users} breaks={len(BREAKS)} runs={args.runs}")
+    print(f"calculate_queue_waits: {elapsed * 1000:.2f} ms / recompute, peak alloc {peak / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
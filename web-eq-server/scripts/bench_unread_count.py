@@ -0,0 +1,104 @@
+"""
+Benchmark — unread-notification count: COUNT query vs cached counter.
+
+Usage (from web-eq-server/, against a local Postgres):
+    python -m scripts.bench_unread_count [--notifications 1000000] [--users 1000] [--reads 2000]
+
+Seeds --users synthetic users and --notifications rows (about a third unread)
+server-side with generate_series, then times get_unread_count with the counter
+cache cold (one COUNT per call) and warm, plus one reconcile pass. The
+synthetic users are deleted afterwards (notifications cascade).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time as _time
+
+from sqlalchemy import text
+
+from app.db.database import SessionLocal
+from app.services.notification_service import NotificationService, unread_counters
+
+PHONE_PREFIX = "bench-unread-"
+
+
+def seed(db, n_users: int, n_notifications: int) -> list:
+    db.execute(
+        text(
+            "INSERT INTO users (uuid, country_code, phone_number, email_verify, created_at, updated_at) "
+            "SELECT gen_random_uuid(), '+91', :prefix || g, false, now(), now() "
+            "FROM generate_series(1, :n) AS g"
+        ),
+        {"prefix": PHONE_PREFIX, "n": n_users},
+    )
+    db.execute(
+        text(
+            "INSERT INTO notifications (uuid, user_id, type, title, body, is_read, created_at, updated_at) "
+            "SELECT gen_random_uuid(), u.uuid, 'BENCH', 'Bench', 'Bench notification', "
+            "       (g % 3 <> 0), now() - (g || ' seconds')::interval, now() "
+            "FROM generate_series(1, :n) AS g "
+            "JOIN (SELECT uuid, row_number() OVER () - 1 AS idx FROM users WHERE phone_number LIKE :like) u "
+            "  ON u.idx = g % :users"
+        ),
+        {"n": n_notifications, "users": n_users, "like": PHONE_PREFIX + "%"},
+    )
+    db.execute(text("ANALYZE notifications"))
+    db.commit()
+    return [row[0] for row in db.execute(
+        text("SELECT uuid FROM users WHERE phone_number LIKE :like"), {"like": PHONE_PREFIX + "%"}
+    )]
+
+
+def cleanup(db) -> None:
+    db.execute(text("DELETE FROM users WHERE phone_number LIKE :like"), {"like": PHONE_PREFIX + "%"})
+    db.commit()
+
+
+def timed_reads(svc: NotificationService, user_ids: list, reads: int, cold: bool) -> float:
+    rng = random.Random(11)
+    started = _time.perf_counter()
+    for _ in range(reads):
+        uid = rng.choice(user_ids)
+        if cold:
+            unread_counters.invalidate(uid)
+        svc.get_unread_count(uid)
+    return (_time.perf_counter() - started) / reads
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notifications", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--reads", type=int, default=2000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        cleanup(db)
+        started = _time.perf_counter()
+        user_ids = seed(db, args.users, args.notifications)
+        print(f"seeded {args.notifications} notifications for {len(user_ids)} users "
+              f"in {_time.perf_counter() - started:.1f}s")
+
+        svc = NotificationService(db)
+        cold = timed_reads(svc, user_ids, args.reads, cold=True)
+        for uid in user_ids:
+            svc.get_unread_count(uid)
+        warm = timed_reads(svc, user_ids, args.reads, cold=False)
+        started = _time.perf_counter()
+        drift = svc.reconcile_unread_counts()
+        reconcile = _time.perf_counter() - started
+
+        print(f"get_unread_count COUNT (cold): {cold * 1000:.3f} ms / call")
+        print(f"get_unread_count cached (warm): {warm * 1000:.4f} ms / call ({cold / warm:.0f}x)")
+        print(f"reconcile {len(user_ids)} users: {reconcile * 1000:.1f} ms, drift={drift}")
+    finally:
+        cleanup(db)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Concurrency check — chunked appointment expiry vs concurrent booking inserts.
+
+Usage (from web-eq-server/, against a local Postgres):
+    python -m scripts.check_expiry_concurrency --queue-id <uuid> [--rows 2000000] \
+        [--batch-size 5000] [--max-insert-ms 250]
+
+Seeds --rows past-day REGISTERED appointments on an existing queue, then runs
+expire_past_day_appointments in a thread while the main thread keeps inserting
+today's bookings on the same queue. Reports expiry throughput and the insert
+latency distribution, and exits non-zero if the slowest insert exceeds
+--max-insert-ms. Pass --batch-size larger than --rows to compare against a
+single unchunked UPDATE. All synthetic rows and the synthetic user are removed.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import threading
+import time as _time
+from uuid import UUID
+
+from sqlalchemy import text
+
+from app.core.utils import today_app_date
+from app.db.database import SessionLocal
+from app.models.queue import QueueUser
+from app.services.queue_service import QueueService
+from scripts.load_test_booking import percentile
+
+TOKEN_PREFIX = "bench-expiry-"
+PHONE = "bench-expiry-user"
+
+
+def seed(db, queue_id: UUID, rows: int) -> UUID:
+    user_id = db.execute(
+        text(
+            "INSERT INTO users (uuid, country_code, phone_number, email_verify, created_at, updated_at) "
+            "VALUES (gen_random_uuid(), '+91', :phone, false, now(), now()) RETURNING uuid"
+        ),
+        {"phone": PHONE},
+    ).scalar()
+    db.execute(
+        text(
+            "INSERT INTO queue_users (uuid, user_id, queue_id, queue_date, status, token_number, "
+            "  appointment_type, is_scheduled, reschedule_count, joined_queue, is_checked_in, "
+            "  delay_minutes, created_at, updated_at) "
+            "SELECT gen_random_uuid(), :user_id, :queue_id, date '2000-01-01' + (g % 3000), 1, "
+            "  :prefix || g, 'QUEUE', false, 0, false, false, 0, now(), now() "
+            "FROM generate_series(1, :n) AS g"
+        ),
+        {"user_id": user_id, "queue_id": queue_id, "prefix": TOKEN_PREFIX, "n": rows},
+    )
+    db.execute(text("ANALYZE queue_users"))
+    db.commit()
+    return user_id
+
+
+def cleanup(db) -> None:
+    db.execute(text("DELETE FROM queue_users WHERE token_number LIKE :like"), {"like": TOKEN_PREFIX + "%"})
+    db.execute(text("DELETE FROM users WHERE phone_number = :phone"), {"phone": PHONE})
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queue-id", required=True, type=UUID, help="Existing queue UUID")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--max-insert-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        cleanup(db)
+        started = _time.perf_counter()
+        user_id = seed(db, args.queue_id, args.rows)
+        print(f"seeded {args.rows} past-day appointments in {_time.perf_counter() - started:.1f}s")
+
+        result = {}
+
+        def expire() -> None:
+            expiry_db = SessionLocal()
+            try:
+                t0 = _time.perf_counter()
+                result["rows"] = QueueService(expiry_db).expire_past_day_appointments(
+                    today_app_date(), batch_size=args.batch_size
+                )
+                result["seconds"] = _time.perf_counter() - t0
+            finally:
+                expiry_db.close()
+
+        worker = threading.Thread(target=expire)
+        worker.start()
+        latencies = []
+        today = today_app_date()
+        while worker.is_alive():
+            t0 = _time.perf_counter()
+            db.add(QueueUser(
+                user_id=user_id, queue_id=args.queue_id, queue_date=today, status=1,
+                token_number=f"{TOKEN_PREFIX}live-{len(latencies)}", appointment_type="QUEUE",
+            ))
+            db.commit()
+            latencies.append(_time.perf_counter() - t0)
+        worker.join()
+
+        latencies.sort()
+        slowest_ms = latencies[-1] * 1000 if latencies else 0.0
+        print(f"expired {result['rows']} rows in {result['seconds']:.1f}s "
+              f"({result['rows'] / result['seconds']:.0f} rows/s, batch {args.batch_size})")
+        print(f"{len(latencies)} concurrent inserts: p50 {percentile(latencies, 0.50) * 1000:.1f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, max {slowest_ms:.1f} ms")
+        failed = slowest_ms > args.max_insert_ms
+        print("FAIL: inserts were blocked" if failed else "OK")
+    finally:
+        cleanup(db)
+        db.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Memory check — streamed CSV / XLSX export of a large queue.
+
+Usage (from web-eq-server/, against a local Postgres):
+    python -m scripts.check_export_memory --queue-id <uuid> [--rows 500000] [--max-rss-mb 300]
+
+Seeds --rows appointments on an existing queue, then runs the queue-users export
+for that queue the way /queue/get_users/export does for format=csv and
+format=xlsx (server-side cursor → stream_csv / stream_xlsx), discarding the bytes.
+Reports rows/s, output size and peak RSS, and exits non-zero if peak RSS exceeds
+--max-rss-mb. All synthetic rows and the synthetic user are removed.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import resource
+import time as _time
+from uuid import UUID
+
+from sqlalchemy import text
+
+from app.controllers.queue_controller import QueueController
+from app.db.database import SessionLocal
+from app.services.export_service import stream_csv, stream_xlsx
+
+TOKEN_PREFIX = "bench-export-"
+PHONE = "bench-export-user"
+COLUMNS = ["Name", "Email", "Phone", "Token No.", "Queue Date", "Enqueue Time", "Status", "Priority"]
+
+
+def seed(db, queue_id: UUID, rows: int) -> None:
+    user_id = db.execute(
+        text(
+            "INSERT INTO users (uuid, full_name, email, country_code, phone_number, email_verify, "
+            "  created_at, updated_at) "
+            "VALUES (gen_random_uuid(), 'Export Bench', 'bench-export@example.com', '+91', :phone, false, "
+            "  now(), now()) RETURNING uuid"
+        ),
+        {"phone": PHONE},
+    ).scalar()
+    db.execute(
+        text(
+            "INSERT INTO queue_users (uuid, user_id, queue_id, queue_date, enqueue_time, status, token_number, "
+            "  appointment_type, is_scheduled, reschedule_count, joined_queue, is_checked_in, "
+            "  delay_minutes, created_at, updated_at) "
+            "SELECT gen_random_uuid(), :user_id, :queue_id, date '2000-01-01' + (g % 3000), now(), 3, "
+            "  :prefix || g, 'QUEUE', false, 0, true, false, 0, now(), now() "
+            "FROM generate_series(1, :n) AS g"
+        ),
+        {"user_id": user_id, "queue_id": queue_id, "prefix": TOKEN_PREFIX, "n": rows},
+    )
+    db.execute(text("ANALYZE queue_users"))
+    db.commit()
+
+
+def cleanup(db) -> None:
+    db.execute(text("DELETE FROM queue_users WHERE token_number LIKE :like"), {"like": TOKEN_PREFIX + "%"})
+    db.execute(text("DELETE FROM users WHERE phone_number = :phone"), {"phone": PHONE})
+    db.commit()
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def export(label: str, stream, queue_id: UUID) -> None:
+    exported = 0
+
+    def rows_iter():
+        nonlocal exported
+        for row in QueueController._stream_queue_user_export_rows(
+            business_id=None, queue_id=queue_id, employee_id=None, search=None,
+        ):
+            exported += 1
+            yield row
+
+    started = _time.perf_counter()
+    size = sum(len(chunk) for chunk in stream(COLUMNS, rows_iter()))
+    elapsed = _time.perf_counter() - started
+    print(f"{label:<5} {exported} rows, {size / 1e6:.1f} MB in {elapsed:.1f}s "
+          f"({exported / elapsed:.0f} rows/s), peak RSS {peak_rss_mb():.0f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queue-id", required=True, type=UUID, help="Existing queue UUID")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--max-rss-mb", type=float, default=300.0)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        cleanup(db)
+        started = _time.perf_counter()
+        seed(db, args.queue_id, args.rows)
+        print(f"seeded {args.rows} appointments in {_time.perf_counter() - started:.1f}s, "
+              f"RSS {peak_rss_mb():.0f} MB")
+        export("csv", stream_csv, args.queue_id)
+        export("xlsx", stream_xlsx, args.queue_id)
+        failed = peak_rss_mb() > args.max_rss_mb
+        print(f"FAIL: peak RSS above {args.max_rss_mb:.0f} MB" if failed else "OK")
+    finally:
+        cleanup(db)
+        db.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
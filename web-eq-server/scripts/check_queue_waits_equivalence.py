@@ -0,0 +1,273 @@
+"""
+Equivalence check — calculate_queue_waits against the pre-optimisation algorithm.
+
+Usage (from web-eq-server/):
+    python -m scripts.check_queue_waits_equivalence [--cases 3000] [--max-users 300] [--seed 1]
+
+Builds randomized HYBRID days in memory (walk-ins, Fixed/Approximate
+appointments, not-yet-activated SCHEDULED blocks, missing turn times and
+enqueue times, overlapping breaks, "now" before / inside / after opening) and
+compares the full result of calculate_queue_waits with reference_queue_waits —
+the original quadratic merge (every SCHEDULED block rescanned per walk-in, the
+"scheduled ahead" count summed per user). No database is needed. Exits
+non-zero on the first mismatch and prints the seed that reproduces it.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import uuid
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.constants import (
+    QUEUE_USER_COMPLETED,
+    QUEUE_USER_IN_PROGRESS,
+    QUEUE_USER_REGISTERED,
+    QUEUE_USER_SCHEDULED,
+)
+from app.core.utils import APP_TZ, LiveQueueUser, WorkCalendar, format_time_12h, work_calendar
+from app.services.realtime.live_queue_manager import calculate_queue_waits
+
+DAY = date(2026, 1, 5)
+
+
+def _to_app_tz(dt: datetime) -> datetime:
+    return APP_TZ.localize(dt) if dt.tzinfo is None else dt.astimezone(APP_TZ)
+
+
+def _to_epoch_ms(dt: Optional[datetime]) -> Optional[int]:
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = APP_TZ.localize(dt)
+    return int(dt.timestamp() * 1000)
+
+
+def reference_queue_waits(
+    users: List[LiveQueueUser], now: datetime, open_dt: Optional[datetime], cal: WorkCalendar
+) -> Dict[str, Any]:
+    """calculate_queue_waits as it was before the merge was made linear."""
+    ref_date = open_dt.date() if open_dt is not None else now.date()
+    cursor = max(now, open_dt) if open_dt is not None else now
+    break_dts = cal.localized_breaks(ref_date)
+    advance = cal.advance
+    begin_after_breaks = cal.begin
+
+    def _spans_break_info(start_dt: datetime, end_dt: datetime) -> tuple:
+        for bs_dt, be_dt in break_dts:
+            if start_dt < bs_dt < end_dt:
+                return True, f"{format_time_12h(bs_dt)} – {format_time_12h(be_dt)}"
+        return False, None
+
+    completed_times = [u.turn_time for u in users if u.status == QUEUE_USER_COMPLETED and (u.turn_time or 0) > 0]
+    waiting_times = [u.turn_time for u in users if u.status == QUEUE_USER_REGISTERED and (u.turn_time or 0) > 0]
+    fallback_turn_time: float = (
+        sum(completed_times) / len(completed_times) if completed_times
+        else sum(waiting_times) / len(waiting_times) if waiting_times
+        else 15.0
+    )
+
+    def turn(u: LiveQueueUser) -> float:
+        return float(u.turn_time or fallback_turn_time)
+
+    current_token = None
+    in_progress_start_dt = in_progress_finish_dt = None
+    for u in users:
+        if u.status == QUEUE_USER_IN_PROGRESS:
+            current_token = u.token
+            if u.enqueue_time:
+                in_progress_start_dt = _to_app_tz(u.enqueue_time)
+                in_progress_finish_dt = advance(in_progress_start_dt, turn(u))
+            break
+    if in_progress_finish_dt:
+        cursor = max(cursor, in_progress_finish_dt)
+
+    sched_blocks: List[Tuple[datetime, float]] = []
+    for u in users:
+        if u.status == QUEUE_USER_SCHEDULED:
+            s_dt = u.scheduled_start_dt(ref_date)
+            if s_dt is not None:
+                sched_blocks.append((s_dt, turn(u)))
+    sched_blocks.sort(key=lambda x: x[0])
+
+    def _advance_past_conflicts(cursor_dt: datetime, wu_turn: float) -> datetime:
+        for s_dt, s_turn in sched_blocks:
+            s_end = advance(s_dt, s_turn)
+            if s_end <= cursor_dt:
+                continue
+            if s_dt < advance(cursor_dt, wu_turn):
+                cursor_dt = max(cursor_dt, s_end)
+        return cursor_dt
+
+    sched_dts: Dict[str, datetime] = {}
+    fixed_reg: List[LiveQueueUser] = []
+    walkins: List[LiveQueueUser] = []
+    for u in users:
+        if u.status != QUEUE_USER_REGISTERED:
+            continue
+        s_dt = u.scheduled_start_dt(ref_date)
+        if s_dt is not None:
+            sched_dts[u.uuid] = s_dt
+            fixed_reg.append(u)
+        else:
+            walkins.append(u)
+    fixed_reg.sort(key=lambda u: sched_dts[u.uuid])
+    never = APP_TZ.localize(datetime(9999, 1, 1))
+    walkins.sort(key=lambda u: _to_app_tz(u.enqueue_time) if u.enqueue_time is not None else never)
+
+    ordered: List[LiveQueueUser] = []
+    expected_dts: Dict[str, datetime] = {}
+    fi = wi = 0
+    cursor_val = cursor
+    while fi < len(fixed_reg) or wi < len(walkins):
+        take_walkin = fi >= len(fixed_reg)
+        if not take_walkin and wi < len(walkins):
+            adjusted = _advance_past_conflicts(cursor_val, turn(walkins[wi]))
+            take_walkin = advance(adjusted, turn(walkins[wi])) <= sched_dts[fixed_reg[fi].uuid]
+        if take_walkin:
+            wu = walkins[wi]
+            start = begin_after_breaks(_advance_past_conflicts(cursor_val, turn(wu)))
+            wi += 1
+        else:
+            wu = fixed_reg[fi]
+            start = begin_after_breaks(max(cursor_val, sched_dts[wu.uuid]))
+            fi += 1
+        expected_dts[wu.uuid] = start
+        cursor_val = advance(start, turn(wu))
+        ordered.append(wu)
+
+    wait_data: Dict[str, dict] = {}
+    for u in users:
+        if u.status == QUEUE_USER_IN_PROGRESS:
+            spans, label = (
+                _spans_break_info(in_progress_start_dt, in_progress_finish_dt)
+                if (in_progress_start_dt and in_progress_finish_dt) else (False, None)
+            )
+            wait_data[u.uuid] = {
+                "expected_at_ts": _to_epoch_ms(in_progress_finish_dt),
+                "expected_end_ts": _to_epoch_ms(in_progress_finish_dt),
+                "estimated_wait_minutes": None,
+                "estimated_appointment_time": format_time_12h(in_progress_finish_dt) if in_progress_finish_dt else None,
+                "estimated_end_time": format_time_12h(in_progress_finish_dt) if in_progress_finish_dt else None,
+                "service_duration_minutes": int(turn(u)),
+                "spans_break": spans,
+                "break_during_label": label,
+            }
+    for u in ordered:
+        exp_dt = expected_dts[u.uuid]
+        exp_end_dt = advance(exp_dt, turn(u))
+        spans, label = _spans_break_info(exp_dt, exp_end_dt)
+        wait_data[u.uuid] = {
+            "expected_at_ts": _to_epoch_ms(exp_dt),
+            "expected_end_ts": _to_epoch_ms(exp_end_dt),
+            "estimated_wait_minutes": max(0, int(round((exp_dt - now).total_seconds() / 60))),
+            "estimated_appointment_time": format_time_12h(exp_dt),
+            "estimated_end_time": format_time_12h(exp_end_dt),
+            "service_duration_minutes": int(turn(u)),
+            "spans_break": spans,
+            "break_during_label": label,
+        }
+    for u in users:
+        if u.status == QUEUE_USER_COMPLETED:
+            wait_data[u.uuid] = {
+                "expected_at_ts": None,
+                "expected_end_ts": None,
+                "estimated_wait_minutes": None,
+                "estimated_appointment_time": None,
+                "estimated_end_time": None,
+                "service_duration_minutes": None,
+            }
+
+    position_map: Dict[str, int] = {}
+    for i, u in enumerate(ordered):
+        exp_dt = expected_dts[u.uuid]
+        sched_ahead = sum(1 for s_dt, _ in sched_blocks if now < s_dt < exp_dt)
+        position_map[u.uuid] = i + 1 + sched_ahead
+
+    on_break_until_dt = next((be for bs, be in break_dts if bs <= now < be), None)
+    return {
+        "current_token": current_token,
+        "wait_data": wait_data,
+        "ordered_waiting": ordered,
+        "position_map": position_map,
+        "on_break_until": format_time_12h(on_break_until_dt) if on_break_until_dt else None,
+        "on_break_until_ts": _to_epoch_ms(on_break_until_dt),
+    }
+
+
+def random_breaks(rng: random.Random) -> List[Tuple[time, time]]:
+    breaks = []
+    for _ in range(rng.randint(0, 4)):
+        start = rng.randint(9 * 60, 19 * 60)
+        end = start + rng.choice([5, 15, 30, 60, 90])
+        breaks.append((time(start // 60, start % 60), time(min(end, 23 * 60) // 60, min(end, 23 * 60) % 60)))
+    return sorted(breaks)
+
+
+def random_day(rng: random.Random, max_users: int) -> List[LiveQueueUser]:
+    users = []
+    for i in range(rng.randint(0, max_users)):
+        status = rng.choice([
+            QUEUE_USER_REGISTERED, QUEUE_USER_REGISTERED, QUEUE_USER_REGISTERED,
+            QUEUE_USER_COMPLETED, QUEUE_USER_SCHEDULED, QUEUE_USER_SCHEDULED,
+        ])
+        appointment_type = rng.choice(["QUEUE", "QUEUE", "FIXED", "APPROXIMATE"])
+        if status == QUEUE_USER_SCHEDULED and rng.random() < 0.9:
+            appointment_type = rng.choice(["FIXED", "APPROXIMATE"])
+        scheduled_start = None
+        if appointment_type != "QUEUE" and rng.random() < 0.95:
+            scheduled_start = time(rng.randint(8, 20), rng.choice([0, 5, 15, 30, 45]))
+        enqueue_time = None
+        if rng.random() < 0.95:
+            enqueue_time = datetime.combine(DAY, time(rng.randint(7, 12), rng.randint(0, 59)))
+            if rng.random() < 0.3:
+                enqueue_time = APP_TZ.localize(enqueue_time)
+        users.append(LiveQueueUser(
+            uuid=str(uuid.UUID(int=rng.getrandbits(128))),
+            token=f"T{i + 1:03d}",
+            status=status,
+            turn_time=rng.choice([None, 5, 10, 15, 20, 30, 45]),
+            enqueue_time=enqueue_time,
+            appointment_type=appointment_type,
+            scheduled_start=scheduled_start,
+        ))
+    if users and rng.random() < 0.8:
+        users[0].status = QUEUE_USER_IN_PROGRESS
+    return users
+
+
+def _comparable(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {**result, "ordered_waiting": [u.uuid for u in result["ordered_waiting"]]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", type=int, default=3000)
+    parser.add_argument("--max-users", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    for case in range(args.cases):
+        seed = args.seed * 1_000_003 + case
+        rng = random.Random(seed)
+        users = random_day(rng, args.max_users)
+        calendar = work_calendar(random_breaks(rng))
+        open_dt = APP_TZ.localize(datetime.combine(DAY, time(9, 0))) if rng.random() < 0.9 else None
+        now = APP_TZ.localize(datetime.combine(DAY, time(8, 0)) + timedelta(minutes=rng.randint(0, 12 * 60)))
+
+        expected = _comparable(reference_queue_waits(users, now, open_dt, calendar))
+        actual = _comparable(calculate_queue_waits(users, now=now, open_dt=open_dt, calendar=calendar))
+        if actual != expected:
+            for key in expected:
+                if actual.get(key) != expected[key]:
+                    print(f"mismatch in {key!r} (case {case}, seed {seed}, users {len(users)})")
+            sys.exit(1)
+
+    print(f"{args.cases} randomized queues: calculate_queue_waits matches the reference")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Uniqueness check — TokenAllocator under concurrent bookings.
+
+Usage (from web-eq-server/, against local Postgres [+ Redis]):
+    python -m scripts.check_token_allocator --queue-id <uuid> [--bookings 1000] \
+        [--mode redis|lease|flush|split] [--date 2099-01-01] [--legacy-counter 26]
+
+Modes:
+    redis  Redis path (shared block installed in Redis, INCR within it)
+    lease  Redis disabled — numbers come from locally leased blocks
+    flush  Redis path, with the counter keys deleted halfway through and one
+           simulated outage, so the re-install and the local fallback both run
+    split  two workers (two allocators) sharing Redis and Postgres; worker A
+           loses Redis for the middle half of its calls and falls back to
+           leased blocks while worker B keeps using the Redis block
+
+--legacy-counter N first sets last_token to N with no block, as the plain INCR
+counter from before the leased blocks left it; the run then also fails if any
+number is <= N (Redis modes).
+
+Fires --bookings allocations concurrently and fails if any number repeats.
+Uses a far-future date by default and removes its counter row + Redis key after.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import time as _time
+from datetime import date
+from typing import List
+from uuid import UUID
+
+from app.core.config import REDIS_URL
+from app.db.database import SessionLocal
+from app.models.queue import QueueTokenCounter
+from app.services.token_allocator import TokenAllocator
+
+
+class _FlakyRedis:
+    """Wraps a Redis client: deletes the counter keys once and fails eval calls
+    numbered outage_from..outage_to."""
+
+    def __init__(self, client, redis_keys: List[str], flush_at: int, outage_from: int, outage_to: int) -> None:
+        self._client = client
+        self._redis_keys = redis_keys
+        self._flush_at = flush_at
+        self._outage = range(outage_from, outage_to + 1)
+        self._calls = 0
+
+    async def eval(self, *args):
+        self._calls += 1
+        if self._calls == self._flush_at:
+            await self._client.delete(*self._redis_keys)
+        if self._calls in self._outage:
+            raise ConnectionError("simulated Redis outage")
+        return await self._client.eval(*args)
+
+
+async def run(args: argparse.Namespace) -> int:
+    date_str = args.date
+    redis_keys = [
+        f"queue:{args.queue_id}:{date_str}:last_token",
+        f"queue:{args.queue_id}:{date_str}:token_block_end",
+        f"queue:{args.queue_id}:{date_str}:token_next_block",
+    ]
+    client = None
+    if args.mode != "lease":
+        from redis import asyncio as aioredis
+        client = await aioredis.from_url(REDIS_URL, decode_responses=True)
+        await client.delete(*redis_keys)
+        if args.legacy_counter:
+            await client.set(redis_keys[0], args.legacy_counter)
+    floor = args.legacy_counter if client is not None else 0
+
+    # (allocator, redis) per simulated worker; bookings are spread across them
+    workers = [(TokenAllocator(), client)]
+    if args.mode == "flush":
+        quarter = args.bookings // 4
+        workers = [(TokenAllocator(), _FlakyRedis(client, redis_keys, args.bookings // 2, quarter, quarter))]
+    elif args.mode == "split":
+        quarter = args.bookings // 8  # each worker makes about half the calls
+        workers = [
+            (TokenAllocator(), _FlakyRedis(client, redis_keys, 0, quarter, 3 * quarter)),
+            (TokenAllocator(), client),
+        ]
+
+    started = _time.perf_counter()
+    numbers = await asyncio.gather(*(
+        workers[i % len(workers)][0].next_number(workers[i % len(workers)][1], args.queue_id, date_str)
+        for i in range(args.bookings)
+    ))
+    elapsed = _time.perf_counter() - started
+
+    duplicates = len(numbers) - len(set(numbers))
+    reissued = sum(1 for number in numbers if number <= floor)
+    print(f"mode={args.mode} workers={len(workers)} bookings={args.bookings} block={workers[0][0].block_size}")
+    print(f"allocated {len(numbers)} tokens in {elapsed:.2f}s ({len(numbers) / elapsed:.0f}/s), "
+          f"range {min(numbers)}..{max(numbers)}, duplicates={duplicates}, at or below legacy counter={reissued}")
+
+    db = SessionLocal()
+    try:
+        db.query(QueueTokenCounter).filter(
+            QueueTokenCounter.queue_id == UUID(args.queue_id),
+            QueueTokenCounter.queue_date == date.fromisoformat(date_str),
+        ).delete()
+        db.commit()
+    finally:
+        db.close()
+    if client is not None:
+        await client.delete(*redis_keys)
+        await client.aclose()
+    return 1 if duplicates or reissued else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queue-id", required=True, help="Existing queue UUID (counter rows reference it)")
+    parser.add_argument("--date", default="2099-01-01")
+    parser.add_argument("--bookings", type=int, default=1000)
+    parser.add_argument("--mode", choices=["redis", "lease", "flush", "split"], default="redis")
+    parser.add_argument("--legacy-counter", type=int, default=0)
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
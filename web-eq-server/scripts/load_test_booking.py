@@ -0,0 +1,103 @@
+"""
+Load test — POST /api/queue/book against a running server (local Postgres).
+
+Usage (from web-eq-server/, server already running):
+    python -m scripts.load_test_booking --user-id <staff-user-uuid> \
+        --business-id <uuid> --service-id <queue-service-uuid> [--service-id ...] \
+        [--base-url http://localhost:8000] [--bookings 500] [--concurrency 50]
+
+Each request is a walk-in for a fresh synthetic phone number, so every call
+goes through the full write path (guest user, duplicate/conflict reads, token,
+insert) instead of short-circuiting on an existing booking. The access token is
+minted locally with SECRET_KEY, so run it with the server's .env.
+
+Reports bookings/sec, p50/p95/max latency and the HTTP status breakdown.
+Creates real rows — point it at a disposable database.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import random
+import time as _time
+from collections import Counter
+from datetime import timedelta
+
+import httpx
+
+from app.core.utils import today_app_date
+from app.middleware.auth import create_access_token
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+
+async def run(args: argparse.Namespace) -> None:
+    token = create_access_token(
+        {"sub": args.user_id, "user_type": "BUSINESS", "client_type": "web"},
+        timedelta(hours=1),
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    queue_date = args.date or today_app_date().isoformat()
+    phone_base = random.randint(6_000_000_000, 9_000_000_000)
+
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=60) as client:
+        async def book(i: int) -> None:
+            payload = {
+                "business_id": args.business_id,
+                "queue_date": queue_date,
+                "service_ids": args.service_id,
+                "recipient_phone": str(phone_base + i),
+                "recipient_country_code": "+91",
+                "recipient_name": f"Load test {i}",
+                "is_walk_in": True,
+            }
+            async with semaphore:
+                started = _time.perf_counter()
+                try:
+                    resp = await client.post("/api/queue/book", json=payload)
+                    statuses[resp.status_code] += 1
+                except httpx.HTTPError as exc:
+                    statuses[type(exc).__name__] += 1
+                latencies.append(_time.perf_counter() - started)
+
+        started = _time.perf_counter()
+        await asyncio.gather(*(book(i) for i in range(args.bookings)))
+        elapsed = _time.perf_counter() - started
+
+    latencies.sort()
+    ok = statuses.get(200, 0)
+    print(f"bookings={args.bookings} concurrency={args.concurrency} date={queue_date}")
+    print(f"throughput: {ok / elapsed:.1f} bookings/s ({ok} ok in {elapsed:.2f}s)")
+    print(
+        f"latency: p50 {percentile(latencies, 0.50) * 1000:.1f} ms, "
+        f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms, "
+        f"max {latencies[-1] * 1000 if latencies else 0:.1f} ms"
+    )
+    print("statuses: " + ", ".join(f"{k}={v}" for k, v in sorted(statuses.items(), key=str)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--user-id", required=True, help="User the requests authenticate as")
+    parser.add_argument("--business-id", required=True)
+    parser.add_argument("--service-id", action="append", required=True, help="QueueService UUID (repeatable)")
+    parser.add_argument("--date", default=None, help="YYYY-MM-DD, defaults to today")
+    parser.add_argument("--bookings", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()